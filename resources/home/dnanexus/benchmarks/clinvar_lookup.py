@@ -0,0 +1,520 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import gzip
+import json
+import multiprocessing
+from pathlib import Path
+import pickle
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import vcfpy
+
+from benchmarks import run_benchmarks, synthetic_case
+from utils import vcf
+
+BASELINE = Path(__file__).resolve().parent / "clinvar_baseline.json"
+
+# number of records of the synthetic ClinVar VCFs, the current ClinVar
+# having about 3M records
+RECORDS = [10000, 100000, 1000000, 3000000]
+
+# number of ClinVar IDs looked up, one per germline variant of a case
+IDS = [1, 10, 100, 1000]
+
+
+def lookup_vcfpy_load(clinvar: str, variants: list) -> dict:
+    """Load the significance of every record with vcfpy and look the IDs up
+    in it, the strategy of generate_workbook.py where the load is shared by
+    the cases of a batch
+
+    Parameters
+    ----------
+    clinvar : str
+        Path to the bgzipped ClinVar VCF
+    variants : list
+        List of the ClinVar ID, chromosome and position of every variant
+
+    Returns
+    -------
+    dict
+        Dict of the significance of the IDs found
+    """
+
+    clinvar_info = vcf.find_clinvar_info(
+        vcf.load_clinvar_significance(vcf.open_vcf(clinvar)),
+        *(clinvar_id for clinvar_id, _, _ in variants),
+    )
+
+    return dict(zip(clinvar_info["ClinVar ID"], clinvar_info["clnsigconf"]))
+
+
+def lookup_vcfpy_early_exit(clinvar: str, variants: list) -> dict:
+    """Scan the records with vcfpy until all the IDs are found
+
+    Parameters
+    ----------
+    clinvar : str
+        Path to the bgzipped ClinVar VCF
+    variants : list
+        List of the ClinVar ID, chromosome and position of every variant
+
+    Returns
+    -------
+    dict
+        Dict of the significance of the IDs found
+    """
+
+    ids_to_find = {clinvar_id for clinvar_id, _, _ in variants}
+    significance = {}
+
+    for record in vcf.open_vcf(clinvar):
+        if record.ID[0] in ids_to_find:
+            significance[record.ID[0]] = ",".join(
+                record.INFO.get("CLNSIGCONF")
+                or record.INFO.get("CLNSIG")
+                or [""]
+            )
+            ids_to_find.remove(record.ID[0])
+
+            if not ids_to_find:
+                break
+
+    return significance
+
+
+def lookup_raw_line(clinvar: str, variants: list) -> dict:
+    """Scan the lines of the VCF until all the IDs are found, only the INFO
+    of the lines of the IDs being parsed
+
+    Parameters
+    ----------
+    clinvar : str
+        Path to the bgzipped ClinVar VCF
+    variants : list
+        List of the ClinVar ID, chromosome and position of every variant
+
+    Returns
+    -------
+    dict
+        Dict of the significance of the IDs found
+    """
+
+    ids_to_find = {clinvar_id for clinvar_id, _, _ in variants}
+    significance = {}
+
+    with gzip.open(clinvar, "rt") as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+
+            fields = line.split("\t", 8)
+
+            if fields[2] in ids_to_find:
+                significance[fields[2]] = get_info_significance(
+                    fields[7].rstrip("\n")
+                )
+                ids_to_find.remove(fields[2])
+
+                if not ids_to_find:
+                    break
+
+    return significance
+
+
+def get_info_significance(info: str) -> str:
+    """Get CLNSIGCONF at best, CLNSIG if not or an empty string at worst
+    from the INFO column of a VCF line
+
+    Parameters
+    ----------
+    info : str
+        INFO column of the line
+
+    Returns
+    -------
+    str
+        Clinical significance
+    """
+
+    fields = dict(
+        field.split("=", 1) for field in info.split(";") if "=" in field
+    )
+
+    return fields.get("CLNSIGCONF") or fields.get("CLNSIG") or ""
+
+
+def build_id_index(clinvar: str) -> str:
+    """Write the significance of every record of the VCF in a pickle next to
+    it, built once per ClinVar release
+
+    Parameters
+    ----------
+    clinvar : str
+        Path to the bgzipped ClinVar VCF
+
+    Returns
+    -------
+    str
+        Path to the index
+    """
+
+    index = f"{clinvar}.ids.pickle"
+    significance = {}
+
+    with gzip.open(clinvar, "rt") as f:
+        for line in f:
+            if not line.startswith("#"):
+                fields = line.split("\t", 8)
+                significance[fields[2]] = get_info_significance(
+                    fields[7].rstrip("\n")
+                )
+
+    with open(index, "wb") as f:
+        pickle.dump(significance, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return index
+
+
+def lookup_id_index(clinvar: str, variants: list) -> dict:
+    """Load the persistent index of the IDs built by build_id_index and look
+    the IDs up in it
+
+    Parameters
+    ----------
+    clinvar : str
+        Path to the bgzipped ClinVar VCF
+    variants : list
+        List of the ClinVar ID, chromosome and position of every variant
+
+    Returns
+    -------
+    dict
+        Dict of the significance of the IDs found
+    """
+
+    with open(f"{clinvar}.ids.pickle", "rb") as f:
+        significance = pickle.load(f)
+
+    return {
+        clinvar_id: significance[clinvar_id]
+        for clinvar_id, _, _ in variants
+        if clinvar_id in significance
+    }
+
+
+def lookup_tabix(clinvar: str, variants: list) -> dict:
+    """Fetch the records at the position of every variant with the tabix
+    index, the germline variants having their coordinates in the reported
+    variants
+
+    Parameters
+    ----------
+    clinvar : str
+        Path to the bgzipped ClinVar VCF
+    variants : list
+        List of the ClinVar ID, chromosome and position of every variant
+
+    Returns
+    -------
+    dict
+        Dict of the significance of the IDs found
+    """
+
+    significance = {}
+    reader = vcfpy.Reader.from_path(clinvar, tabix_path=f"{clinvar}.tbi")
+
+    for clinvar_id, chromosome, position in variants:
+        # fetch takes 0-based half open coordinates
+        for record in reader.fetch(chromosome, position - 1, position):
+            if record.ID[0] == clinvar_id:
+                significance[clinvar_id] = ",".join(
+                    record.INFO.get("CLNSIGCONF")
+                    or record.INFO.get("CLNSIG")
+                    or [""]
+                )
+
+    return significance
+
+
+STRATEGIES = {
+    "vcfpy_load": lookup_vcfpy_load,
+    "vcfpy_early_exit": lookup_vcfpy_early_exit,
+    "raw_line": lookup_raw_line,
+    "id_index": lookup_id_index,
+    "tabix": lookup_tabix,
+}
+
+
+def main(**kwargs):
+    results = {
+        "machine": run_benchmarks.get_machine(),
+        "repeats": kwargs["repeats"],
+        "strategies": kwargs["strategies"],
+        "scales": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = Path(kwargs["data_dir"] or tmp_dir)
+
+        for records in kwargs["records"]:
+            print(f"Writing a ClinVar VCF of {records} records...")
+            clinvar = data_dir / f"clinvar_{records}.vcf.gz"
+            synthetic_case.write_clinvar_vcf(clinvar, records)
+
+            # the index is built once per ClinVar release, its build isn't
+            # part of the lookup
+            start = time.perf_counter()
+            build_id_index(str(clinvar))
+            index_time = time.perf_counter() - start
+            print(f"    id_index built in {index_time:.3f}s")
+
+            for ids in kwargs["ids"]:
+                scale = f"{records} records, {ids} IDs"
+                print(f"Benchmarking the lookup of {scale}...")
+                results["scales"][scale] = run_lookups(
+                    str(clinvar),
+                    records,
+                    ids,
+                    kwargs["strategies"],
+                    kwargs["repeats"],
+                )
+                results["scales"][scale]["stages"][
+                    "id_index build"
+                ] = index_time
+                print_lookups(results["scales"][scale])
+
+    if kwargs["output"]:
+        run_benchmarks.write_results(kwargs["output"], results)
+
+    if kwargs["update_baseline"]:
+        run_benchmarks.write_results(kwargs["baseline"], results)
+        print(f"Baseline written to {kwargs['baseline']}")
+        return
+
+    with open(kwargs["baseline"]) as f:
+        baseline = json.load(f)
+
+    regressions = run_benchmarks.get_regressions(
+        results, baseline, kwargs["tolerance"], kwargs["min_slowdown"]
+    )
+
+    if regressions:
+        print("Lookups slower than the baseline:")
+
+        for scale, strategy, baseline_time, wall_time in regressions:
+            print(
+                f"    {scale} {strategy}: {baseline_time:.3f}s -> "
+                f"{wall_time:.3f}s"
+            )
+
+        sys.exit(1)
+
+    print("No lookup is slower than the baseline")
+
+
+def run_lookups(
+    clinvar: str, records: int, ids: int, strategies: list, repeats: int
+) -> dict:
+    """Time the lookup of random IDs of the VCF with every strategy, every
+    lookup running in a new process so that it doesn't reuse the memory of
+    the previous ones. The memory is measured in another lookup traced with
+    tracemalloc, the peak RSS of a process being inherited from its parent
+    on Linux. The strategies are checked to find the same significance
+
+    Parameters
+    ----------
+    clinvar : str
+        Path to the bgzipped ClinVar VCF
+    records : int
+        Number of records of the VCF
+    ids : int
+        Number of IDs to look up
+    strategies : list
+        Names of the strategies
+    repeats : int
+        Number of timed lookups per strategy, the fastest being kept
+
+    Returns
+    -------
+    dict
+        Dict with the parameters, the fastest lookup time in seconds and the
+        peak of the memory allocated in bytes of every strategy
+    """
+
+    variants = [
+        (
+            str(clinvar_id),
+            *synthetic_case.get_clinvar_position(clinvar_id, records),
+        )
+        for clinvar_id in random.Random(ids).sample(range(records), ids)
+    ]
+    stages = {}
+    traced_peaks = {}
+    expected_significance = None
+
+    with ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=1,
+    ) as executor:
+        for strategy in strategies:
+            # the last lookup is traced
+            for trace in [False] * repeats + [True]:
+                significance, wall_time, traced_peak = executor.submit(
+                    measure_lookup, strategy, clinvar, variants, trace
+                ).result()
+
+                if expected_significance is None:
+                    expected_significance = significance
+
+                assert (
+                    significance == expected_significance
+                ), f"{strategy} found a different significance"
+
+                if trace:
+                    traced_peaks[strategy] = traced_peak
+                else:
+                    stages[strategy] = min(
+                        wall_time, stages.get(strategy, wall_time)
+                    )
+
+    return {
+        "parameters": {"records": records, "ids": ids},
+        "stages": stages,
+        "traced_peak": traced_peaks,
+    }
+
+
+def measure_lookup(
+    strategy: str, clinvar: str, variants: list, trace: bool = False
+) -> tuple:
+    """Look the variants up with a strategy and measure it
+
+    Parameters
+    ----------
+    strategy : str
+        Name of the strategy
+    clinvar : str
+        Path to the bgzipped ClinVar VCF
+    variants : list
+        List of the ClinVar ID, chromosome and position of every variant
+    trace : bool, optional
+        Whether to trace the memory allocations, which slows the lookup
+
+    Returns
+    -------
+    tuple
+        - Dict of the significance of the IDs found
+        - Wall time of the lookup in seconds
+        - Peak of the memory allocated by Python during the lookup in bytes,
+          0 if not traced
+    """
+
+    if trace:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    significance = STRATEGIES[strategy](clinvar, variants)
+    wall_time = time.perf_counter() - start
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return significance, wall_time, traced_peak
+
+
+def print_lookups(lookups: dict):
+    """Print the time and memory of the lookups of every strategy, the
+    fastest strategy first
+
+    Parameters
+    ----------
+    lookups : dict
+        Results of the lookups returned by run_lookups
+    """
+
+    for strategy, wall_time in sorted(
+        lookups["stages"].items(), key=lambda item: item[1]
+    ):
+        if strategy in lookups["traced_peak"]:
+            traced_peak = lookups["traced_peak"][strategy] / 1024**2
+            print(f"    {strategy}: {wall_time:.4f}s, {traced_peak:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=(
+            "Time the lookup of ClinVar IDs in synthetic ClinVar VCFs with "
+            "every strategy and compare the times to a baseline"
+        )
+    )
+    parser.add_argument(
+        "-r",
+        "--records",
+        nargs="+",
+        type=int,
+        default=RECORDS,
+        help="Number of records of the ClinVar VCFs",
+    )
+    parser.add_argument(
+        "-i",
+        "--ids",
+        nargs="+",
+        type=int,
+        default=IDS,
+        help="Number of ClinVar IDs looked up",
+    )
+    parser.add_argument(
+        "-s",
+        "--strategies",
+        nargs="+",
+        choices=STRATEGIES,
+        default=list(STRATEGIES),
+        help="Lookup strategies to run",
+    )
+    parser.add_argument(
+        "-n",
+        "--repeats",
+        type=int,
+        default=3,
+        help="Number of lookups per strategy, the fastest being kept",
+    )
+    parser.add_argument(
+        "-d",
+        "--data_dir",
+        help="Folder of the VCFs, a temporary folder by default",
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        default=str(BASELINE),
+        help="JSON file of the baseline",
+    )
+    parser.add_argument(
+        "-u",
+        "--update_baseline",
+        action="store_true",
+        help="Store the results as the baseline instead of comparing them",
+    )
+    parser.add_argument(
+        "-o", "--output", help="JSON file to write the results in"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=run_benchmarks.TOLERANCE,
+        help="Relative increase of the time above which a lookup is slower",
+    )
+    parser.add_argument(
+        "--min_slowdown",
+        type=float,
+        default=run_benchmarks.MIN_SLOWDOWN,
+        help=(
+            "Increase of the time in seconds below which a lookup is ignored"
+        ),
+    )
+    args = parser.parse_args()
+    main(**vars(args))
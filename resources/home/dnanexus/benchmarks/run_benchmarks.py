@@ -0,0 +1,418 @@
+import argparse
+import json
+import os
+from pathlib import Path
+import platform
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import synthetic_case
+
+GENERATE_WORKBOOK = (
+    Path(__file__).resolve().parents[1] / "generate_workbook.py"
+)
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# scaling matrix of the synthetic cases, every dimension growing with the
+# scale
+SCALES = {
+    "small": {
+        "genes": 2000,
+        "somatic": 100,
+        "germline": 10,
+        "structural_variants": 100,
+        "fusion_partners": 2,
+        "figures": 11,
+        "clinvar_records": 10000,
+    },
+    "medium": {
+        "genes": 5000,
+        "somatic": 1000,
+        "germline": 100,
+        "structural_variants": 1000,
+        "fusion_partners": 3,
+        "figures": 11,
+        "clinvar_records": 100000,
+    },
+    "large": {
+        "genes": 20000,
+        "somatic": 5000,
+        "germline": 500,
+        "structural_variants": 5000,
+        "fusion_partners": 4,
+        "figures": 22,
+        "clinvar_records": 1000000,
+    },
+}
+
+REFERENCE_PARAMETERS = ["genes", "clinvar_records"]
+
+# deepest spans of the case timed as stages, the spans of depth 1 being the
+# stages of write_case_workbook and the deeper ones the sheets
+STAGE_DEPTH = 1
+
+# a stage is slower than its baseline if its time increased by more than the
+# tolerance and more than the minimum slowdown in seconds, so that the noise
+# of the short stages isn't reported
+TOLERANCE = 0.25
+MIN_SLOWDOWN = 0.05
+
+
+def main(**kwargs):
+    workbook_args = shlex.split(kwargs["workbook_args"] or "")
+    results = {
+        "machine": get_machine(),
+        "repeats": kwargs["repeats"],
+        "workbook_args": workbook_args,
+        "scales": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = Path(kwargs["data_dir"] or tmp_dir)
+
+        for scale in kwargs["scales"]:
+            print(f"Benchmarking the {scale} case...")
+            results["scales"][scale] = run_scale(
+                scale,
+                SCALES[scale],
+                data_dir / scale,
+                kwargs["repeats"],
+                workbook_args,
+            )
+            print_scale(results["scales"][scale])
+
+    if kwargs["output"]:
+        write_results(kwargs["output"], results)
+
+    if kwargs["update_baseline"]:
+        write_results(kwargs["baseline"], results)
+        print(f"Baseline written to {kwargs['baseline']}")
+        return
+
+    with open(kwargs["baseline"]) as f:
+        baseline = json.load(f)
+
+    regressions = get_regressions(
+        results, baseline, kwargs["tolerance"], kwargs["min_slowdown"]
+    )
+
+    if regressions:
+        print("Stages slower than the baseline:")
+
+        for scale, stage, baseline_time, wall_time in regressions:
+            print(
+                f"    {scale} {stage}: {baseline_time:.3f}s -> "
+                f"{wall_time:.3f}s"
+            )
+
+        sys.exit(1)
+
+    print("No stage is slower than the baseline")
+
+
+def get_machine() -> dict:
+    """Get the description of the machine running the benchmarks, stored
+    with the results as the times only compare on the same machine
+
+    Returns
+    -------
+    dict
+        Dict with the platform, Python version and number of CPUs
+    """
+
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run_scale(
+    scale: str,
+    parameters: dict,
+    folder: Path,
+    repeats: int,
+    workbook_args: list,
+) -> dict:
+    """Generate the synthetic inputs of a scale and time generate_workbook.py
+    on them
+
+    Parameters
+    ----------
+    scale : str
+        Name of the scale, name of the case
+    parameters : dict
+        Dict of the parameters of the scale
+    folder : Path
+        Folder of the inputs and of the runs
+    repeats : int
+        Number of runs, the fastest time of every stage being kept
+    workbook_args : list
+        Additional arguments of generate_workbook.py
+
+    Returns
+    -------
+    dict
+        Dict with the parameters, the wall time in seconds of every stage and
+        the peak RSS of the runs
+    """
+
+    references = synthetic_case.generate_references(
+        folder / "references",
+        **{name: parameters[name] for name in REFERENCE_PARAMETERS},
+    )
+    case = synthetic_case.generate_case(folder / "case", scale, **parameters)
+
+    stages = {}
+    peak_rss = 0
+
+    for _ in range(repeats):
+        run_stages, run_peak_rss = run_case(
+            references, case, scale, folder / "run", workbook_args
+        )
+        peak_rss = max(peak_rss, run_peak_rss)
+
+        for stage, wall_time in run_stages.items():
+            stages[stage] = min(wall_time, stages.get(stage, wall_time))
+
+    return {"parameters": parameters, "stages": stages, "peak_rss": peak_rss}
+
+
+def run_case(
+    references: dict,
+    case: dict,
+    name: str,
+    folder: Path,
+    workbook_args: list,
+) -> tuple:
+    """Run generate_workbook.py on a case in a new process and get the time
+    of its stages from the performance report of the case
+
+    Parameters
+    ----------
+    references : dict
+        Dict of the paths of the reference files
+    case : dict
+        Dict of the paths of the files of the case
+    name : str
+        Name of the case, name of the workbook and of its report
+    folder : Path
+        Working directory of the run, in which the workbook is written
+    workbook_args : list
+        Additional arguments of generate_workbook.py
+
+    Returns
+    -------
+    tuple
+        - Dict of the wall time in seconds of every stage, "main" being the
+          whole process including the imports
+        - Peak RSS of the run in bytes
+    """
+
+    folder.mkdir(parents=True, exist_ok=True)
+    args = [
+        f"--{argument}={path}"
+        for argument, path in {**references, **case}.items()
+    ]
+
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(GENERATE_WORKBOOK), *args, *workbook_args],
+        cwd=folder,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    wall_time = time.perf_counter() - start
+
+    with open(folder / "output" / f"{name}.perf.json") as f:
+        report = json.load(f)
+
+    return {"main": wall_time, **get_stage_times(report)}, report["peak_rss"]
+
+
+def get_stage_times(report: dict) -> dict:
+    """Get the wall time of the stages of a performance report: the loading
+    of the references and the spans of the case down to STAGE_DEPTH. The
+    time of the spans with the same name is added
+
+    Parameters
+    ----------
+    report : dict
+        Performance report of a case written by generate_workbook.py
+
+    Returns
+    -------
+    dict
+        Dict of the wall time in seconds of every stage, in the order of
+        the report
+    """
+
+    stages = {}
+    spans = [
+        *(record for record in report["references"] if record["depth"] == 0),
+        *(
+            record
+            for record in report["spans"]
+            if record["depth"] <= STAGE_DEPTH
+        ),
+    ]
+
+    for record in spans:
+        stages[record["name"]] = (
+            stages.get(record["name"], 0) + record["wall_time"]
+        )
+
+    return stages
+
+
+def get_regressions(
+    results: dict,
+    baseline: dict,
+    tolerance: float = TOLERANCE,
+    min_slowdown: float = MIN_SLOWDOWN,
+) -> list:
+    """Get the stages slower than in the baseline. Only the scales run with
+    the same parameters as in the baseline are compared
+
+    Parameters
+    ----------
+    results : dict
+        Results of the benchmarks
+    baseline : dict
+        Results of the benchmarks stored as the baseline
+    tolerance : float, optional
+        Relative increase of the time above which a stage is slower
+    min_slowdown : float, optional
+        Increase of the time in seconds below which a stage is not slower
+
+    Returns
+    -------
+    list
+        List of tuples with the scale, stage, baseline time and new time of
+        every slower stage
+    """
+
+    regressions = []
+
+    for scale, scale_results in results["scales"].items():
+        scale_baseline = baseline["scales"].get(scale)
+
+        if (
+            scale_baseline is None
+            or scale_baseline["parameters"] != scale_results["parameters"]
+        ):
+            print(f"No baseline for the {scale} case, not compared")
+            continue
+
+        for stage, wall_time in scale_results["stages"].items():
+            baseline_time = scale_baseline["stages"].get(stage)
+
+            if (
+                baseline_time is not None
+                and wall_time > baseline_time * (1 + tolerance)
+                and wall_time - baseline_time > min_slowdown
+            ):
+                regressions.append((scale, stage, baseline_time, wall_time))
+
+    return regressions
+
+
+def print_scale(scale_results: dict):
+    """Print the time of every stage of a scale
+
+    Parameters
+    ----------
+    scale_results : dict
+        Results of the scale returned by run_scale
+    """
+
+    for stage, wall_time in scale_results["stages"].items():
+        print(f"    {stage}: {wall_time:.3f}s")
+
+    print(f"    peak RSS: {scale_results['peak_rss'] / 1024**2:.0f} MB")
+
+
+def write_results(path: str, results: dict):
+    """Write the results of the benchmarks as JSON
+
+    Parameters
+    ----------
+    path : str
+        Path of the JSON file
+    results : dict
+        Results of the benchmarks
+    """
+
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=(
+            "Time generate_workbook.py stage by stage on synthetic cases of "
+            "increasing scale and compare the times to a baseline"
+        )
+    )
+    parser.add_argument(
+        "-s",
+        "--scales",
+        nargs="+",
+        choices=SCALES,
+        default=list(SCALES),
+        help="Scales of the synthetic cases to run",
+    )
+    parser.add_argument(
+        "-n",
+        "--repeats",
+        type=int,
+        default=3,
+        help="Number of runs of every case, the fastest time being kept",
+    )
+    parser.add_argument(
+        "-a",
+        "--workbook_args",
+        help="Additional arguments of generate_workbook.py i.e. '-w 4'",
+    )
+    parser.add_argument(
+        "-d",
+        "--data_dir",
+        help=(
+            "Folder of the synthetic inputs and of the runs, a temporary "
+            "folder by default"
+        ),
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        default=str(BASELINE),
+        help="JSON file of the baseline",
+    )
+    parser.add_argument(
+        "-u",
+        "--update_baseline",
+        action="store_true",
+        help="Store the results as the baseline instead of comparing them",
+    )
+    parser.add_argument(
+        "-o", "--output", help="JSON file to write the results in"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=TOLERANCE,
+        help="Relative increase of the time above which a stage is slower",
+    )
+    parser.add_argument(
+        "--min_slowdown",
+        type=float,
+        default=MIN_SLOWDOWN,
+        help="Increase of the time in seconds below which a stage is ignored",
+    )
+    args = parser.parse_args()
+    main(**vars(args))
@@ -0,0 +1,493 @@
+import base64
+import io
+from pathlib import Path
+import random
+
+import pandas as pd
+from PIL import Image, ImageDraw
+import pysam
+
+# the sheets use the figures up to the 11th of the HTML
+MIN_FIGURES = 11
+
+# size of the figures of the HTML, the 2nd figure being cropped by the
+# parsing of the HTML
+FIGURE_SIZE = (1200, 900)
+CROPPED_FIGURE_SIZE = (2600, 2600)
+
+REFGENE_SHEETS = ["haem", "paed", "ovarian", "sarc", "neuro"]
+PANELAPP_SHEETS = ["Adult v2.2", "Childhood v4.0"]
+
+CHROMOSOMES = [str(chromosome) for chromosome in range(1, 23)]
+
+POPULATION_SV_COLUMN = (
+    "Population germline allele frequency (GESG | GECG for somatic SVs or "
+    "AF | AUC for germline CNVs)"
+)
+
+# tables of the HTML in the order of configs.tables
+HTML_TABLES = [
+    {"Clinical Indication": ["Sarcoma"]},
+    {
+        "Tumour Diagnosis Date": ["2020"],
+        "Histopathology or SIHMDS LAB ID": ["X"],
+        "Presentation": ["Primary_1"],
+        "Primary or Metastatic": ["Primary"],
+        "Tumour Topography": ["Leg"],
+    },
+    {
+        "Clinical Sample Date Time": ["2021"],
+        "Storage Medium": ["FF"],
+        "Source": ["Tumour"],
+        "Tumour Content": ["50%"],
+        "Calculated Tumour Content": ["45%"],
+        "Calculated Overall Ploidy": ["2.1"],
+    },
+    {"Storage Medium": ["EDTA"], "Source": ["Blood"]},
+    {
+        "Total somatic SNVs": [1, 2],
+        "Total somatic indels": [3, 4],
+        "Total somatic SVs": [5, 6],
+        "Sample type": ["Germline", "Tumour"],
+        "Genome-wide coverage mean, x": [30, 100],
+        "Mapped reads, %": [99, 98],
+        "Chimeric DNA fragments, %": [1, 2],
+        "Insert size median, bp": [400, 380],
+        "Unevenness of local genome coverage, x": [1.1, 1.2],
+    },
+]
+
+
+def get_gene_names(genes: int) -> list:
+    """Get the names of the synthetic genes
+
+    Parameters
+    ----------
+    genes : int
+        Number of genes
+
+    Returns
+    -------
+    list
+        List of gene names
+    """
+
+    return [f"GENE{i}" for i in range(genes)]
+
+
+def generate_references(
+    folder: Path, genes: int, clinvar_records: int
+) -> dict:
+    """Write synthetic reference files: refgene, hotspots, panelapp and
+    cytological bands workbooks, and a ClinVar VCF with its index
+
+    Parameters
+    ----------
+    folder : Path
+        Folder in which the files are written
+    genes : int
+        Number of genes in the reference workbooks
+    clinvar_records : int
+        Number of records of the ClinVar VCF
+
+    Returns
+    -------
+    dict
+        Dict of the paths of the files, with the names of the arguments of
+        generate_workbook.py
+    """
+
+    folder.mkdir(parents=True, exist_ok=True)
+    gene_names = get_gene_names(genes)
+
+    references = {
+        "hotspots": folder / "hotspots.xlsx",
+        "reference_gene_groups": folder / "refgene.xlsx",
+        "panelapp": folder / "panelapp.xlsx",
+        "cytological_bands": folder / "cytological_bands.xlsx",
+        "clinvar": folder / "clinvar.vcf.gz",
+        "clinvar_index": folder / "clinvar.vcf.gz.tbi",
+    }
+
+    with pd.ExcelWriter(references["reference_gene_groups"]) as writer:
+        pd.DataFrame(
+            {
+                "Gene": gene_names,
+                "Role in Cancer": "oncogene",
+                "Driver_SV": "amp",
+                "Entities": "entity",
+            }
+        ).to_excel(writer, sheet_name="somatic_db", index=False)
+
+        for sheet in REFGENE_SHEETS:
+            pd.DataFrame(
+                {
+                    "Gene": gene_names[::2],
+                    "Driver": "driver",
+                    "Entities": "entity",
+                    "Comments": "comment",
+                }
+            ).to_excel(writer, sheet_name=sheet, index=False)
+
+    with pd.ExcelWriter(references["hotspots"]) as writer:
+        pd.DataFrame(
+            {
+                "Gene_AA": [f"{gene}:L40" for gene in gene_names],
+                "Total": 3,
+                "Mutations": "L40R",
+            }
+        ).to_excel(writer, sheet_name="HS_Samples", index=False)
+        pd.DataFrame(
+            {
+                "Gene_Mut": [f"{gene}:L40R" for gene in gene_names],
+                "Tissue": "tissue",
+            }
+        ).to_excel(writer, sheet_name="HS_Tissue", index=False)
+
+    with pd.ExcelWriter(references["panelapp"]) as writer:
+        for sheet in PANELAPP_SHEETS:
+            pd.DataFrame(
+                {
+                    "Gene Symbol": gene_names,
+                    "Mode": "AD",
+                    "Phenotypes": "phenotype",
+                }
+            ).to_excel(writer, sheet_name=sheet, index=False)
+
+    pd.DataFrame({"Gene": gene_names, "Cyto": "1p36"}).to_excel(
+        references["cytological_bands"], sheet_name="Sheet1", index=False
+    )
+
+    write_clinvar_vcf(references["clinvar"], clinvar_records)
+
+    return {name: str(path) for name, path in references.items()}
+
+
+def write_clinvar_vcf(path: Path, records: int):
+    """Write a bgzipped ClinVar VCF with the records spread over the
+    autosomes and its tabix index
+
+    Parameters
+    ----------
+    path : Path
+        Path of the bgzipped VCF, ending with .gz
+    records : int
+        Number of records, the ClinVar ID of a record being its index
+    """
+
+    significances = ["Pathogenic", "Likely_pathogenic", "Benign"]
+    vcf = path.with_suffix("")
+
+    with open(vcf, "w") as f:
+        f.write("##fileformat=VCFv4.1\n")
+
+        for chromosome in CHROMOSOMES:
+            f.write(f"##contig=<ID={chromosome},length={records * 10}>\n")
+
+        for info in ["CLNSIG", "CLNSIGCONF"]:
+            f.write(
+                f'##INFO=<ID={info},Number=.,Type=String,Description="">\n'
+            )
+
+        f.write("#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n")
+
+        for i in range(records):
+            chromosome, position = get_clinvar_position(i, records)
+            f.write(
+                f"{chromosome}\t{position}\t{i}\tA\tG\t.\t.\t"
+                f"CLNSIG={significances[i % len(significances)]}\n"
+            )
+
+    # compresses the VCF in place and writes the index
+    pysam.tabix_index(str(vcf), preset="vcf", force=True)
+
+
+def get_clinvar_position(clinvar_id: int, records: int) -> tuple:
+    """Get the position of a record of the synthetic ClinVar VCF
+
+    Parameters
+    ----------
+    clinvar_id : int
+        ClinVar ID of the record, its index in the VCF
+    records : int
+        Number of records of the VCF
+
+    Returns
+    -------
+    tuple
+        Chromosome and 1-based position of the record
+    """
+
+    return (
+        CHROMOSOMES[clinvar_id * len(CHROMOSOMES) // records],
+        clinvar_id * 10 + 1,
+    )
+
+
+def generate_case(
+    folder: Path,
+    name: str,
+    genes: int,
+    somatic: int,
+    germline: int,
+    structural_variants: int,
+    fusion_partners: int,
+    figures: int,
+    clinvar_records: int,
+    seed: int = 1,
+) -> dict:
+    """Write the synthetic files of a GEL case: reported variants, reported
+    structural variants and supplementary HTML
+
+    Parameters
+    ----------
+    folder : Path
+        Folder in which the files are written
+    name : str
+        Name of the case, prefix of the files and name of the workbook
+    genes : int
+        Number of genes of the references, the variants being in them
+    somatic : int
+        Number of somatic variants
+    germline : int
+        Number of germline variants, with a ClinVar ID of the VCF
+    structural_variants : int
+        Number of structural variants, a quarter of which are fusions
+    fusion_partners : int
+        Maximum number of genes of a fusion
+    figures : int
+        Number of figures of the HTML, at least MIN_FIGURES
+    clinvar_records : int
+        Number of records of the ClinVar VCF
+    seed : int, optional
+        Seed of the random values, by default 1
+
+    Returns
+    -------
+    dict
+        Dict of the paths of the files, with the names of the arguments of
+        generate_workbook.py
+    """
+
+    assert (
+        figures >= MIN_FIGURES
+    ), f"The HTML needs at least {MIN_FIGURES} figures, got {figures}"
+    assert (
+        fusion_partners >= 2
+    ), f"A fusion needs at least 2 partners, got {fusion_partners}"
+
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    gene_names = get_gene_names(genes)
+
+    case = {
+        "supplementary_html": folder / f"{name}_supplementary.html",
+        "reported_variants": folder / f"{name}_reported_variants.csv",
+        "reported_structural_variants": (
+            folder / f"{name}_reported_structural_variants.csv"
+        ),
+    }
+
+    get_reported_variants(
+        rng, gene_names, somatic, germline, clinvar_records
+    ).to_csv(case["reported_variants"], index=False)
+    get_reported_structural_variants(
+        rng, gene_names, structural_variants, fusion_partners
+    ).to_csv(case["reported_structural_variants"], index=False)
+
+    with open(case["supplementary_html"], "w") as f:
+        f.write(get_supplementary_html(rng, figures))
+
+    return {name: str(path) for name, path in case.items()}
+
+
+def get_reported_variants(
+    rng: random.Random,
+    gene_names: list,
+    somatic: int,
+    germline: int,
+    clinvar_records: int,
+) -> pd.DataFrame:
+    """Get the reported small variants of the case
+
+    Parameters
+    ----------
+    rng : random.Random
+        Random generator of the case
+    gene_names : list
+        List of the genes of the references
+    somatic : int
+        Number of somatic variants
+    germline : int
+        Number of germline variants
+    clinvar_records : int
+        Number of records of the ClinVar VCF
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe with the columns of the GEL reported variants
+    """
+
+    variants = []
+
+    for i in range(somatic + germline):
+        is_somatic = i < somatic
+        variants.append(
+            {
+                "Origin": "somatic" if is_somatic else "germline",
+                "Domain": rng.randint(1, 4) if is_somatic else "",
+                "Gene": rng.choice(gene_names),
+                "GRCh38 coordinates;ref/alt allele": (
+                    f"{rng.choice(CHROMOSOMES)}:{rng.randint(1, 10**8)};A>G"
+                ),
+                "ClinVar ID": (
+                    "" if is_somatic else float(rng.randrange(clinvar_records))
+                ),
+                "RefSeq IDs": "NM_000001.1",
+                "CDS change and protein change": "c.119T>G;p.Leu40Arg",
+                "Predicted consequences": "missense_variant",
+                "Population germline allele frequency (GE | gnomAD)": "-|-",
+                "Alt allele/total read depth": (
+                    f"{rng.randint(3, 30)}/{rng.randint(30, 100)}"
+                ),
+                "Gene mode of action": "LoF",
+                "VAF": round(rng.random(), 3) if is_somatic else "",
+                "Genotype": "" if is_somatic else "0/1",
+            }
+        )
+
+    return pd.DataFrame(variants)
+
+
+def get_reported_structural_variants(
+    rng: random.Random,
+    gene_names: list,
+    structural_variants: int,
+    fusion_partners: int,
+) -> pd.DataFrame:
+    """Get the reported structural variants of the case: gains, losses, LOH
+    and fusions of 2 to fusion_partners genes in equal numbers
+
+    Parameters
+    ----------
+    rng : random.Random
+        Random generator of the case
+    gene_names : list
+        List of the genes of the references
+    structural_variants : int
+        Number of structural variants
+    fusion_partners : int
+        Maximum number of genes of a fusion
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe with the columns of the GEL reported structural variants
+    """
+
+    variants = []
+
+    for i in range(structural_variants):
+        genes = rng.choice(gene_names)
+
+        if i % 4 == 0:
+            sv_type = f"GAIN({rng.randint(3, 9)})"
+        elif i % 4 == 1:
+            sv_type = f"LOSS({rng.randint(0, 1)})"
+        elif i % 4 == 2:
+            sv_type = "LOH(2)"
+        else:
+            partners = 2 + (i // 4) % (fusion_partners - 1)
+            sv_type = ";".join(["DEL"] + ["BND"] * (partners - 1))
+            genes = ";".join(rng.sample(gene_names, partners))
+
+        variants.append(
+            {
+                "Event domain": rng.randint(1, 4),
+                "Impacted transcript region": "exon",
+                "Gene": genes,
+                "GRCh38 coordinates": "1:1-10",
+                "RefSeq IDs": "NM_000001.1",
+                "Type": sv_type,
+                "Size": rng.randint(100, 10**6),
+                "Chromosomal bands": "1p36;1p35",
+                "Gene mode of action": "LoF",
+                POPULATION_SV_COLUMN: "0|0",
+                "Confidence/support": "PR-1/2;SR-3/4",
+            }
+        )
+
+    return pd.DataFrame(variants)
+
+
+def get_supplementary_html(rng: random.Random, figures: int) -> str:
+    """Get the supplementary HTML of the case with the tables of the config,
+    the TMB and the figures embedded as base64 JPEGs
+
+    Parameters
+    ----------
+    rng : random.Random
+        Random generator of the case
+    figures : int
+        Number of figures
+
+    Returns
+    -------
+    str
+        Content of the HTML
+    """
+
+    html = ["<html><body>"]
+
+    for table in HTML_TABLES:
+        html.append(pd.DataFrame(table).to_html(index=False))
+
+    html.append(
+        "<p><b>Total number of somatic non-synonymous small variants per "
+        "megabase</b> 4.2</p>"
+    )
+
+    for i in range(figures):
+        size = CROPPED_FIGURE_SIZE if i == 1 else FIGURE_SIZE
+        html.append(
+            '<img src="data:image/jpeg;base64,'
+            f'{get_figure(rng, size).decode()}"/>'
+        )
+
+    html.append("</body></html>")
+
+    return "\n".join(html)
+
+
+def get_figure(rng: random.Random, size: tuple) -> bytes:
+    """Get a plot-like JPEG figure, random lines on a white background
+
+    Parameters
+    ----------
+    rng : random.Random
+        Random generator of the case
+    size : tuple
+        Width and height of the figure
+
+    Returns
+    -------
+    bytes
+        Base64 encoded JPEG
+    """
+
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    width, height = size
+
+    for _ in range(50):
+        draw.line(
+            [(rng.randrange(width), rng.randrange(height)) for _ in range(10)],
+            fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)),
+            width=3,
+        )
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+
+    return base64.b64encode(buffer.getvalue())
@@ -0,0 +1,362 @@
+import argparse
+from io import BytesIO
+import json
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+import openpyxl
+import pandas as pd
+
+from benchmarks import run_benchmarks, synthetic_case
+import generate_workbook
+from utils import excel_writing, misc
+
+BASELINE = Path(__file__).resolve().parent / "writer_baseline.json"
+
+# primitives of excel_writing timed on their own, with the key of the
+# config they apply
+PRIMITIVES = {
+    "write_cell_content": "cells_to_write",
+    "apply_alignment_data": "alignment_info",
+    "bold_cells": "to_bold",
+    "draw_borders": "borders",
+    "generate_dropdowns": "dropdowns",
+    "insert_images": "images",
+    "add_databar_rule": "data_bar",
+}
+
+# increase of the time in seconds below which a step is not slower than its
+# baseline, most primitives taking a few milliseconds
+MIN_SLOWDOWN = 0.005
+
+
+def main(**kwargs):
+    results = {
+        "machine": run_benchmarks.get_machine(),
+        "repeats": kwargs["repeats"],
+        "scale": kwargs["scale"],
+        "scales": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = Path(kwargs["data_dir"] or tmp_dir)
+        print(f"Preparing the sheets of the {kwargs['scale']} case...")
+        sheets = get_case_sheets(kwargs["scale"], data_dir)
+
+        rows = []
+
+        for sheet_data in sheets:
+            sheet_config = get_sheet_config(sheet_data)
+
+            for primitive in [
+                *(
+                    primitive
+                    for primitive, config_key in PRIMITIVES.items()
+                    if sheet_config.get(config_key)
+                ),
+                "apply_config",
+            ]:
+                name = f"{sheet_data['sheet_name']} {primitive}"
+                timings, cells = time_primitive(
+                    sheet_data,
+                    primitive,
+                    data_dir / "workbooks",
+                    kwargs["repeats"],
+                )
+                results["scales"][name] = {
+                    "parameters": {"scale": kwargs["scale"]},
+                    "stages": timings,
+                    "cells": cells,
+                }
+                rows.append(
+                    {
+                        "sheet": sheet_data["sheet_name"],
+                        "primitive": primitive,
+                        "cells": cells,
+                        **timings,
+                    }
+                )
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format="%.4f"))
+
+    if kwargs["output"]:
+        run_benchmarks.write_results(kwargs["output"], results)
+
+    if kwargs["update_baseline"]:
+        run_benchmarks.write_results(kwargs["baseline"], results)
+        print(f"Baseline written to {kwargs['baseline']}")
+        return
+
+    with open(kwargs["baseline"]) as f:
+        baseline = json.load(f)
+
+    regressions = run_benchmarks.get_regressions(
+        results, baseline, kwargs["tolerance"], kwargs["min_slowdown"]
+    )
+
+    if regressions:
+        print("Primitives slower than the baseline:")
+
+        for name, step, baseline_time, wall_time in regressions:
+            print(
+                f"    {name} {step}: {baseline_time:.4f}s -> "
+                f"{wall_time:.4f}s"
+            )
+
+        sys.exit(1)
+
+    print("No primitive is slower than the baseline")
+
+
+def get_case_sheets(scale: str, folder: Path) -> list:
+    """Generate a synthetic case and process it into the data of the sheets
+    of its workbook, so that the primitives are timed on the configs of a
+    real run
+
+    Parameters
+    ----------
+    scale : str
+        Name of the scale of the case in run_benchmarks.SCALES
+    folder : Path
+        Folder of the synthetic inputs
+
+    Returns
+    -------
+    list
+        List of dicts with the arguments for writing each sheet, with the
+        bytes of the images instead of their buffers
+    """
+
+    parameters = run_benchmarks.SCALES[scale]
+    references = synthetic_case.generate_references(
+        folder / "references",
+        **{
+            name: parameters[name]
+            for name in run_benchmarks.REFERENCE_PARAMETERS
+        },
+    )
+    case = synthetic_case.generate_case(folder / "case", scale, **parameters)
+
+    sheets, _ = generate_workbook.prepare_case_sheets(
+        generate_workbook.load_references(**references), case
+    )
+    # openpyxl closes the image buffers when saving, the bytes are kept to
+    # give new buffers to every run
+    images = [
+        image.getvalue()
+        for image in next(
+            sheet_data["html_images"]
+            for sheet_data in sheets
+            if sheet_data.get("html_images")
+        )
+    ]
+
+    return [
+        (
+            {**sheet_data, "html_images": images}
+            if sheet_data.get("html_images")
+            else sheet_data
+        )
+        for sheet_data in sheets
+    ]
+
+
+def get_sheet_config(sheet_data: dict):
+    """Get the config of a sheet with its dynamic values, as written by
+    excel_writing.write_sheet
+
+    Parameters
+    ----------
+    sheet_data : dict
+        Dict with the arguments for writing the sheet
+
+    Returns
+    -------
+    dict
+        Config dict of the sheet or ConfigLayers view over its layers
+    """
+
+    sheet_name = sheet_data["sheet_name"]
+    sheet_config = misc.select_config(sheet_name).get_config()
+
+    if sheet_data.get("dynamic_data"):
+        sheet_config = misc.ConfigLayers(
+            sheet_config, sheet_data["dynamic_data"][sheet_name]
+        )
+
+    return sheet_config
+
+
+def time_primitive(
+    sheet_data: dict, primitive: str, folder: Path, repeats: int
+) -> tuple:
+    """Time a primitive applying its part of the config of a sheet in a new
+    workbook, the save of the workbook and its load in read-only mode, as a
+    proxy for the time a reviewer waits for the workbook to open
+
+    Parameters
+    ----------
+    sheet_data : dict
+        Dict with the arguments for writing the sheet
+    primitive : str
+        Name of the primitive in PRIMITIVES, or apply_config for the whole
+        config of the sheet
+    folder : Path
+        Folder in which the workbooks are saved
+    repeats : int
+        Number of runs, the fastest time of every step being kept
+
+    Returns
+    -------
+    tuple
+        - Dict of the time in seconds of the build, save and load
+        - Number of cells of the sheet
+    """
+
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"{sheet_data['sheet_name']}_{primitive}.xlsx"
+    sheet_config = get_sheet_config(sheet_data)
+    timings = {}
+
+    for _ in range(repeats):
+        run_data = dict(sheet_data)
+
+        if sheet_data.get("html_images"):
+            run_data["html_images"] = [
+                BytesIO(image) for image in sheet_data["html_images"]
+            ]
+
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = sheet_data["sheet_name"]
+
+        start = time.perf_counter()
+        apply_primitive(sheet, primitive, sheet_config, run_data)
+        build_time = time.perf_counter() - start
+        cells = len(sheet._cells)
+
+        start = time.perf_counter()
+        workbook.save(path)
+        save_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        read_only_workbook = openpyxl.load_workbook(path, read_only=True)
+
+        # the cells of a read-only workbook are only parsed when iterated
+        for worksheet in read_only_workbook.worksheets:
+            for _ in worksheet.iter_rows(values_only=True):
+                pass
+
+        read_only_workbook.close()
+        load_time = time.perf_counter() - start
+
+        for step, step_time in [
+            ("build", build_time),
+            ("save", save_time),
+            ("load_read_only", load_time),
+        ]:
+            timings[step] = min(step_time, timings.get(step, step_time))
+
+    return timings, cells
+
+
+def apply_primitive(sheet, primitive: str, sheet_config, sheet_data: dict):
+    """Apply a primitive of excel_writing with its part of the sheet config
+
+    Parameters
+    ----------
+    sheet : Worksheet
+        Worksheet to write in
+    primitive : str
+        Name of the primitive in PRIMITIVES, or apply_config for the whole
+        config of the sheet
+    sheet_config : dict
+        Config dict of the sheet or ConfigLayers view over its layers
+    sheet_data : dict
+        Dict with the arguments for writing the sheet
+    """
+
+    if primitive == "apply_config":
+        excel_writing.apply_config(
+            sheet,
+            sheet_config,
+            sheet_data.get("qc_record"),
+            sheet_data.get("html_images"),
+        )
+        return
+
+    config_data = sheet_config[PRIMITIVES[primitive]]
+
+    if primitive == "write_cell_content":
+        excel_writing.write_cell_content(
+            sheet, config_data, sheet_data.get("qc_record")
+        )
+    elif primitive == "insert_images":
+        excel_writing.insert_images(
+            sheet, config_data, sheet_data["html_images"]
+        )
+    else:
+        getattr(excel_writing, primitive)(sheet, config_data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=(
+            "Time the primitives of excel_writing on the sheet configs of a "
+            "synthetic case, with the save and read-only load of the result, "
+            "and compare the times to a baseline"
+        )
+    )
+    parser.add_argument(
+        "-s",
+        "--scale",
+        choices=run_benchmarks.SCALES,
+        default="medium",
+        help="Scale of the synthetic case",
+    )
+    parser.add_argument(
+        "-n",
+        "--repeats",
+        type=int,
+        default=3,
+        help="Number of runs of every primitive, the fastest being kept",
+    )
+    parser.add_argument(
+        "-d",
+        "--data_dir",
+        help=(
+            "Folder of the synthetic inputs and of the workbooks, a "
+            "temporary folder by default"
+        ),
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        default=str(BASELINE),
+        help="JSON file of the baseline",
+    )
+    parser.add_argument(
+        "-u",
+        "--update_baseline",
+        action="store_true",
+        help="Store the results as the baseline instead of comparing them",
+    )
+    parser.add_argument(
+        "-o", "--output", help="JSON file to write the results in"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=run_benchmarks.TOLERANCE,
+        help="Relative increase of the time above which a step is slower",
+    )
+    parser.add_argument(
+        "--min_slowdown",
+        type=float,
+        default=MIN_SLOWDOWN,
+        help="Increase of the time in seconds below which a step is ignored",
+    )
+    args = parser.parse_args()
+    main(**vars(args))
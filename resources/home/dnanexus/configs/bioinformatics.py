@@ -1,3 +1,4 @@
+import functools
 import os
 from datetime import datetime, timezone, timedelta
 
@@ -7,34 +8,63 @@ THIN = Side(border_style="thin", color="000000")
 THIN_BORDER = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
 LOWER_BORDER = Border(bottom=THIN)
 
-CONFIG = {
-    "cells_to_write": {
-        (1, 1): "Project id",
-        (2, 1): (
-            os.environ["DX_PROJECT_CONTEXT_ID"]
-            if "DX_PROJECT_CONTEXT_ID" in os.environ
-            else "Id not retrievable"
-        ),
-        (4, 1): "Job id",
-        (5, 1): (
-            os.environ["DX_JOB_ID"]
-            if "DX_JOB_ID" in os.environ
-            else "Id not retrievable"
-        ),
-        (1, 3): "Job datetime",
-        (2, 3): datetime.now()
-        .replace(tzinfo=timezone(timedelta(hours=1)))
-        .strftime("%a %d %b %Y, %H:%M"),
-    },
-    "to_bold": ["A1", "A4", "C1"],
-    "borders": {
-        "single_cells": [
-            ("A1", LOWER_BORDER),
-            ("A4", LOWER_BORDER),
-            ("C1", LOWER_BORDER),
-        ]
-    },
-    "col_width": [
-        ("A", 36),
-    ],
-}
+
+@functools.cache
+def get_config() -> dict:
+    """Get the static config of the Bioinformatics sheet, built the first
+    time it is needed
+
+    Returns
+    -------
+    dict
+        Dict of the static config of the sheet
+    """
+
+    return {
+        "cells_to_write": {
+            (1, 1): "Project id",
+            (4, 1): "Job id",
+            (1, 3): "Job datetime",
+        },
+        "to_bold": ["A1", "A4", "C1"],
+        "borders": {
+            "single_cells": [
+                ("A1", LOWER_BORDER),
+                ("A4", LOWER_BORDER),
+                ("C1", LOWER_BORDER),
+            ]
+        },
+        "col_width": [
+            ("A", 36),
+        ],
+    }
+
+
+def add_dynamic_values() -> dict:
+    """Add the job specific values for the Bioinformatics sheet
+
+    Returns
+    -------
+    dict
+        Dict containing data that needs to be merged to the static config
+    """
+
+    config_with_dynamic_values = {
+        "cells_to_write": {
+            (2, 1): (
+                os.environ["DX_PROJECT_CONTEXT_ID"]
+                if "DX_PROJECT_CONTEXT_ID" in os.environ
+                else "Id not retrievable"
+            ),
+            (5, 1): (
+                os.environ["DX_JOB_ID"]
+                if "DX_JOB_ID" in os.environ
+                else "Id not retrievable"
+            ),
+            (2, 3): datetime.now()
+            .replace(tzinfo=timezone(timedelta(hours=1)))
+            .strftime("%a %d %b %Y, %H:%M"),
+        }
+    }
+
+    return config_with_dynamic_values
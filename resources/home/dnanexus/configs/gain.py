@@ -1,3 +1,5 @@
+import functools
+
 from openpyxl.styles import Border, Side
 from openpyxl.styles.fills import PatternFill
 from openpyxl.utils.dataframe import dataframe_to_rows
@@ -5,102 +7,114 @@ import pandas as pd
 
 from utils import misc
 
-
 THIN = Side(border_style="thin", color="000000")
 THIN_BORDER = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
 LEFT_BORDER = Border(left=THIN)
 
 
-CONFIG = {
-    "cells_to_write": {
-        (1, i): value
-        for i, value in enumerate(
-            [
-                "Event domain",
-                "Gene",
-                "RefSeq IDs",
-                "Impacted transcript region",
-                "GRCh38 coordinates",
-                "Type",
-                "Copy Number",
-                "Size",
-                "Cyto 1",
-                "Cyto 2",
-                "Gene mode of action",
-                "Variant class",
-                "OG_Amp",
-                "Focality",
-                "Full transcript",
-                "COSMIC Driver",
-                "COSMIC Entities",
-                "Paed Driver",
-                "Paed Entities",
-                "Sarc Driver",
-                "Sarc Entities",
-                "Neuro Driver",
-                "Neuro Entities",
-                "Ovary Driver",
-                "Ovary Entities",
-                "Haem Driver",
-                "Haem Entities",
+@functools.cache
+def get_config() -> dict:
+    """Get the static config of the Gain sheet, built the first time it
+    is needed
+
+    Returns
+    -------
+    dict
+        Dict of the static config of the sheet
+    """
+
+    return {
+        "cells_to_write": {
+            (1, i): value
+            for i, value in enumerate(
+                [
+                    "Event domain",
+                    "Gene",
+                    "RefSeq IDs",
+                    "Impacted transcript region",
+                    "GRCh38 coordinates",
+                    "Type",
+                    "Copy Number",
+                    "Size",
+                    "Cyto 1",
+                    "Cyto 2",
+                    "Gene mode of action",
+                    "Variant class",
+                    "OG_Amp",
+                    "Focality",
+                    "Full transcript",
+                    "COSMIC Driver",
+                    "COSMIC Entities",
+                    "Paed Driver",
+                    "Paed Entities",
+                    "Sarc Driver",
+                    "Sarc Entities",
+                    "Neuro Driver",
+                    "Neuro Entities",
+                    "Ovary Driver",
+                    "Ovary Entities",
+                    "Haem Driver",
+                    "Haem Entities",
+                ],
+                1,
+            )
+        },
+        "to_bold": [
+            f"{misc.convert_index_to_letters(i)}1" for i in range(0, 27)
+        ],
+        "col_width": [
+            ("A", 10),
+            ("B", 12),
+            ("C", 16),
+            ("D", 16),
+            ("E", 22),
+            ("F", 6),
+            ("G", 5),
+            ("H", 14),
+            ("I", 10),
+            ("J", 10),
+            ("K", 22),
+            ("M", 6),
+            ("N", 6),
+            ("O", 6),
+        ]
+        + [(f"{misc.convert_index_to_letters(i)}", 5) for i in range(14, 27)],
+        "borders": {
+            "cell_rows": [
+                ("A1:AA1", THIN_BORDER),
             ],
-            1,
-        )
-    },
-    "to_bold": [f"{misc.convert_index_to_letters(i)}1" for i in range(0, 27)],
-    "col_width": [
-        ("A", 10),
-        ("B", 12),
-        ("C", 16),
-        ("D", 16),
-        ("E", 22),
-        ("F", 6),
-        ("G", 5),
-        ("H", 14),
-        ("I", 10),
-        ("J", 10),
-        ("K", 22),
-        ("M", 6),
-        ("N", 6),
-        ("O", 6),
-    ]
-    + [(f"{misc.convert_index_to_letters(i)}", 5) for i in range(14, 27)],
-    "borders": {
-        "cell_rows": [
-            ("A1:AA1", THIN_BORDER),
+        },
+        "cells_to_colour": [
+            (
+                f"{col}1",
+                PatternFill(patternType="solid", start_color="F2F2F2"),
+            )
+            for col in ["L", "M", "N", "O"]
+        ]
+        + [
+            (
+                # letters P to AA
+                f"{misc.convert_index_to_letters(i)}1",
+                PatternFill(patternType="solid", start_color="fdeada"),
+            )
+            for i in range(15, 27)
         ],
-    },
-    "cells_to_colour": [
-        (
-            f"{col}1",
-            PatternFill(patternType="solid", start_color="F2F2F2"),
-        )
-        for col in ["L", "M", "N", "O"]
-    ]
-    + [
-        (
-            # letters P to AA
-            f"{misc.convert_index_to_letters(i)}1",
-            PatternFill(patternType="solid", start_color="fdeada"),
-        )
-        for i in range(15, 27)
-    ],
-    "row_height": [(1, 80)],
-    "auto_filter": "A:AA",
-    "freeze_panes": "H1",
-    "alignment_info": [
-        (
-            f"{misc.convert_index_to_letters(i)}1",
-            {
-                "horizontal": "left",
-                "vertical": "bottom",
-                "wrapText": True,
-                "text_rotation": 90,
-            },
-        )
-        for i in range(0, 27)
-    ],
-}
+        "row_height": [(1, 80)],
+        "auto_filter": "A:AA",
+        "freeze_panes": "H1",
+        "alignment_info": [
+            (
+                f"{misc.convert_index_to_letters(i)}1",
+                {
+                    "horizontal": "left",
+                    "vertical": "bottom",
+                    "wrapText": True,
+                    "text_rotation": 90,
+                },
+            )
+            for i in range(0, 27)
+        ],
+    }
 
 
 def add_dynamic_values(data: pd.DataFrame) -> dict:
@@ -138,7 +152,7 @@ def add_dynamic_values(data: pd.DataFrame) -> dict:
         "dropdowns": [
             {
                 "cells": {
-                    (f"L{i}" for i in range(2, nb_sv_variants + 2)): (
+                    tuple(f"L{i}" for i in range(2, nb_sv_variants + 2)): (
                         '"Oncogenic, Likely oncogenic,'
                         "Uncertain, Likely passenger,"
                         'Likely artefact"'
@@ -1,3 +1,5 @@
+import functools
+
 from openpyxl.styles import Border, Side
 from openpyxl.styles.fills import PatternFill
 from openpyxl.utils.dataframe import dataframe_to_rows
@@ -7,49 +9,64 @@ THIN = Side(border_style="thin", color="000000")
 THIN_BORDER = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
 LOWER_BORDER = Border(bottom=THIN)
 
-CONFIG = {
-    "cells_to_write": {
-        (1, 1): "=SOC!A2",
-        (2, 1): "=SOC!A3",
-        (1, 3): "=SOC!A5",
-        (2, 3): "=SOC!A6",
-        (1, 5): "=SOC!A9",
-        (4, 1): "Gene",
-        (4, 2): "GRCh38 Coordinates",
-        (4, 3): "Variant",
-        (4, 4): "Consequence",
-        (4, 5): "Genotype",
-        (4, 6): "gnomAD",
-        (4, 7): "Role in Cancer",
-        (4, 8): "ClinVar",
-        (4, 9): "Tumour VAF",
-        (4, 10): "Panelapp Adult v2.2",
-        (4, 11): "Panelapp Childhood v4.0",
-    },
-    "to_bold": ["A1"] + [f"{col}4" for col in list("ABCDEFGHIJK")],
-    "col_width": [
-        ("A", 12),
-        ("B", 20),
-        ("C", 16),
-        ("D", 18),
-        ("E", 12),
-        ("F", 18),
-        ("G", 24),
-        ("H", 25),
-        ("I", 16),
-        ("J", 40),
-        ("K", 40),
-    ],
-    "cells_to_colour": [
-        (f"{column}4", PatternFill(patternType="solid", start_color="F2F2F2"))
-        for column in list("ABCDEFGHIJK")
-    ],
-    "row_height": [(4, 40)],
-}
+
+@functools.cache
+def get_config() -> dict:
+    """Get the static config of the Germline sheet, built the first time it
+    is needed
+
+    Returns
+    -------
+    dict
+        Dict of the static config of the sheet
+    """
+
+    return {
+        "cells_to_write": {
+            (1, 1): "=SOC!A2",
+            (2, 1): "=SOC!A3",
+            (1, 3): "=SOC!A5",
+            (2, 3): "=SOC!A6",
+            (1, 5): "=SOC!A9",
+            (4, 1): "Gene",
+            (4, 2): "GRCh38 Coordinates",
+            (4, 3): "Variant",
+            (4, 4): "Consequence",
+            (4, 5): "Genotype",
+            (4, 6): "gnomAD",
+            (4, 7): "Role in Cancer",
+            (4, 8): "ClinVar",
+            (4, 9): "Tumour VAF",
+            (4, 10): "Panelapp Adult v2.2",
+            (4, 11): "Panelapp Childhood v4.0",
+        },
+        "to_bold": ["A1"] + [f"{col}4" for col in list("ABCDEFGHIJK")],
+        "col_width": [
+            ("A", 12),
+            ("B", 20),
+            ("C", 16),
+            ("D", 18),
+            ("E", 12),
+            ("F", 18),
+            ("G", 24),
+            ("H", 25),
+            ("I", 16),
+            ("J", 40),
+            ("K", 40),
+        ],
+        "cells_to_colour": [
+            (
+                f"{column}4",
+                PatternFill(patternType="solid", start_color="F2F2F2"),
+            )
+            for column in list("ABCDEFGHIJK")
+        ],
+        "row_height": [(4, 40)],
+    }
 
 
 def add_dynamic_values(data: pd.DataFrame) -> dict:
-    """Add the parsed data to the CONFIG variable
+    """Add the parsed data to the static config
 
     Parameters
     ----------
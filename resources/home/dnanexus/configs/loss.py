@@ -1,3 +1,4 @@
+import functools
 import string
 
 from openpyxl.styles import Border, Side
@@ -12,93 +13,106 @@ THIN_BORDER = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
 LEFT_BORDER = Border(left=THIN)
 
 
-CONFIG = {
-    "cells_to_write": {
-        (1, i): value
-        for i, value in enumerate(
-            [
-                "Event domain",
-                "Gene",
-                "RefSeq IDs",
-                "Impacted transcript region",
-                "GRCh38 coordinates",
-                "Type",
-                "Copy Number",
-                "Size",
-                "Cyto 1",
-                "Cyto 2",
-                "Gene mode of action",
-                "Variant class",
-                "TSG_Hom",
-                "SNV_LOH",
-                "COSMIC Driver",
-                "COSMIC Entities",
-                "Paed Driver",
-                "Paed Entities",
-                "Sarc Driver",
-                "Sarc Entities",
-                "Neuro Driver",
-                "Neuro Entities",
-                "Ovary Driver",
-                "Ovary Entities",
-                "Haem Driver",
-                "Haem Entities",
+@functools.cache
+def get_config() -> dict:
+    """Get the static config of the Loss sheet, built the first time it
+    is needed
+
+    Returns
+    -------
+    dict
+        Dict of the static config of the sheet
+    """
+
+    return {
+        "cells_to_write": {
+            (1, i): value
+            for i, value in enumerate(
+                [
+                    "Event domain",
+                    "Gene",
+                    "RefSeq IDs",
+                    "Impacted transcript region",
+                    "GRCh38 coordinates",
+                    "Type",
+                    "Copy Number",
+                    "Size",
+                    "Cyto 1",
+                    "Cyto 2",
+                    "Gene mode of action",
+                    "Variant class",
+                    "TSG_Hom",
+                    "SNV_LOH",
+                    "COSMIC Driver",
+                    "COSMIC Entities",
+                    "Paed Driver",
+                    "Paed Entities",
+                    "Sarc Driver",
+                    "Sarc Entities",
+                    "Neuro Driver",
+                    "Neuro Entities",
+                    "Ovary Driver",
+                    "Ovary Entities",
+                    "Haem Driver",
+                    "Haem Entities",
+                ],
+                1,
+            )
+        },
+        "to_bold": [
+            f"{misc.convert_index_to_letters(i)}1" for i in range(0, 26)
+        ],
+        "col_width": [
+            ("A", 10),
+            ("B", 12),
+            ("C", 16),
+            ("D", 16),
+            ("E", 22),
+            ("F", 6),
+            ("G", 5),
+            ("H", 14),
+            ("I", 10),
+            ("J", 10),
+            ("K", 22),
+            ("M", 6),
+            ("N", 6),
+        ],
+        "cells_to_colour": [
+            (
+                f"{col}1",
+                PatternFill(patternType="solid", start_color="F2F2F2"),
+            )
+            for col in ["L", "M", "N"]
+        ]
+        + [
+            (
+                # letters O to Z
+                f"{string.ascii_uppercase[i]}1",
+                PatternFill(patternType="solid", start_color="fdeada"),
+            )
+            for i in range(14, 26)
+        ],
+        "borders": {
+            "cell_rows": [
+                ("A1:Z1", THIN_BORDER),
             ],
-            1,
-        )
-    },
-    "to_bold": [f"{misc.convert_index_to_letters(i)}1" for i in range(0, 26)],
-    "col_width": [
-        ("A", 10),
-        ("B", 12),
-        ("C", 16),
-        ("D", 16),
-        ("E", 22),
-        ("F", 6),
-        ("G", 5),
-        ("H", 14),
-        ("I", 10),
-        ("J", 10),
-        ("K", 22),
-        ("M", 6),
-        ("N", 6),
-    ],
-    "cells_to_colour": [
-        (
-            f"{col}1",
-            PatternFill(patternType="solid", start_color="F2F2F2"),
-        )
-        for col in ["L", "M", "N"]
-    ]
-    + [
-        (
-            # letters O to Z
-            f"{string.ascii_uppercase[i]}1",
-            PatternFill(patternType="solid", start_color="fdeada"),
-        )
-        for i in range(14, 26)
-    ],
-    "borders": {
-        "cell_rows": [
-            ("A1:Z1", THIN_BORDER),
+        },
+        "row_height": [(1, 80)],
+        "auto_filter": "A:Z",
+        "freeze_panes": "H1",
+        "alignment_info": [
+            (
+                f"{misc.convert_index_to_letters(i)}1",
+                {
+                    "horizontal": "left",
+                    "vertical": "bottom",
+                    "wrapText": True,
+                    "text_rotation": 90,
+                },
+            )
+            for i in range(0, 26)
         ],
-    },
-    "row_height": [(1, 80)],
-    "auto_filter": "A:Z",
-    "freeze_panes": "H1",
-    "alignment_info": [
-        (
-            f"{misc.convert_index_to_letters(i)}1",
-            {
-                "horizontal": "left",
-                "vertical": "bottom",
-                "wrapText": True,
-                "text_rotation": 90,
-            },
-        )
-        for i in range(0, 26)
-    ],
-}
+    }
 
 
 def add_dynamic_values(data: pd.DataFrame) -> dict:
@@ -136,7 +150,7 @@ def add_dynamic_values(data: pd.DataFrame) -> dict:
         "dropdowns": [
             {
                 "cells": {
-                    (f"L{i}" for i in range(2, nb_sv_variants + 2)): (
+                    tuple(f"L{i}" for i in range(2, nb_sv_variants + 2)): (
                         '"Oncogenic, Likely oncogenic,'
                         "Uncertain, Likely passenger,"
                         'Likely artefact"'
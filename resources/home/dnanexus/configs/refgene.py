@@ -1,3 +1,5 @@
+import functools
+
 from openpyxl.styles import Border, Side
 from openpyxl.styles.fills import PatternFill
 from openpyxl.utils.dataframe import dataframe_to_rows
@@ -11,26 +13,37 @@ LOWER_BORDER = Border(bottom=THIN)
 LEFT_BORDER = Border(left=THIN)
 
 
-CONFIG = {
-    "cells_to_colour": [
-        (
-            f"{misc.convert_index_to_letters(i)}1",
-            PatternFill(patternType="solid", start_color="dbeef4"),
-        )
-        for i in range(18 + 1)
-    ],
-    "borders": {
-        "cell_rows": [
-            ("B1:B1500", LEFT_BORDER),
-            ("E1:E1500", LEFT_BORDER),
-            ("H1:H1500", LEFT_BORDER),
-            ("K1:K1500", LEFT_BORDER),
-            ("N1:N1500", LEFT_BORDER),
-            ("Q1:Q1500", LEFT_BORDER),
-            ("T1:T1500", LEFT_BORDER),
+@functools.cache
+def get_config() -> dict:
+    """Get the static config of the Refgene sheet, built the first time it
+    is needed
+
+    Returns
+    -------
+    dict
+        Dict of the static config of the sheet
+    """
+
+    return {
+        "cells_to_colour": [
+            (
+                f"{misc.convert_index_to_letters(i)}1",
+                PatternFill(patternType="solid", start_color="dbeef4"),
+            )
+            for i in range(18 + 1)
         ],
-    },
-}
+        "borders": {
+            "cell_rows": [
+                ("B1:B1500", LEFT_BORDER),
+                ("E1:E1500", LEFT_BORDER),
+                ("H1:H1500", LEFT_BORDER),
+                ("K1:K1500", LEFT_BORDER),
+                ("N1:N1500", LEFT_BORDER),
+                ("Q1:Q1500", LEFT_BORDER),
+                ("T1:T1500", LEFT_BORDER),
+            ],
+        },
+    }
 
 
 SHEETS2COLUMNS = {
@@ -86,7 +99,7 @@ def add_dynamic_values(df: pd.DataFrame) -> dict:
     Returns
     -------
     dict
-        Dict containing data that needs to be merged to the CONFIG variable
+        Dict containing data that needs to be merged to the static config
     """
 
     sv_column_letter = misc.get_column_letter_using_column_name(df, "SNV")
@@ -1,3 +1,4 @@
+import functools
 import string
 
 from openpyxl.styles import Border, Side
@@ -12,118 +13,132 @@ THIN_BORDER = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
 LOWER_BORDER = Border(bottom=THIN)
 LEFT_BORDER = Border(left=THIN)
 
-CONFIG = {
-    "cells_to_write": {
-        (1, i): value
-        for i, value in enumerate(
-            [
-                "Domain",
-                "Gene",
-                "GRCh38 coordinates",
-                "Cyto",
-                "RefSeq IDs",
-                "Variant",
-                "Predicted consequences",
-                "Error flag",
-                "Population germline allele frequency (GE | gnomAD)",
-                "VAF",
-                "LOH",
-                "Alt allele/total read depth",
-                "Gene mode of action",
-                "Variant class",
-                "TSG_NMD",
-                "TSG_LOH",
-                "Splice fs?",
-                "SpliceAI",
-                "REVEL",
-                "OG_3' Ter",
-                "Recurrence somatic database",
-                "HS_Total",
-                "HS_Mut",
-                "HS_Tissue",
-                "COSMIC Driver",
-                "COSMIC Entities",
-                "Paed Driver",
-                "Paed Entities",
-                "Sarc Driver",
-                "Sarc Entities",
-                "Neuro Driver",
-                "Neuro Entities",
-                "Ovary Driver",
-                "Ovary Entities",
-                "Haem Driver",
-                "Haem Entities",
-                "MTBP c.",
-                "MTBP p.",
+
+@functools.cache
+def get_config() -> dict:
+    """Get the static config of the SNV sheet, built the first time it
+    is needed
+
+    Returns
+    -------
+    dict
+        Dict of the static config of the sheet
+    """
+
+    return {
+        "cells_to_write": {
+            (1, i): value
+            for i, value in enumerate(
+                [
+                    "Domain",
+                    "Gene",
+                    "GRCh38 coordinates",
+                    "Cyto",
+                    "RefSeq IDs",
+                    "Variant",
+                    "Predicted consequences",
+                    "Error flag",
+                    "Population germline allele frequency (GE | gnomAD)",
+                    "VAF",
+                    "LOH",
+                    "Alt allele/total read depth",
+                    "Gene mode of action",
+                    "Variant class",
+                    "TSG_NMD",
+                    "TSG_LOH",
+                    "Splice fs?",
+                    "SpliceAI",
+                    "REVEL",
+                    "OG_3' Ter",
+                    "Recurrence somatic database",
+                    "HS_Total",
+                    "HS_Mut",
+                    "HS_Tissue",
+                    "COSMIC Driver",
+                    "COSMIC Entities",
+                    "Paed Driver",
+                    "Paed Entities",
+                    "Sarc Driver",
+                    "Sarc Entities",
+                    "Neuro Driver",
+                    "Neuro Entities",
+                    "Ovary Driver",
+                    "Ovary Entities",
+                    "Haem Driver",
+                    "Haem Entities",
+                    "MTBP c.",
+                    "MTBP p.",
+                ],
+                1,
+            )
+        },
+        "to_bold": [
+            f"{misc.convert_index_to_letters(i)}1" for i in range(0, 38)
+        ],
+        "col_width": [
+            ("A", 5),
+            ("B", 12),
+            ("C", 20),
+            ("D", 14),
+            ("E", 20),
+            ("F", 22),
+            ("G", 22),
+            ("K", 8),
+            ("M", 18),
+            ("N", 14),
+        ]
+        + [(f"{misc.convert_index_to_letters(i)}", 5) for i in range(21, 38)],
+        "cells_to_colour": [
+            # letters N to U
+            (
+                f"{string.ascii_uppercase[i]}1",
+                PatternFill(patternType="solid", start_color="F2F2F2"),
+            )
+            for i in range(13, 21)
+        ]
+        + [
+            (
+                f"{letter}1",
+                PatternFill(patternType="solid", start_color="fdeada"),
+            )
+            for letter in ["V", "W", "X"]
+        ]
+        + [
+            # letters Y to AJ
+            (
+                f"{misc.convert_index_to_letters(i)}1",
+                PatternFill(patternType="solid", start_color="dbeef4"),
+            )
+            for i in range(24, 36)
+        ]
+        + [
+            (
+                f"{col}1",
+                PatternFill(patternType="solid", start_color="dabcff"),
+            )
+            for col in ["AK", "AL"]
+        ],
+        "borders": {
+            "cell_rows": [
+                ("A1:AL1", THIN_BORDER),
             ],
-            1,
-        )
-    },
-    "to_bold": [f"{misc.convert_index_to_letters(i)}1" for i in range(0, 38)],
-    "col_width": [
-        ("A", 5),
-        ("B", 12),
-        ("C", 20),
-        ("D", 14),
-        ("E", 20),
-        ("F", 22),
-        ("G", 22),
-        ("K", 8),
-        ("M", 18),
-        ("N", 14),
-    ]
-    + [(f"{misc.convert_index_to_letters(i)}", 5) for i in range(21, 38)],
-    "cells_to_colour": [
-        # letters N to U
-        (
-            f"{string.ascii_uppercase[i]}1",
-            PatternFill(patternType="solid", start_color="F2F2F2"),
-        )
-        for i in range(13, 21)
-    ]
-    + [
-        (
-            f"{letter}1",
-            PatternFill(patternType="solid", start_color="fdeada"),
-        )
-        for letter in ["V", "W", "X"]
-    ]
-    + [
-        # letters Y to AJ
-        (
-            f"{misc.convert_index_to_letters(i)}1",
-            PatternFill(patternType="solid", start_color="dbeef4"),
-        )
-        for i in range(24, 36)
-    ]
-    + [
-        (
-            f"{col}1",
-            PatternFill(patternType="solid", start_color="dabcff"),
-        )
-        for col in ["AK", "AL"]
-    ],
-    "borders": {
-        "cell_rows": [
-            ("A1:AL1", THIN_BORDER),
+        },
+        "alignment_info": [
+            (
+                f"{misc.convert_index_to_letters(i)}1",
+                {
+                    "horizontal": "left",
+                    "vertical": "bottom",
+                    "wrapText": True,
+                    "text_rotation": 90,
+                },
+            )
+            for i in range(0, 38)
         ],
-    },
-    "alignment_info": [
-        (
-            f"{misc.convert_index_to_letters(i)}1",
-            {
-                "horizontal": "left",
-                "vertical": "bottom",
-                "wrapText": True,
-                "text_rotation": 90,
-            },
-        )
-        for i in range(0, 38)
-    ],
-    "row_height": [(1, 80)],
-    "auto_filter": "A:AL",
-    "freeze_panes": "G1",
-}
+        "row_height": [(1, 80)],
+        "auto_filter": "A:AL",
+        "freeze_panes": "G1",
+    }
 
 
 def add_dynamic_values(data: pd.DataFrame) -> dict:
@@ -138,7 +153,7 @@ def add_dynamic_values(data: pd.DataFrame) -> dict:
     Returns
     -------
     dict
-        Dict containing data that needs to be merged to the CONFIG variable
+        Dict containing data that needs to be merged to the static config
     """
 
     if data is None:
@@ -157,7 +172,9 @@ def add_dynamic_values(data: pd.DataFrame) -> dict:
         "dropdowns": [
             {
                 "cells": {
-                    (f"N{i}" for i in range(2, nb_somatic_variants + 2)): (
+                    tuple(
+                        f"N{i}" for i in range(2, nb_somatic_variants + 2)
+                    ): (
                         '"Oncogenic, Likely oncogenic,'
                         "Uncertain, Likely passenger,"
                         'Likely artefact"'
@@ -1,3 +1,5 @@
+import functools
+
 from openpyxl.styles import Border, Side
 from openpyxl.styles.fills import PatternFill
 from openpyxl.utils.dataframe import dataframe_to_rows
@@ -11,48 +13,59 @@ THIN_BORDER = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
 LEFT_BORDER = Border(left=THIN)
 
 
-CONFIG = {
-    "col_width": [
-        ("A", 12),
-        ("B", 18),
-        ("C", 22),
-        ("D", 22),
-        ("E", 20),
-    ],
-    "expected_columns": [
-        "Event domain",
-        "Gene",
-        "RefSeq IDs",
-        "Impacted transcript region",
-        "GRCh38 coordinates",
-        "Size",
-        (
-            "Population germline allele frequency (GESG | GECG for somatic "
-            "SVs or AF | AUC for germline CNVs)"
-        ),
-        "Paired reads",
-        "Split reads",
-        "Gene mode of action",
-        "Variant class",
-        "OG_Fusion",
-        "OG_IntDup",
-        "OG_IntDel",
-        "Disruptive",
-    ],
-    "alternative_columns": [
-        [
+@functools.cache
+def get_config() -> dict:
+    """Get the static config of the SV sheet, built the first time it
+    is needed
+
+    Returns
+    -------
+    dict
+        Dict of the static config of the sheet
+    """
+
+    return {
+        "col_width": [
+            ("A", 12),
+            ("B", 18),
+            ("C", 22),
+            ("D", 22),
+            ("E", 20),
+        ],
+        "expected_columns": [
+            "Event domain",
+            "Gene",
+            "RefSeq IDs",
+            "Impacted transcript region",
+            "GRCh38 coordinates",
+            "Size",
             (
                 "Population germline allele frequency (GESG | GECG for "
                 "somatic SVs or AF | AUC for germline CNVs)"
             ),
-            (
-                "Population germline allele frequency (AF | AUC for germline "
-                "CNVs)"
-            ),
-        ]
-    ],
-    "row_height": [(1, 120)],
-}
+            "Paired reads",
+            "Split reads",
+            "Gene mode of action",
+            "Variant class",
+            "OG_Fusion",
+            "OG_IntDup",
+            "OG_IntDel",
+            "Disruptive",
+        ],
+        "alternative_columns": [
+            [
+                (
+                    "Population germline allele frequency (GESG | GECG for "
+                    "somatic SVs or AF | AUC for germline CNVs)"
+                ),
+                (
+                    "Population germline allele frequency (AF | AUC for "
+                    "germline CNVs)"
+                ),
+            ]
+        ],
+        "row_height": [(1, 120)],
+    }
 
 
 def add_dynamic_values(data: pd.DataFrame, alternative_columns: dict) -> dict:
@@ -69,7 +82,7 @@ def add_dynamic_values(data: pd.DataFrame, alternative_columns: dict) -> dict:
     Returns
     -------
     dict
-        Dict containing data that needs to be merged to the CONFIG variable
+        Dict containing data that needs to be merged to the static config
     """
 
     if data is None:
@@ -99,21 +112,20 @@ def add_dynamic_values(data: pd.DataFrame, alternative_columns: dict) -> dict:
         misc.convert_letter_column_to_index(last_column_letter),
     )
 
-    total_number_genes = last_column_index - 1 - lookup_start
+    # every gene has a column in the 12 look up groups and a gene column
+    # after them
+    total_number_columns = last_column_index + 1 - lookup_start
 
-    # there are 12 look up groups
-    if total_number_genes % 12:
+    if total_number_columns % 13:
         raise ValueError(
             (
                 "Uneven number of genes per lookup group: "
-                f"{total_number_genes} / 12 = {total_number_genes/12} per "
+                f"{total_number_columns} / 13 = {total_number_columns/13} per "
                 "group"
             )
         )
 
-    number_genes = total_number_genes // 12
-
-    number_genes = int(number_genes)
+    number_genes = total_number_columns // 13
     lookup_end = last_column_index - number_genes
 
     border_cells = []
@@ -196,7 +208,7 @@ def add_dynamic_values(data: pd.DataFrame, alternative_columns: dict) -> dict:
         "dropdowns": [
             {
                 "cells": {
-                    (
+                    tuple(
                         f"{column_letters[1]}{i}"
                         for i in range(2, nb_structural_variants + 2)
                     ): (
@@ -63,14 +63,80 @@ CONFIG = [
 ]
 
 
-def get_table_value_in_html_table(
+# tag and text preceding the TMB value in the HTML
+TMB_TAG = "b"
+TMB_PATTERN = (
+    "Total number of somatic non-synonymous small variants per megabase"
+)
+
+
+def build_qc_record(html_tables: list, tmb: str) -> dict:
+    """Build the QC record of the case from the tables of the HTML, checked
+    against the table config. The columns found under an alternative header
+    are stored under the expected header so that the alternatives are only
+    resolved once. The record only contains JSON serializable values:
+    {
+        "tables": {
+            "Patient info": [{"Clinical Indication": ...}],
+            ...
+            "Sequencing info": [{"Total somatic SNVs": ...}, ...],
+        },
+        "TMB": "...",
+    }
+
+    Parameters
+    ----------
+    html_tables : list
+        List of dataframes for the tables in the HTML, in the order of the
+        config
+    tmb : str
+        Tumour mutational burden found in the text of the HTML
+
+    Returns
+    -------
+    dict
+        Dict with the rows of every table as a list of dicts, and the TMB
+    """
+
+    # a missing table would shift the lookups of the QC sheet
+    missing_tables = [
+        table_config["name"] for table_config in CONFIG[len(html_tables) :]
+    ]
+
+    assert not missing_tables, (
+        f"Expected {len(CONFIG)} tables in the HTML, found "
+        f"{len(html_tables)}, missing: {missing_tables}"
+    )
+
+    record = {"tables": {}, "TMB": tmb}
+
+    # validate the tables as the order in the html and the config file
+    # should be the same
+    for table_config, table in zip(CONFIG, html_tables):
+        alternative_headers = find_alternative_headers(
+            table,
+            table_config["expected_headers"],
+            table_config["alternatives"],
+        )
+        table = table.rename(
+            columns={
+                alternative: header
+                for header, alternative in alternative_headers.items()
+            }
+        )
+        record["tables"][table_config["name"]] = table.to_dict("records")
+
+    return record
+
+
+def get_table_value_in_qc_record(
     table_name_in_config: str,
     row: int,
     column: str,
-    html_tables: list,
+    qc_record: dict,
     formatting: str = None,
 ) -> str:
-    """Get the table value in the matched df for writing in the worksheet
+    """Get the table value in the QC record for writing in the worksheet
 
     Parameters
     ----------
@@ -80,36 +146,46 @@ def get_table_value_in_html_table(
         Number of the row to look data in
     column : str
         Column name to look data in
-    html_tables : list
-        List of the tables stored in the html
+    qc_record : dict
+        QC record built from the tables of the HTML
     formatting : str, optional
         String describing how to modify the table value, by default None
 
     Returns
     -------
     str
-        Value from the dataframe
+        Value from the table
     """
 
-    for table_name, table_info in html_tables.items():
-        if table_name_in_config == table_name:
-            # check if we have an alternative for the given column name i.e.
-            # that column name is already not present
-            if column in table_info["alternatives"]:
-                column = table_info["alternatives"][column]
+    value_to_return = qc_record["tables"][table_name_in_config][row][column]
 
-            value_to_return = table_info["data"].loc[row, column]
-
-            if formatting:
-                # hardcoded way to reformat the df value to extract
-                if formatting == "split":
-                    value_to_return = value_to_return.split("_")[0]
-                elif formatting == "parentheses":
-                    value_to_return = f"({value_to_return})"
+    if formatting:
+        # hardcoded way to reformat the df value to extract
+        if formatting == "split":
+            value_to_return = value_to_return.split("_")[0]
+        elif formatting == "parentheses":
+            value_to_return = f"({value_to_return})"
 
     return value_to_return
 
 
+def get_tmb(qc_record: dict) -> str:
+    """Get the tumour mutational burden from the QC record
+
+    Parameters
+    ----------
+    qc_record : dict
+        QC record built from the HTML
+
+    Returns
+    -------
+    str
+        TMB value
+    """
+
+    return qc_record["TMB"]
+
+
 def find_alternative_headers(
     table: pd.DataFrame, expected_headers: list, alternatives: list
 ):
@@ -1,67 +1,830 @@
 import argparse
+from concurrent.futures import as_completed, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import multiprocessing
 import os
 from pathlib import Path
+import signal
+import socketserver
+import subprocess
+import sys
+import traceback
 
-import pandas as pd
+# columns of the batch manifest, one row per case
+CASE_INPUTS = [
+    "supplementary_html",
+    "reported_variants",
+    "reported_structural_variants",
+]
 
-from configs import tables, germline, snv, gain, loss, refgene, sv, summary
-from utils import excel_parsing, excel_writing, html, vcf
+# sheets of the workbook of a case, in the order of the workbook
+SHEET_NAMES = [
+    "SOC",
+    "QC",
+    "Plot",
+    "Signatures",
+    "SNV",
+    "Gain",
+    "Loss",
+    "SV",
+    "Germline",
+    "Summary",
+    "Refgene",
+    "Bioinformatics",
+]
+
+# heavy modules are imported by the stages using them rather than at the
+# top of the script, so that parsing the arguments and the start of the
+# server don't wait for them
+LAZY_MODULES = [
+    "pandas",
+    "openpyxl",
+    "lxml.html",
+    "PIL.Image",
+    "urllib3",
+    "vcfpy",
+    "psutil",
+    "utils.excel_parsing",
+    "utils.excel_writing",
+    "utils.html",
+    "utils.vcf",
+]
+
+# same as excel_writing.ZLIB_IMPLEMENTATIONS, not imported to parse the
+# arguments without importing openpyxl
+ZLIB_IMPLEMENTATIONS = ["zlib", "zlib-ng"]
+
+# reference files of the run, reloaded by the server when their content
+# changes
+REFERENCE_INPUTS = [
+    "hotspots",
+    "reference_gene_groups",
+    "panelapp",
+    "cytological_bands",
+    "clinvar",
+    "clinvar_index",
+]
+
+# modules parsing and processing the inputs, whose changes invalidate the
+# cached outputs of the stages
+STAGE_CODE_MODULES = [
+    "utils.excel_parsing",
+    "utils.html",
+    "utils.stages",
+    "utils.vcf",
+    "utils.misc",
+]
+
+# estimated memory needed to write the workbook of a case on top of the
+# references shared with the parent process
+CASE_MEMORY = 1024**3
+
+# number of times a case is tried if its worker process dies
+CASE_ATTEMPTS = 2
+
+# references of the batch in the worker processes
+WORKER_REFERENCES = None
 
 
 def main(**kwargs):
-    # prepare inputs and link type with the args
-    inputs = {
-        "hotspots": {"id": kwargs["hotspots"], "type": "xls"},
-        "reference_gene_groups": {
-            "id": kwargs["reference_gene_groups"],
-            "type": "xls",
-        },
-        "panelapp": {
-            "id": kwargs["panelapp"],
-            "type": "xls",
-        },
-        "cytological_bands": {
-            "id": kwargs["cytological_bands"],
-            "type": "xls",
-        },
-        "clinvar": {"id": kwargs["clinvar"], "type": "vcf"},
-        "clinvar_index": {"id": kwargs["clinvar_index"], "type": "index"},
-        "supplementary_html": {
-            "id": kwargs["supplementary_html"],
-            "type": "html",
-        },
-        "reported_variants": {
-            "id": kwargs["reported_variants"],
-            "type": "csv",
-        },
-        "reported_structural_variants": {
-            "id": kwargs["reported_structural_variants"],
-            "type": "csv",
-        },
-    }
+    if kwargs.get("serve"):
+        serve(kwargs["serve"], **kwargs)
+        return
+
+    if kwargs.get("startup_profile"):
+        print_startup_profile()
+        return
 
     print("Parsing data...")
 
+    if kwargs.get("batch"):
+        cases = read_batch_manifest(kwargs["batch"])
+    else:
+        cases = [{name: kwargs[name] for name in CASE_INPUTS}]
+
+    # the references are parsed once and reused for every case
+    references = load_references(cases, **kwargs)
+
+    if kwargs.get("template"):
+        prepare_template(kwargs["template"])
+
+    if not kwargs.get("batch"):
+        write_case_workbook(references, cases[0], **kwargs)
+        return
+
+    failed_cases = write_case_workbooks(
+        references, cases, kwargs.get("case_workers") or 1, **kwargs
+    )
+
+    print(f"Wrote {len(cases) - len(failed_cases)}/{len(cases)} workbooks")
+
+    if failed_cases:
+        for case, error in failed_cases.items():
+            print(f"Failed case {case}: {error}")
+
+        sys.exit(1)
+
+
+def import_lazy_modules():
+    """Import the modules imported lazily by the stages, for processes
+    writing several cases to import them once or forked processes to
+    inherit them
+    """
+
+    for module in LAZY_MODULES:
+        importlib.import_module(module)
+
+
+def get_import_times(code: str) -> dict:
+    """Run the code in a new interpreter with python -X importtime from the
+    directory of the script
+
+    Parameters
+    ----------
+    code : str
+        Python code to run
+
+    Returns
+    -------
+    dict
+        Dict of the cumulative import time in microseconds of the top level
+        modules, in import order
+    """
+
+    from utils import misc
+
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=Path(__file__).resolve().parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    return misc.parse_import_times(process.stderr)
+
+
+def print_startup_profile():
+    """Print the time spent importing modules when the script starts and the
+    time of the modules imported later by the stages using them
+    """
+
+    # modules imported by the interpreter itself
+    interpreter_time = sum(get_import_times("pass").values())
+    startup_time = (
+        sum(get_import_times("import generate_workbook").values())
+        - interpreter_time
+    )
+    # every lazy module is timed without the modules it shares with the
+    # ones imported before it
+    lazy_times = get_import_times(
+        "import generate_workbook; "
+        + "; ".join(f"import {module}" for module in LAZY_MODULES)
+    )
+    lazy_times = {module: lazy_times.get(module, 0) for module in LAZY_MODULES}
+    lazy_time = sum(lazy_times.values())
+
+    print(f"Imports at startup: {startup_time / 1000:.0f} ms")
+    print(f"Imports deferred to the stages: {lazy_time / 1000:.0f} ms")
+
+    for module, import_time in lazy_times.items():
+        print(f"    {module}: {import_time / 1000:.0f} ms")
+
+    print(
+        "Imports at startup if not deferred: "
+        f"{(startup_time + lazy_time) / 1000:.0f} ms"
+    )
+
+
+def write_case_workbooks(
+    references: dict, cases: list, workers: int = 1, **kwargs
+) -> dict:
+    """Write the workbook of every case of the batch, in a process pool if
+    more than one worker is requested. The workers are forked after the
+    references are loaded so that they share them without pickling or
+    parsing them again. A failing case doesn't stop the other cases
+
+    Parameters
+    ----------
+    references : dict
+        Dict of the processed reference data returned by load_references
+    cases : list
+        List of dicts with the files of every case
+    workers : int, optional
+        Maximum number of cases written at the same time, by default 1
+
+    Returns
+    -------
+    dict
+        Dict of the errors for the cases that failed, using the HTML file of
+        the case as key
+    """
+
+    failed_cases = {}
+    workers = get_case_workers(workers)
+
+    if workers == 1:
+        for case in cases:
+            try:
+                write_case_workbook(references, case, **kwargs)
+            except Exception as error:
+                traceback.print_exc()
+                failed_cases[case["supplementary_html"]] = repr(error)
+
+        return failed_cases
+
+    print(f"Writing {len(cases)} cases with {workers} processes...")
+
+    # imported once before forking rather than in every worker
+    import_lazy_modules()
+
+    pending_cases = cases
+
+    # a worker killed i.e. out of memory breaks the pool and every case
+    # still running in it, these cases are tried again in a new pool
+    for attempt in range(CASE_ATTEMPTS):
+        broken_cases = []
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=set_worker_references,
+            initargs=(references,),
+        ) as executor:
+            futures = {
+                executor.submit(write_worker_case_workbook, case, kwargs): case
+                for case in pending_cases
+            }
+
+            for future in as_completed(futures):
+                case = futures[future]
+
+                try:
+                    future.result()
+                except BrokenProcessPool:
+                    broken_cases.append(case)
+                except Exception as error:
+                    # the traceback of the worker is chained to the error
+                    traceback.print_exception(error)
+                    failed_cases[case["supplementary_html"]] = repr(error)
+
+        pending_cases = broken_cases
+
+        if not pending_cases:
+            break
+
+    for case in pending_cases:
+        failed_cases[case["supplementary_html"]] = (
+            f"worker process died {CASE_ATTEMPTS} times"
+        )
+
+    return failed_cases
+
+
+def get_case_workers(workers: int) -> int:
+    """Get the number of cases that can be written at the same time given
+    the number of CPUs and the memory available
+
+    Parameters
+    ----------
+    workers : int
+        Number of workers requested
+
+    Returns
+    -------
+    int
+        Number of workers to use, at least 1
+    """
+
+    import psutil
+
+    memory_workers = psutil.virtual_memory().available // CASE_MEMORY
+
+    return max(1, min(workers, os.cpu_count(), memory_workers))
+
+
+class CaseRequestHandler(socketserver.StreamRequestHandler):
+    """Handle a case request sent to the server: a JSON object on one line
+    with the paths to the files of the case in the CASE_INPUTS keys. The
+    response is a JSON object on one line with the path to the workbook in
+    the "workbook" key, or the error in the "error" key
+    """
+
+    def handle(self):
+        try:
+            case = json.loads(self.rfile.readline())
+            missing_inputs = set(CASE_INPUTS) - set(case)
+
+            assert (
+                not missing_inputs
+            ), f"Inputs missing from the request: {missing_inputs}"
+
+            output_path = write_case_workbook(
+                self.server.get_references(), case, **self.server.kwargs
+            )
+            response = {"workbook": os.path.abspath(output_path)}
+        except Exception as error:
+            traceback.print_exc()
+            response = {"error": repr(error)}
+
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class CaseServer(socketserver.UnixStreamServer):
+    """Server writing the workbook of the cases sent over a Unix socket,
+    keeping the references and the imported modules loaded between the
+    requests. The references are loaded again when the content of one of
+    the files changes
+
+    Parameters
+    ----------
+    socket_path : str
+        Path to the Unix socket to listen on
+    kwargs : dict
+        Arguments of the script
+    """
+
+    def __init__(self, socket_path: str, kwargs: dict):
+        # socket left by a previous server
+        Path(socket_path).unlink(missing_ok=True)
+        super().__init__(socket_path, CaseRequestHandler)
+        self.kwargs = kwargs
+        self.references = None
+        # modification time, size and hash of the reference files, the files
+        # are only hashed again when they were modified
+        self.reference_files = {}
+
+    def get_references(self) -> dict:
+        """Get the references, loading them again if the content of a
+        reference file changed since they were loaded
+
+        Returns
+        -------
+        dict
+            Dict of the processed reference data returned by load_references
+        """
+
+        from utils import misc
+
+        reference_files = {}
+
+        for name in REFERENCE_INPUTS:
+            stat = os.stat(self.kwargs[name])
+            stat = (stat.st_mtime_ns, stat.st_size)
+            previous_stat, file_hash = self.reference_files.get(
+                name, (None, None)
+            )
+
+            if stat != previous_stat:
+                file_hash = misc.get_file_hash(self.kwargs[name])
+
+            reference_files[name] = (stat, file_hash)
+
+        hashes = {name: info[1] for name, info in reference_files.items()}
+        previous_hashes = {
+            name: info[1] for name, info in self.reference_files.items()
+        }
+
+        if self.references is None or hashes != previous_hashes:
+            print("Parsing references...")
+            # the cases requested later are not known, every ClinVar record
+            # is kept
+            self.references = load_references(**self.kwargs)
+
+        self.reference_files = reference_files
+
+        return self.references
+
+    def server_close(self):
+        super().server_close()
+        Path(self.server_address).unlink(missing_ok=True)
+
+
+def serve(socket_path: str, **kwargs):
+    """Load the references and write the workbook of the cases requested on
+    the Unix socket until the server is interrupted
+
+    Parameters
+    ----------
+    socket_path : str
+        Path to the Unix socket to listen on
+    """
+
+    # stop the server cleanly when the daemon is terminated
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    with CaseServer(socket_path, kwargs) as server:
+        import_lazy_modules()
+        server.get_references()
+
+        if kwargs.get("template"):
+            prepare_template(kwargs["template"])
+        print(f"Listening on {socket_path}...")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Stopping server...")
+
+
+def set_worker_references(references: dict):
+    """Store the references in the worker process, inherited from the
+    parent process when forking
+
+    Parameters
+    ----------
+    references : dict
+        Dict of the processed reference data returned by load_references
+    """
+
+    global WORKER_REFERENCES
+    WORKER_REFERENCES = references
+
+
+def write_worker_case_workbook(case: dict, kwargs: dict):
+    """Write the workbook of a case in a worker process of the batch
+
+    Parameters
+    ----------
+    case : dict
+        Dict of the paths to the files of the case
+    kwargs : dict
+        Arguments of the script
+    """
+
+    write_case_workbook(WORKER_REFERENCES, case, **kwargs)
+
+
+def parse_inputs(inputs: dict) -> dict:
+    """Parse the files of the inputs according to their type, adding the
+    parsed data to the inputs dict
+
+    Parameters
+    ----------
+    inputs : dict
+        Dict of inputs with the file path and type of every input, and the
+        ids of the records to keep for the vcf inputs
+
+    Returns
+    -------
+    dict
+        Dict of inputs with the parsed data
+    """
+
+    from utils import excel_parsing, html, perf, vcf
+
     # loop through the inputs to parse the files
     for name, info_dict in inputs.items():
         file = info_dict["id"]
         file_type = info_dict["type"]
 
-        if file_type == "vcf":
-            data = vcf.open_vcf(file)
-        elif file_type == "xls" or file_type == "csv":
-            data = excel_parsing.open_file(file, file_type)
-        elif file_type == "html":
-            data = html.open_html(file)
+        with perf.span(f"parse {name}", size=os.path.getsize(file)) as counts:
+            if file_type == "vcf":
+                data = vcf.load_clinvar_significance(
+                    vcf.open_vcf(file), info_dict.get("ids")
+                )
+                counts["variants"] = len(data)
+            elif file_type == "xls" or file_type == "csv":
+                data = excel_parsing.open_file(file, file_type)
+                # excel files are read as a dict of dataframes per sheet
+                counts["rows"] = sum(
+                    len(df)
+                    for df in (
+                        data.values() if isinstance(data, dict) else [data]
+                    )
+                )
+            elif file_type == "html":
+                data, inputs[name]["images"] = html.extract_html(file)
+                counts["images"] = len(inputs[name]["images"])
+                counts["tables"] = sum(1 for _ in data.iter("table"))
+            else:
+                data = None
 
         inputs[name]["data"] = data
 
-    print("Process parsed data...")
+    return inputs
+
+
+def load_references(cases: list = None, **kwargs) -> dict:
+    """Parse and process the reference files shared by every case. Only the
+    ClinVar records of the germline variants of the cases are kept, rather
+    than the whole ClinVar
+
+    Parameters
+    ----------
+    cases : list, optional
+        List of dicts with the files of the cases the references are loaded
+        for, by default None to keep every ClinVar record i.e. for the
+        server whose cases are not known in advance
+
+    Returns
+    -------
+    dict
+        Dict of the processed reference data, with the spans recorded
+        while loading them for the performance report of the cases
+    """
+
+    from utils import excel_parsing, misc, perf
+
+    with perf.recording() as recorder:
+        clinvar_ids = None
+
+        if cases is not None:
+            with perf.span("get_germline_clinvar_ids") as counts:
+                clinvar_ids = set().union(
+                    *(
+                        excel_parsing.get_germline_clinvar_ids(
+                            excel_parsing.open_file(
+                                case["reported_variants"], "csv"
+                            )
+                        )
+                        for case in cases
+                    )
+                )
+                counts["ids"] = len(clinvar_ids)
+
+        # prepare inputs and link type with the args
+        inputs = parse_inputs(
+            {
+                "hotspots": {"id": kwargs["hotspots"], "type": "xls"},
+                "reference_gene_groups": {
+                    "id": kwargs["reference_gene_groups"],
+                    "type": "xls",
+                },
+                "panelapp": {
+                    "id": kwargs["panelapp"],
+                    "type": "xls",
+                },
+                "cytological_bands": {
+                    "id": kwargs["cytological_bands"],
+                    "type": "xls",
+                },
+                "clinvar": {
+                    "id": kwargs["clinvar"],
+                    "type": "vcf",
+                    "ids": clinvar_ids,
+                },
+                "clinvar_index": {
+                    "id": kwargs["clinvar_index"],
+                    "type": "index",
+                },
+            }
+        )
+
+        with perf.span("process_refgene") as counts:
+            refgene_df = excel_parsing.process_refgene(
+                inputs["reference_gene_groups"]["data"]
+            )
+            counts["rows"] = len(refgene_df)
+
+        with perf.span("process_panelapp") as counts:
+            panelapp_dfs = excel_parsing.process_panelapp(
+                inputs["panelapp"]["data"]
+            )
+            counts["rows"] = sum(len(df) for df in panelapp_dfs.values())
+
+        references = {
+            "hotspots": inputs["hotspots"]["data"],
+            "refgene": refgene_df,
+            "panelapp": panelapp_dfs,
+            "cytological_bands": inputs["cytological_bands"]["data"],
+            "clinvar": inputs["clinvar"]["data"],
+        }
+
+    references["spans"] = recorder.spans
 
-    refgene_df = excel_parsing.process_refgene(
-        inputs["reference_gene_groups"]["data"]
+    if kwargs.get("stage_cache"):
+        # the cached outputs of the stages are keyed on the content of the
+        # reference files
+        references["file_hashes"] = {
+            name: misc.get_file_hash(kwargs[name]) for name in REFERENCE_INPUTS
+        }
+
+    return references
+
+
+def prepare_template(template: str):
+    """Build the template workbook if it doesn't exist or if it was built
+    with other configs. It is prepared once before writing the cases, so
+    that the processes writing them in parallel only read it
+
+    Parameters
+    ----------
+    template : str
+        Path to the template workbook
+    """
+
+    from utils import excel_writing
+
+    if not excel_writing.is_template_up_to_date(template, SHEET_NAMES):
+        print(f"Building template {template}...")
+        excel_writing.build_template(template, SHEET_NAMES)
+
+
+def get_row_count(df) -> int:
+    """Get the number of rows of a dataframe returned by the processing of
+    the variants, which is None if there are no variants
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataframe or None
+
+    Returns
+    -------
+    int
+        Number of rows
+    """
+
+    return 0 if df is None else len(df)
+
+
+def read_batch_manifest(manifest: str) -> list:
+    """Read the batch manifest, a TSV file with one row per case and the
+    paths to the files of the case in the CASE_INPUTS columns
+
+    Parameters
+    ----------
+    manifest : str
+        Path to the batch manifest
+
+    Returns
+    -------
+    list
+        List of dicts with the files of every case
+    """
+
+    import pandas as pd
+
+    cases = pd.read_csv(manifest, sep="\t", dtype=str)
+    missing_columns = set(CASE_INPUTS) - set(cases.columns)
+
+    assert (
+        not missing_columns
+    ), f"Columns missing from the batch manifest: {missing_columns}"
+
+    return cases[CASE_INPUTS].to_dict("records")
+
+
+def write_case_workbook(references: dict, case: dict, **kwargs) -> str:
+    """Write the workbook of a case and its performance report, with the
+    time and memory used by every stage, next to it. The case is profiled if
+    a profile mode is given
+
+    Parameters
+    ----------
+    references : dict
+        Dict of the processed reference data returned by load_references
+    case : dict
+        Dict of the paths to the files of the case
+
+    Returns
+    -------
+    str
+        Path to the workbook
+    """
+
+    from utils import perf
+
+    with perf.recording() as recorder, perf.profiling(
+        kwargs.get("profile")
+    ) as profiler:
+        with perf.span("write_case_workbook"):
+            output_path = generate_case_workbook(references, case, **kwargs)
+
+    perf.write_report(
+        str(Path(output_path).with_suffix(".perf.json")),
+        recorder,
+        workbook=output_path,
+        case=case,
+        profile=kwargs.get("profile"),
+        references=references.get("spans", []),
     )
-    panelapp_dfs = excel_parsing.process_panelapp(inputs["panelapp"]["data"])
+
+    if profiler:
+        perf.write_cpu_profile(
+            profiler, str(Path(output_path).with_suffix(""))
+        )
+
+    return output_path
+
+
+def generate_case_workbook(references: dict, case: dict, **kwargs) -> str:
+    """Parse the files of a case and write its workbook
+
+    Parameters
+    ----------
+    references : dict
+        Dict of the processed reference data returned by load_references
+    case : dict
+        Dict of the paths to the files of the case
+
+    Returns
+    -------
+    str
+        Path to the workbook
+    """
+
+    from utils import excel_writing, perf
+
+    sheets, sample_id = prepare_case_sheets(references, case, **kwargs)
+
+    print("Writing sheets...")
+
+    # # create folder in order to grab the file in the bash main script
+    Path("output").mkdir(exist_ok=True)
+
+    output_path = f"output/{sample_id}.xlsx"
+
+    # start from the template if given, prepared by prepare_template, and
+    # only write the case specific data in it
+    with perf.span("write_sheets"):
+        workbook = excel_writing.open_workbook(kwargs.get("template"))
+        rendered_sheets = excel_writing.write_sheets(
+            workbook, sheets, kwargs.get("sheet_workers") or 1
+        )
+
+    compression_policy = {
+        "store_media": not kwargs.get("deflate_media"),
+        "xml_level": kwargs.get("compression_level"),
+        "zlib_implementation": kwargs.get("zlib_implementation"),
+    }
+
+    if kwargs.get("compression_report"):
+        print("Compression report:")
+        print(
+            excel_writing.get_compression_report(
+                workbook, rendered_sheets
+            ).to_string(index=False)
+        )
+
+    with perf.span("save_workbook") as counts:
+        excel_writing.save_workbook(
+            workbook,
+            output_path,
+            rendered_sheets,
+            {
+                key: value
+                for key, value in compression_policy.items()
+                if value is not None
+            },
+        )
+        counts["size"] = os.path.getsize(output_path)
+
+    if kwargs.get("workbook_report"):
+        # the costs of the sheets are kept in the performance report to be
+        # compared across releases
+        with perf.span("get_workbook_cost_report") as counts:
+            cost_report = excel_writing.get_workbook_cost_report(output_path)
+            counts["sheets"] = cost_report.to_dict("records")
+
+        print("Workbook cost report:")
+        print(cost_report.to_string(index=False))
+
+    print(f"Done! Wrote output/{sample_id}.xlsx")
+
+    return output_path
+
+
+def prepare_case_sheets(references: dict, case: dict, **kwargs) -> tuple:
+    """Parse and process the files of a case into the data of every sheet of
+    its workbook
+
+    Parameters
+    ----------
+    references : dict
+        Dict of the processed reference data returned by load_references
+    case : dict
+        Dict of the paths to the files of the case
+
+    Returns
+    -------
+    tuple
+        - List of dicts with the arguments for writing each sheet
+        - Sample ID, name of the workbook
+    """
+
+    from configs import (
+        bioinformatics,
+        germline,
+        snv,
+        gain,
+        loss,
+        refgene,
+        sv,
+        summary,
+    )
+    from utils import excel_parsing, html, misc, perf, stages
+
+    print(f"Parse and process data for {case['supplementary_html']}...")
+
+    # copy as the variant data is added to the refgene data
+    refgene_df = references["refgene"].copy()
 
     # list of tuple allowing:
     # - the writing of the column (1st element)
@@ -83,49 +846,73 @@ def main(**kwargs):
         ("Haem Entities", "Gene", refgene_df, "Gene", "Haem_Entities"),
     )
 
-    germline_df = excel_parsing.process_reported_variants_germline(
-        inputs["reported_variants"]["data"],
-        inputs["clinvar"]["data"],
-        panelapp_dfs,
-    )
-    somatic_df = excel_parsing.process_reported_variants_somatic(
-        inputs["reported_variants"]["data"],
-        lookup_refgene_data,
-        inputs["hotspots"]["data"],
-        inputs["cytological_bands"]["data"],
-    )
-    gain_df = excel_parsing.process_reported_SV(
-        inputs["reported_structural_variants"]["data"],
-        lookup_refgene_data,
-        "gain",
-        "OG_Amp",
-        "Focality",
-        "Full transcript",
-    )
-    loss_df = excel_parsing.process_reported_SV(
-        inputs["reported_structural_variants"]["data"],
-        lookup_refgene_data,
-        "loss|loh",
-        "TSG_Hom",
-        "SNV_LOH",
-    )
-    fusion_df, fusion_count, alternative_columns = (
-        excel_parsing.process_fusion_SV(
-            inputs["reported_structural_variants"]["data"],
-            lookup_refgene_data,
-            inputs["cytological_bands"]["data"],
-        )
-    )
+    initial_values = {
+        **{f"{name}_file": case[name] for name in CASE_INPUTS},
+        "lookup_refgene_data": lookup_refgene_data,
+        "clinvar": references["clinvar"],
+        "panelapp": references["panelapp"],
+        "hotspots": references["hotspots"],
+        "cytological_bands": references["cytological_bands"],
+    }
+    cache = None
 
-    refgene_df = excel_parsing.lookup_data_from_variants(
-        refgene_df,
-        **{
-            "somatic": somatic_df,
-            "gain": gain_df,
-            "loss": loss_df,
-            "fusion": fusion_df,
-        },
+    if kwargs.get("stage_cache"):
+        cache = {
+            "folder": kwargs["stage_cache"],
+            "max_size": kwargs["stage_cache_size"] * 1024**2,
+            "version": get_stage_code_version(),
+            # the values are identified by the content of their files
+            "keys": {
+                **{
+                    f"{name}_file": misc.get_file_hash(case[name])
+                    for name in CASE_INPUTS
+                },
+                "lookup_refgene_data": references["file_hashes"][
+                    "reference_gene_groups"
+                ],
+                **{
+                    name: references["file_hashes"][name]
+                    for name in [
+                        "clinvar",
+                        "panelapp",
+                        "hotspots",
+                        "cytological_bands",
+                    ]
+                },
+            },
+        }
+
+    stage_workers = kwargs.get("stage_workers") or 1
+
+    if kwargs.get("profile") == "cpu":
+        # cProfile only sees this process, the stages run in it to be in the
+        # profile
+        stage_workers = 1
+
+    # the parsing and processing of the inputs run as soon as the stages
+    # they depend on are done, in parallel with -sw
+    values = stages.run_stages(
+        get_case_stages(), initial_values, stage_workers, cache
     )
+    germline_df = values["germline_df"]
+    somatic_df = values["somatic_df"]
+    gain_df = values["gain_df"]
+    loss_df = values["loss_df"]
+    fusion_df = values["fusion_df"]
+    fusion_count = values["fusion_count"]
+    alternative_columns = values["alternative_columns"]
+
+    with perf.span("lookup_data_from_variants") as counts:
+        refgene_df = excel_parsing.lookup_data_from_variants(
+            refgene_df,
+            **{
+                "somatic": somatic_df,
+                "gain": gain_df,
+                "loss": loss_df,
+                "fusion": fusion_df,
+            },
+        )
+        counts["rows"] = get_row_count(refgene_df)
 
     df_columns = {
         arg_name: list(df.columns) if df is not None else None
@@ -137,45 +924,29 @@ def main(**kwargs):
         }.items()
     }
 
-    dynamic_values_per_sheet = {
-        "Germline": germline.add_dynamic_values(germline_df),
-        "SNV": snv.add_dynamic_values(somatic_df),
-        "Gain": gain.add_dynamic_values(gain_df),
-        "Loss": loss.add_dynamic_values(loss_df),
-        "SV": sv.add_dynamic_values(fusion_df, alternative_columns),
-        "Summary": summary.add_dynamic_values(
-            fusion_df, fusion_count, **df_columns
-        ),
-        "Refgene": refgene.add_dynamic_values(refgene_df),
-    }
-
-    # get images and tables from the html file
-    html_images = html.download_images(inputs["supplementary_html"]["data"])
-    html_tables = html.get_tables(inputs["supplementary_html"]["id"])
-
-    data_tables = {}
-
-    # validate the tables as the order in the html and the config file should
-    # be the same
-    for i in range(len(tables.CONFIG)):
-        alternative_headers = tables.find_alternative_headers(
-            html_tables[i],
-            tables.CONFIG[i]["expected_headers"],
-            tables.CONFIG[i]["alternatives"],
-        )
-
-        data_tables[tables.CONFIG[i]["name"]] = {
-            "data": html_tables[i],
-            "alternatives": alternative_headers,
+    with perf.span("add_dynamic_values"):
+        dynamic_values_per_sheet = {
+            "Germline": germline.add_dynamic_values(germline_df),
+            "SNV": snv.add_dynamic_values(somatic_df),
+            "Gain": gain.add_dynamic_values(gain_df),
+            "Loss": loss.add_dynamic_values(loss_df),
+            "SV": sv.add_dynamic_values(fusion_df, alternative_columns),
+            "Summary": summary.add_dynamic_values(
+                fusion_df, fusion_count, **df_columns
+            ),
+            "Refgene": refgene.add_dynamic_values(refgene_df),
+            "Bioinformatics": bioinformatics.add_dynamic_values(),
         }
 
+    html_images = values["html_images"]
+    qc_record = values["qc_record"]
+
     sheets = [
         {"sheet_name": "SOC"},
         {
             "sheet_name": "QC",
-            "html_tables": data_tables,
+            "qc_record": qc_record,
             "html_images": html_images,
-            "soup": inputs["supplementary_html"]["data"],
         },
         {"sheet_name": "Plot", "html_images": html_images},
         {"sheet_name": "Signatures", "html_images": html_images},
@@ -190,34 +961,253 @@ def main(**kwargs):
             "html_images": html_images,
         },
         {"sheet_name": "Refgene", "dynamic_data": dynamic_values_per_sheet},
-        {"sheet_name": "Bioinformatics"},
+        {
+            "sheet_name": "Bioinformatics",
+            "dynamic_data": dynamic_values_per_sheet,
+        },
     ]
 
-    print("Writing sheets...")
+    if kwargs.get("image_dpi_factor"):
+        # resample the images once to the largest size the sheets display
+        # them at
+        with perf.span("downscale_images", images=len(html_images)):
+            html.downscale_images(
+                html_images,
+                misc.get_image_display_sizes(
+                    [sheet_data["sheet_name"] for sheet_data in sheets]
+                ),
+                kwargs["image_dpi_factor"],
+            )
 
     # get the common prefix from the input files
     sample_id = (
         os.path.commonprefix(
             [
-                Path(inputs["supplementary_html"]["id"]).name,
-                Path(inputs["reported_variants"]["id"]).name,
-                Path(inputs["reported_structural_variants"]["id"]).name,
+                Path(case["supplementary_html"]).name,
+                Path(case["reported_variants"]).name,
+                Path(case["reported_structural_variants"]).name,
             ]
         )
         .rstrip("-")
         .rstrip("_")
     )
 
-    # # create folder in order to grab the file in the bash main script
-    Path("output").mkdir(exist_ok=True)
+    return sheets, sample_id
 
-    with pd.ExcelWriter(
-        f"output/{sample_id}.xlsx", engine="openpyxl"
-    ) as output_excel:
-        for sheet_data in sheets:
-            excel_writing.write_sheet(output_excel, **sheet_data)
 
-    print(f"Done! Wrote output/{sample_id}.xlsx")
+def get_case_stages() -> list:
+    """Get the stages parsing and processing the files of a case, with the
+    values they need and produce. The sources are the configs used by the
+    stages, whose changes invalidate the cached outputs of the stages
+
+    Returns
+    -------
+    list
+        List of dicts with the name, function, inputs, outputs, constant
+        args and sources of every stage, for stages.run_stages
+    """
+
+    from utils import excel_parsing
+
+    return [
+        {
+            "name": "extract supplementary_html",
+            "function": extract_html_data,
+            "inputs": ["supplementary_html_file"],
+            "sources": ["configs.tables"],
+            "outputs": ["html_images", "qc_record"],
+        },
+        {
+            "name": "parse reported_variants",
+            "function": parse_case_input,
+            "inputs": ["reported_variants_file"],
+            "args": ["reported_variants", "csv"],
+            "outputs": ["reported_variants"],
+        },
+        {
+            "name": "parse reported_structural_variants",
+            "function": parse_case_input,
+            "inputs": ["reported_structural_variants_file"],
+            "args": ["reported_structural_variants", "csv"],
+            "outputs": ["reported_structural_variants"],
+        },
+        {
+            "name": "process_reported_variants_germline",
+            "function": functools.partial(
+                process_variants,
+                "process_reported_variants_germline",
+                excel_parsing.process_reported_variants_germline,
+            ),
+            "inputs": ["reported_variants", "clinvar", "panelapp"],
+            "outputs": ["germline_df"],
+        },
+        {
+            "name": "process_reported_variants_somatic",
+            "function": functools.partial(
+                process_variants,
+                "process_reported_variants_somatic",
+                excel_parsing.process_reported_variants_somatic,
+            ),
+            "inputs": [
+                "reported_variants",
+                "lookup_refgene_data",
+                "hotspots",
+                "cytological_bands",
+            ],
+            "sources": ["configs.refgene"],
+            "outputs": ["somatic_df"],
+        },
+        {
+            "name": "process_reported_SV gain",
+            "function": functools.partial(
+                process_variants,
+                "process_reported_SV gain",
+                excel_parsing.process_reported_SV,
+            ),
+            "inputs": ["reported_structural_variants", "lookup_refgene_data"],
+            "args": ["gain", "OG_Amp", "Focality", "Full transcript"],
+            "sources": ["configs.refgene"],
+            "outputs": ["gain_df"],
+        },
+        {
+            "name": "process_reported_SV loss",
+            "function": functools.partial(
+                process_variants,
+                "process_reported_SV loss",
+                excel_parsing.process_reported_SV,
+            ),
+            "inputs": ["reported_structural_variants", "lookup_refgene_data"],
+            "args": ["loss|loh", "TSG_Hom", "SNV_LOH"],
+            "sources": ["configs.refgene"],
+            "outputs": ["loss_df"],
+        },
+        {
+            "name": "process_fusion_SV",
+            "function": functools.partial(
+                process_variants,
+                "process_fusion_SV",
+                excel_parsing.process_fusion_SV,
+            ),
+            "inputs": [
+                "reported_structural_variants",
+                "lookup_refgene_data",
+                "cytological_bands",
+            ],
+            "sources": ["configs.refgene", "configs.sv", "configs.tables"],
+            "outputs": ["fusion_df", "fusion_count", "alternative_columns"],
+        },
+    ]
+
+
+def get_stage_code_version() -> str:
+    """Get a hash of the code of the stages and of the versions of the
+    packages their outputs are pickled with, so that the outputs cached by
+    another version are not reused
+
+    Returns
+    -------
+    str
+        Hexadecimal hash of the code and package versions
+    """
+
+    import pandas as pd
+
+    version = hashlib.sha256()
+    version.update(f"{sys.version} {pd.__version__}".encode())
+
+    for module in STAGE_CODE_MODULES:
+        version.update(
+            inspect.getsource(importlib.import_module(module)).encode()
+        )
+
+    # this script may be imported or run as __main__
+    version.update(Path(__file__).read_bytes())
+
+    return version.hexdigest()
+
+
+def parse_case_input(file: str, name: str, file_type: str):
+    """Parse a file of a case
+
+    Parameters
+    ----------
+    file : str
+        Path to the file
+    name : str
+        Name of the input, used in the name of the span
+    file_type : str
+        Type of the file, as in parse_inputs
+
+    Returns
+    -------
+    Parsed data of the file
+    """
+
+    return parse_inputs({name: {"id": file, "type": file_type}})[name]["data"]
+
+
+def extract_html_data(file: str) -> tuple:
+    """Parse the supplementary HTML of a case and get its images and the QC
+    record built from its tables, the parsed HTML itself not being sent
+    back from the worker processes
+
+    Parameters
+    ----------
+    file : str
+        Path to the supplementary HTML
+
+    Returns
+    -------
+    tuple
+        - List of the images of the HTML
+        - Dict of the QC record
+    """
+
+    from configs import tables
+    from utils import html, perf
+
+    inputs = parse_inputs({"supplementary_html": {"id": file, "type": "html"}})
+    html_tree = inputs["supplementary_html"]["data"]
+
+    with perf.span("build_qc_record") as counts:
+        qc_record = tables.build_qc_record(
+            html.get_tables(html_tree),
+            html.get_tag_sibling(
+                html_tree, tables.TMB_TAG, tables.TMB_PATTERN
+            ),
+        )
+        counts["tables"] = len(qc_record["tables"])
+
+    return inputs["supplementary_html"]["images"], qc_record
+
+
+def process_variants(name: str, function, *args):
+    """Process the parsed variants of a case with one of the functions of
+    excel_parsing, recording the rows of the result in a span
+
+    Parameters
+    ----------
+    name : str
+        Name of the span
+    function : callable
+        Function of excel_parsing processing the variants
+    args : list
+        Arguments of the function
+
+    Returns
+    -------
+    Result of the function, a dataframe or a tuple starting with one
+    """
+
+    from utils import perf
+
+    with perf.span(name) as counts:
+        result = function(*args)
+        counts["rows"] = get_row_count(
+            result[0] if isinstance(result, tuple) else result
+        )
+
+    return result
 
 
 if __name__ == "__main__":
@@ -225,13 +1215,13 @@ if __name__ == "__main__":
     parser.add_argument(
         "-hs",
         "--hotspots",
-        required=True,
+        required=False,
         help="CSV file containing information about the cancer hotspots",
     )
     parser.add_argument(
         "-r",
         "--reference_gene_groups",
-        required=True,
+        required=False,
         help=(
             "Excel file obtained from the Solid cancer team with reference "
             "information for COSMIC, and several type of cancer"
@@ -240,7 +1230,7 @@ if __name__ == "__main__":
     parser.add_argument(
         "-p",
         "--panelapp",
-        required=True,
+        required=False,
         help=(
             "Excel file obtained from the Solid cancer team with reference "
             "information for Panelapp"
@@ -249,41 +1239,236 @@ if __name__ == "__main__":
     parser.add_argument(
         "-cb",
         "--cytological_bands",
-        required=True,
+        required=False,
         help=(
             "Excel file obtained from the Solid cancer team with reference "
             "information for cytological bands"
         ),
     )
     parser.add_argument(
-        "-c", "--clinvar", required=True, help="Clinvar asset VCF file"
+        "-c", "--clinvar", required=False, help="Clinvar asset VCF file"
     )
     parser.add_argument(
         "-i",
         "--clinvar_index",
-        required=True,
+        required=False,
         help="Clinvar asset VCF index file",
     )
     parser.add_argument(
         "-html",
         "--supplementary_html",
-        required=True,
-        help="HTML file from GEL",
+        required=False,
+        help="HTML file from GEL, required if --batch is not used",
     )
     parser.add_argument(
         "-rv",
         "--reported_variants",
-        required=True,
-        help="CSV/excel file from GEL containing info on reported variants",
+        required=False,
+        help=(
+            "CSV/excel file from GEL containing info on reported variants, "
+            "required if --batch is not used"
+        ),
     )
     parser.add_argument(
         "-rsv",
         "--reported_structural_variants",
-        required=True,
+        required=False,
         help=(
             "CSV/excel file from GEL containing info on reported structural "
-            "variants"
+            "variants, required if --batch is not used"
+        ),
+    )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        required=False,
+        help=(
+            "TSV manifest with the supplementary_html, reported_variants and "
+            "reported_structural_variants columns, one row per case. The "
+            "references are loaded once and a workbook is written for "
+            "every case"
+        ),
+    )
+    parser.add_argument(
+        "-t",
+        "--template",
+        required=False,
+        help=(
+            "Template workbook containing the static formatting of the "
+            "sheets. Built at that path if it doesn't exist or if it was "
+            "built with a different version of the configs"
+        ),
+    )
+    parser.add_argument(
+        "-w",
+        "--sheet_workers",
+        type=int,
+        default=1,
+        help=(
+            "Number of processes used to write and render the sheets with "
+            "variant data in parallel"
+        ),
+    )
+    parser.add_argument(
+        "-sw",
+        "--stage_workers",
+        type=int,
+        default=1,
+        help=(
+            "Number of processes used to parse and process the inputs of a "
+            "case in parallel, every stage starting once the stages it "
+            "depends on are done. The stages run in a single process with "
+            "--profile cpu"
+        ),
+    )
+    parser.add_argument(
+        "--stage_cache",
+        required=False,
+        metavar="FOLDER",
+        help=(
+            "Cache the outputs of the parsing and processing stages in this "
+            "folder, keyed on the content of the input files, the configs "
+            "used by the stages and the version of the code, so that a case "
+            "run again i.e. after a change of the formatting of the sheets "
+            "is only written again"
+        ),
+    )
+    parser.add_argument(
+        "--stage_cache_size",
+        type=int,
+        default=2048,
+        help=(
+            "Maximum size of the stage cache in MB, the least recently used "
+            "outputs being removed above it"
+        ),
+    )
+    parser.add_argument(
+        "-cl",
+        "--compression_level",
+        type=int,
+        choices=range(10),
+        default=6,
+        help=(
+            "Deflate level of the XML parts of the workbook, 0 to store them "
+            "uncompressed"
+        ),
+    )
+    parser.add_argument(
+        "--deflate_media",
+        action="store_true",
+        default=False,
+        help=(
+            "Deflate the images of the workbook as well, they are stored as "
+            "is by default as they are already compressed"
+        ),
+    )
+    parser.add_argument(
+        "-z",
+        "--zlib_implementation",
+        choices=ZLIB_IMPLEMENTATIONS,
+        default="zlib",
+        help="zlib compatible implementation used to deflate the parts",
+    )
+    parser.add_argument(
+        "-dpi",
+        "--image_dpi_factor",
+        type=float,
+        required=False,
+        help=(
+            "Downscale the figures to the largest size they are displayed "
+            "at, multiplied by this factor i.e. 2 for a figure with twice "
+            "as many pixels as its display size. Figures are embedded at "
+            "full resolution if not given"
+        ),
+    )
+    parser.add_argument(
+        "--compression_report",
+        action="store_true",
+        default=False,
+        help=(
+            "Print the size and saving time of the workbook for a range of "
+            "compression policies"
+        ),
+    )
+    parser.add_argument(
+        "-cw",
+        "--case_workers",
+        type=int,
+        default=1,
+        help=(
+            "Number of processes writing the cases of the batch in "
+            "parallel, limited by the number of CPUs and the available "
+            "memory"
+        ),
+    )
+
+    parser.add_argument(
+        "--serve",
+        required=False,
+        metavar="SOCKET",
+        help=(
+            "Keep the references loaded and write the workbook of the cases "
+            "requested on this Unix socket instead of the cases given in the "
+            "arguments"
         ),
     )
 
-    main(**vars(parser.parse_args()))
+    parser.add_argument(
+        "--workbook_report",
+        action="store_true",
+        default=False,
+        help=(
+            "Read the saved workbook back and print what every sheet costs: "
+            "cells, distinct styles, data validations, conditional "
+            "formatting rules, merged ranges, XML part size and drawing and "
+            "image sizes. The report is also added to the performance "
+            "report"
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["cpu", "mem"],
+        required=False,
+        help=(
+            "Profile every case. cpu runs the case in cProfile and writes "
+            "<sample>.pstats and <sample>.collapsed (collapsed stacks for "
+            "flame graphs) next to the workbook, mem traces the memory "
+            "allocations with tracemalloc and adds the top allocation "
+            "sites at the end of every stage to the performance report. "
+            "The stages of -sw run in a single process in cpu mode, the "
+            "sheets rendered in worker processes are only profiled in mem "
+            "mode, use -w 1 for a complete cpu profile"
+        ),
+    )
+    parser.add_argument(
+        "--startup_profile",
+        action="store_true",
+        default=False,
+        help=(
+            "Print the time spent importing modules at startup and in the "
+            "stages, measured with python -X importtime, and exit"
+        ),
+    )
+
+    args = parser.parse_args()
+
+    if not args.startup_profile and not all(
+        vars(args)[name] for name in REFERENCE_INPUTS
+    ):
+        parser.error(
+            "the following arguments are required without --startup_profile: "
+            + ", ".join(f"--{name}" for name in REFERENCE_INPUTS)
+        )
+
+    if (
+        not args.batch
+        and not args.serve
+        and not args.startup_profile
+        and not all(vars(args)[name] for name in CASE_INPUTS)
+    ):
+        parser.error(
+            "the following arguments are required without --batch or "
+            "--serve: " + ", ".join(f"--{name}" for name in CASE_INPUTS)
+        )
+
+    main(**vars(args))
@@ -14,8 +14,13 @@ main() {
         -i in/clinvar_index/* \
         -html in/supplementary_html/* \
         -rv in/reported_variants/* \
-        -rsv in/reported_structural_variants/*
+        -rsv in/reported_structural_variants/* \
+        -w ${sheet_workers} \
+        -sw ${stage_workers}
 
-    file_id=$(dx upload "output/$(ls output/)" --brief)
+    file_id=$(dx upload output/*.xlsx --brief)
     dx-jobutil-add-output workbook $file_id
+
+    perf_report_id=$(dx upload output/*.perf.json --brief)
+    dx-jobutil-add-output perf_report $perf_report_id
 }
@@ -0,0 +1,187 @@
+import pandas as pd
+import pytest
+
+from benchmarks import (
+    clinvar_lookup,
+    run_benchmarks,
+    synthetic_case,
+    writer_primitives,
+)
+
+TINY_SCALE = {
+    "genes": 50,
+    "somatic": 10,
+    "germline": 2,
+    "structural_variants": 12,
+    "fusion_partners": 3,
+    "figures": 11,
+    "clinvar_records": 100,
+}
+
+
+class TestGenerateCase:
+    def test_variant_counts(self, tmp_path):
+        case = synthetic_case.generate_case(tmp_path, "case", **TINY_SCALE)
+
+        test_output = pd.read_csv(case["reported_variants"])
+
+        assert test_output["Origin"].value_counts().to_dict() == {
+            "somatic": 10,
+            "germline": 2,
+        }
+
+    def test_fusion_partners(self, tmp_path):
+        case = synthetic_case.generate_case(tmp_path, "case", **TINY_SCALE)
+
+        test_output = pd.read_csv(case["reported_structural_variants"])
+        fusions = test_output[test_output["Type"].str.contains("BND")]
+
+        assert set(fusions["Gene"].str.count(";") + 1) == {2, 3}
+
+    def test_figure_count(self, tmp_path):
+        case = synthetic_case.generate_case(
+            tmp_path, "case", **{**TINY_SCALE, "figures": 12}
+        )
+
+        with open(case["supplementary_html"]) as f:
+            assert f.read().count("<img") == 12
+
+    def test_too_few_figures(self, tmp_path):
+        with pytest.raises(AssertionError):
+            synthetic_case.generate_case(
+                tmp_path, "case", **{**TINY_SCALE, "figures": 10}
+            )
+
+
+class TestRunCase:
+    def test_stages_timed(self, tmp_path):
+        references = synthetic_case.generate_references(
+            tmp_path / "references", genes=50, clinvar_records=100
+        )
+        case = synthetic_case.generate_case(
+            tmp_path / "case", "tiny", **TINY_SCALE
+        )
+
+        test_output, peak_rss = run_benchmarks.run_case(
+            references, case, "tiny", tmp_path / "run", []
+        )
+
+        assert {
+            "main",
+            "parse clinvar",
+            "process_fusion_SV",
+            "save_workbook",
+        } <= test_output.keys()
+        assert peak_rss > 0
+
+
+class TestGetStageTimes:
+    def test_deep_spans_excluded_and_names_added(self):
+        report = {
+            "references": [
+                {"name": "parse clinvar", "depth": 0, "wall_time": 1.0},
+                {"name": "nested", "depth": 1, "wall_time": 1.0},
+            ],
+            "spans": [
+                {"name": "write_case_workbook", "depth": 0, "wall_time": 3.0},
+                {"name": "stage", "depth": 1, "wall_time": 1.0},
+                {"name": "write_sheet SNV", "depth": 2, "wall_time": 0.5},
+                {"name": "stage", "depth": 1, "wall_time": 0.5},
+            ],
+        }
+
+        test_output = run_benchmarks.get_stage_times(report)
+
+        assert test_output == {
+            "parse clinvar": 1.0,
+            "write_case_workbook": 3.0,
+            "stage": 1.5,
+        }
+
+
+def get_results(parameters: dict, **stages) -> dict:
+    return {"scales": {"small": {"parameters": parameters, "stages": stages}}}
+
+
+class TestGetRegressions:
+    def test_slower_stage_reported(self):
+        test_output = run_benchmarks.get_regressions(
+            get_results({}, parse=2.0, save=1.0),
+            get_results({}, parse=1.0, save=1.0),
+        )
+
+        assert test_output == [("small", "parse", 1.0, 2.0)]
+
+    def test_noise_of_short_stage_ignored(self):
+        test_output = run_benchmarks.get_regressions(
+            get_results({}, parse=0.02), get_results({}, parse=0.01)
+        )
+
+        assert test_output == []
+
+    def test_other_parameters_not_compared(self):
+        test_output = run_benchmarks.get_regressions(
+            get_results({"genes": 2}, parse=2.0),
+            get_results({"genes": 1}, parse=1.0),
+        )
+
+        assert test_output == []
+
+
+@pytest.fixture()
+def synthetic_clinvar(tmp_path):
+    clinvar = tmp_path / "clinvar.vcf.gz"
+    synthetic_case.write_clinvar_vcf(clinvar, 100)
+    clinvar_lookup.build_id_index(str(clinvar))
+
+    return str(clinvar)
+
+
+class TestLookupStrategies:
+    @pytest.mark.parametrize("strategy", clinvar_lookup.STRATEGIES)
+    def test_significance_found(self, synthetic_clinvar, strategy):
+        variants = [
+            (
+                str(clinvar_id),
+                *synthetic_case.get_clinvar_position(clinvar_id, 100),
+            )
+            for clinvar_id in [4, 99]
+        ]
+
+        test_output = clinvar_lookup.STRATEGIES[strategy](
+            synthetic_clinvar, variants
+        )
+
+        assert test_output == {"4": "Likely_pathogenic", "99": "Pathogenic"}
+
+
+class TestGetInfoSignificance:
+    def test_clnsigconf_preferred(self):
+        test_output = clinvar_lookup.get_info_significance(
+            "CLNSIG=Conflicting;CLNSIGCONF=Benign(1)"
+        )
+
+        assert test_output == "Benign(1)"
+
+    def test_no_significance(self):
+        assert clinvar_lookup.get_info_significance("ALLELEID=1;DB") == ""
+
+
+class TestTimePrimitive:
+    def test_steps_timed(self, tmp_path):
+        test_output, cells = writer_primitives.time_primitive(
+            {"sheet_name": "SOC"}, "write_cell_content", tmp_path, 1
+        )
+
+        assert list(test_output) == ["build", "save", "load_read_only"]
+        assert cells > 0
+
+    def test_only_primitive_applied(self, tmp_path):
+        _, bold_cells = writer_primitives.time_primitive(
+            {"sheet_name": "SOC"}, "bold_cells", tmp_path, 1
+        )
+        _, all_cells = writer_primitives.time_primitive(
+            {"sheet_name": "SOC"}, "apply_config", tmp_path, 1
+        )
+
+        assert 0 < bold_cells < all_cells
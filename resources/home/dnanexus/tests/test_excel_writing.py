@@ -0,0 +1,197 @@
+from io import BytesIO
+import zipfile
+
+import openpyxl
+from PIL import Image
+
+from utils import excel_writing
+
+
+class TestCompressionPolicyZipFile:
+    def test_media_stored(self):
+        with excel_writing.CompressionPolicyZipFile(
+            BytesIO(), excel_writing.DEFAULT_COMPRESSION_POLICY
+        ) as archive:
+            test_output = archive.get_compression("xl/media/image1.jpeg")
+
+        assert test_output == (zipfile.ZIP_STORED, None)
+
+    def test_media_deflated(self):
+        policy = {
+            **excel_writing.DEFAULT_COMPRESSION_POLICY,
+            "store_media": False,
+        }
+
+        with excel_writing.CompressionPolicyZipFile(
+            BytesIO(), policy
+        ) as archive:
+            test_output = archive.get_compression("xl/media/image1.png")
+
+        assert test_output == (zipfile.ZIP_DEFLATED, 6)
+
+    def test_xml_level(self):
+        policy = {**excel_writing.DEFAULT_COMPRESSION_POLICY, "xml_level": 1}
+
+        with excel_writing.CompressionPolicyZipFile(
+            BytesIO(), policy
+        ) as archive:
+            test_output = archive.get_compression("xl/worksheets/sheet1.xml")
+
+        assert test_output == (zipfile.ZIP_DEFLATED, 1)
+
+    def test_xml_level_0_stored(self):
+        policy = {**excel_writing.DEFAULT_COMPRESSION_POLICY, "xml_level": 0}
+
+        with excel_writing.CompressionPolicyZipFile(
+            BytesIO(), policy
+        ) as archive:
+            test_output = archive.get_compression("xl/worksheets/sheet1.xml")
+
+        assert test_output == (zipfile.ZIP_STORED, None)
+
+
+class TestSaveWorkbook:
+    def test_workbook_readable(self):
+        workbook = openpyxl.Workbook()
+        workbook.active["A1"] = "value"
+        output = BytesIO()
+
+        excel_writing.save_workbook(workbook, output)
+
+        assert openpyxl.load_workbook(output).active["A1"].value == "value"
+
+    def test_compression_report(self):
+        workbook = openpyxl.Workbook()
+
+        test_output = excel_writing.get_compression_report(
+            workbook, xml_levels=(1, 9)
+        )
+
+        assert {"store_media", "xml_level", "size", "time"}.issubset(
+            test_output.columns
+        )
+        assert set(test_output["xml_level"]) == {1, 9}
+
+    def test_shared_image_single_media_part(self):
+        image = BytesIO()
+        Image.new("RGB", (10, 10)).save(image, format="PNG")
+        workbook = openpyxl.Workbook()
+
+        for sheet_name in ["Sheet2", "Sheet3"]:
+            excel_writing.insert_images(
+                workbook.create_sheet(sheet_name),
+                [{"img_index": 0, "size": (10, 10), "cell": "A1"}],
+                [image],
+            )
+
+        output = BytesIO()
+        excel_writing.save_workbook(workbook, output)
+
+        with zipfile.ZipFile(output) as archive:
+            media_parts = [
+                name for name in archive.namelist() if "media" in name
+            ]
+
+            assert media_parts == ["xl/media/image1.png"]
+            assert archive.read(media_parts[0]) == image.getvalue()
+
+        assert all(
+            len(sheet._images) == 1
+            for sheet in openpyxl.load_workbook(output).worksheets[1:]
+        )
+
+
+class TestGetWorkbookCostReport:
+    def test_sheet_costs(self):
+        image = BytesIO()
+        Image.new("RGB", (10, 10)).save(image, format="PNG")
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = "Data"
+        sheet["A1"] = "value"
+        sheet["A2"] = "value"
+        sheet["A2"].font = openpyxl.styles.Font(bold=True)
+        sheet.merge_cells("B1:C1")
+        excel_writing.generate_dropdowns(
+            sheet,
+            [{"cells": {("D1", "D2"): '"a,b"'}, "title": "Dropdown"}],
+        )
+        excel_writing.add_databar_rule(sheet, "A1:A2")
+        excel_writing.insert_images(
+            workbook.create_sheet("Images"),
+            [{"img_index": 0, "size": (10, 10), "cell": "A1"}],
+            [image],
+        )
+        output = BytesIO()
+        excel_writing.save_workbook(workbook, output)
+
+        test_output = excel_writing.get_workbook_cost_report(output).set_index(
+            "sheet"
+        )
+
+        assert list(test_output.index) == ["Data", "Images"]
+        assert test_output.loc["Data", "cells"] == 2
+        assert test_output.loc["Data", "styles"] == 2
+        assert test_output.loc["Data", "merged_ranges"] == 1
+        assert test_output.loc["Data", "data_validations"] == 1
+        assert test_output.loc["Data", "conditional_formats"] == 1
+        assert test_output.loc["Data", "media_size"] == 0
+        assert test_output.loc["Images", "drawing_size"] > 0
+        assert test_output.loc["Images", "media_size"] == len(image.getvalue())
+        assert (
+            test_output["xml_compressed_size"] <= test_output["xml_size"]
+        ).all()
+
+
+class TestTemplate:
+    def test_up_to_date_after_build(self, tmp_path):
+        template = tmp_path / "template.xlsx"
+
+        excel_writing.build_template(template, ["SOC", "QC"])
+
+        assert excel_writing.is_template_up_to_date(template, ["SOC", "QC"])
+        # only the template is left in the folder
+        assert list(tmp_path.iterdir()) == [template]
+
+    def test_missing_template(self, tmp_path):
+        assert not excel_writing.is_template_up_to_date(
+            tmp_path / "template.xlsx", ["SOC"]
+        )
+
+    def test_other_sheets_not_up_to_date(self, tmp_path):
+        template = tmp_path / "template.xlsx"
+
+        excel_writing.build_template(template, ["SOC", "QC"])
+
+        assert not excel_writing.is_template_up_to_date(template, ["SOC"])
+
+    def test_outdated_openpyxl(self, tmp_path, monkeypatch):
+        template = tmp_path / "template.xlsx"
+        excel_writing.build_template(template, ["SOC"])
+
+        monkeypatch.setattr(openpyxl, "__version__", "0.0.0")
+
+        assert not excel_writing.is_template_up_to_date(template, ["SOC"])
+
+    def test_outdated_config_helpers(self, tmp_path, monkeypatch):
+        template = tmp_path / "template.xlsx"
+        excel_writing.build_template(template, ["SOC"])
+        getsource = excel_writing.inspect.getsource
+
+        # source of misc edited since the template was built
+        monkeypatch.setattr(
+            excel_writing.inspect,
+            "getsource",
+            lambda module: getsource(module)
+            + ("# edited" if module is excel_writing.misc else ""),
+        )
+
+        assert not excel_writing.is_template_up_to_date(template, ["SOC"])
+
+    def test_template_replaced(self, tmp_path):
+        template = tmp_path / "template.xlsx"
+        excel_writing.build_template(template, ["SOC"])
+
+        excel_writing.build_template(template, ["SOC", "QC"])
+
+        assert openpyxl.load_workbook(template).sheetnames == ["SOC", "QC"]
@@ -0,0 +1,577 @@
+from copy import copy
+import hashlib
+import json
+import os
+from pathlib import Path
+import socket
+import subprocess
+import sys
+import threading
+import zipfile
+
+import lxml.etree
+import openpyxl
+from openpyxl.worksheet.cell_range import MultiCellRange
+import pandas as pd
+import pytest
+
+from benchmarks import synthetic_case
+import generate_workbook
+from utils import excel_parsing, excel_writing
+
+SYNTHETIC_SCALE = {
+    "genes": 50,
+    "somatic": 10,
+    "germline": 2,
+    "structural_variants": 12,
+    "fusion_partners": 3,
+    "figures": 11,
+    "clinvar_records": 100,
+}
+
+
+def write_fake_workbook(references, case, **kwargs):
+    if case["supplementary_html"] == "error.html":
+        raise ValueError("invalid case")
+
+    if case["supplementary_html"] == "crash.html":
+        # simulate a worker killed by the OS
+        os._exit(1)
+
+    references["written"].append(case["supplementary_html"])
+
+
+@pytest.fixture()
+def fake_writer(monkeypatch):
+    monkeypatch.setattr(
+        generate_workbook, "write_case_workbook", write_fake_workbook
+    )
+
+
+@pytest.fixture()
+def uncapped_workers(monkeypatch):
+    # the number of workers isn't limited by the CPUs of the test machine
+    monkeypatch.setattr(
+        generate_workbook, "get_case_workers", lambda workers: workers
+    )
+
+
+def get_cases(*htmls):
+    return [{"supplementary_html": html} for html in htmls]
+
+
+class TestWriteCaseWorkbooks:
+    def test_serial_failure_isolated(self, fake_writer):
+        references = {"written": []}
+
+        test_output = generate_workbook.write_case_workbooks(
+            references, get_cases("a.html", "error.html", "b.html")
+        )
+
+        assert list(test_output) == ["error.html"]
+        assert references["written"] == ["a.html", "b.html"]
+
+    def test_parallel_failure_isolated(self, fake_writer, uncapped_workers):
+        test_output = generate_workbook.write_case_workbooks(
+            {"written": []}, get_cases("a.html", "error.html", "b.html"), 2
+        )
+
+        assert list(test_output) == ["error.html"]
+        assert "invalid case" in test_output["error.html"]
+
+    def test_dead_worker_isolated(self, fake_writer, uncapped_workers):
+        test_output = generate_workbook.write_case_workbooks(
+            {"written": []}, get_cases("crash.html"), 2
+        )
+
+        assert list(test_output) == ["crash.html"]
+
+
+class TestGetCaseWorkers:
+    def test_limited_by_memory(self, monkeypatch):
+        monkeypatch.setattr(
+            "psutil.virtual_memory",
+            lambda: type("Memory", (), {"available": 0})(),
+        )
+
+        assert generate_workbook.get_case_workers(8) == 1
+
+    def test_limited_by_cpus(self, monkeypatch):
+        monkeypatch.setattr(generate_workbook.os, "cpu_count", lambda: 2)
+
+        assert generate_workbook.get_case_workers(8) <= 2
+
+
+@pytest.fixture()
+def case_server(tmp_path, monkeypatch):
+    references = {"hotspots": tmp_path / "hotspots.xlsx"}
+    kwargs = {
+        name: str(references["hotspots"])
+        for name in generate_workbook.REFERENCE_INPUTS
+    }
+    references["hotspots"].write_text("v1")
+    loads = []
+
+    def load_fake_references(**kwargs):
+        loads.append(open(kwargs["hotspots"]).read())
+        return {"written": []}
+
+    def write_fake_case(references, case, **kwargs):
+        write_fake_workbook(references, case, **kwargs)
+        return f"output/{case['supplementary_html']}.xlsx"
+
+    monkeypatch.setattr(
+        generate_workbook, "load_references", load_fake_references
+    )
+    monkeypatch.setattr(
+        generate_workbook, "write_case_workbook", write_fake_case
+    )
+
+    server = generate_workbook.CaseServer(
+        str(tmp_path / "server.sock"), kwargs
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server, references["hotspots"], loads
+
+    server.shutdown()
+    server.server_close()
+
+
+def send_case_request(server, html: str) -> dict:
+    case = {name: html for name in generate_workbook.CASE_INPUTS}
+
+    with socket.socket(socket.AF_UNIX) as client:
+        client.connect(server.server_address)
+        client.sendall(json.dumps(case).encode() + b"\n")
+
+        return json.loads(client.makefile().readline())
+
+
+class TestCaseServer:
+    def test_workbook_path_returned(self, case_server):
+        server, _, loads = case_server
+
+        test_output = [send_case_request(server, "a") for _ in range(2)]
+
+        assert (
+            test_output == [{"workbook": os.path.abspath("output/a.xlsx")}] * 2
+        )
+        assert loads == ["v1"]
+
+    def test_error_returned(self, case_server):
+        server, _, _ = case_server
+
+        test_output = send_case_request(server, "error.html")
+
+        assert "invalid case" in test_output["error"]
+
+    def test_references_reloaded_on_change(self, case_server):
+        server, hotspots, loads = case_server
+        send_case_request(server, "a")
+
+        hotspots.write_text("v2")
+        send_case_request(server, "a")
+
+        assert loads == ["v1", "v2"]
+
+    def test_references_kept_if_content_unchanged(self, case_server):
+        server, hotspots, loads = case_server
+        send_case_request(server, "a")
+
+        os.utime(hotspots, ns=(0, 0))
+        send_case_request(server, "a")
+
+        assert loads == ["v1"]
+
+    def test_socket_removed_on_close(self, tmp_path):
+        server = generate_workbook.CaseServer(
+            str(tmp_path / "server.sock"), {}
+        )
+        server.server_close()
+
+        assert not (tmp_path / "server.sock").exists()
+
+
+class TestLazyImports:
+    def test_heavy_modules_not_imported_at_startup(self):
+        # new interpreter as the tests already imported the modules
+        process = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, generate_workbook; "
+                "print(*generate_workbook.LAZY_MODULES & sys.modules.keys())",
+            ],
+            cwd=Path(generate_workbook.__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        assert process.stdout.strip() == ""
+
+
+def run_script(*args) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, generate_workbook.__file__, *args],
+        cwd=Path(generate_workbook.__file__).parent,
+        capture_output=True,
+        text=True,
+    )
+
+
+class TestArguments:
+    def test_startup_profile_without_references(self):
+        process = run_script("--startup_profile")
+
+        assert process.returncode == 0, process.stderr
+        assert "Imports at startup if not deferred" in process.stdout
+
+    def test_references_required(self):
+        process = run_script("--batch", "manifest.tsv")
+
+        assert process.returncode == 2
+        assert "required without --startup_profile" in process.stderr
+
+
+@pytest.fixture(scope="module")
+def synthetic_files(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("synthetic")
+    reference_files = synthetic_case.generate_references(
+        folder / "references",
+        genes=SYNTHETIC_SCALE["genes"],
+        clinvar_records=SYNTHETIC_SCALE["clinvar_records"],
+    )
+    case = synthetic_case.generate_case(
+        folder / "case", "case", **SYNTHETIC_SCALE
+    )
+
+    return reference_files, case
+
+
+@pytest.fixture(scope="module")
+def synthetic_inputs(synthetic_files):
+    reference_files, case = synthetic_files
+
+    return generate_workbook.load_references(**reference_files), case
+
+
+def write_synthetic_workbook(
+    synthetic_inputs, folder: Path, monkeypatch, **kwargs
+) -> Path:
+    references, case = synthetic_inputs
+    folder.mkdir(exist_ok=True)
+    # the workbook is written in the output folder of the working directory
+    monkeypatch.chdir(folder)
+
+    return folder / generate_workbook.write_case_workbook(
+        references, case, **kwargs
+    )
+
+
+def get_cells(ranges) -> set:
+    return {
+        (row, column)
+        for cell_range in MultiCellRange(str(ranges)).ranges
+        for row, column in cell_range.cells
+    }
+
+
+def get_cell_style(cell) -> str:
+    return repr(
+        (
+            cell.font,
+            cell.fill,
+            cell.border,
+            cell.alignment,
+            cell.number_format,
+            cell.protection,
+        )
+    )
+
+
+def get_defined_names(path: Path) -> list:
+    # openpyxl drops the names of the filters when loading the workbook
+    with zipfile.ZipFile(path) as archive:
+        workbook_xml = lxml.etree.fromstring(archive.read("xl/workbook.xml"))
+
+    return sorted(
+        (
+            defined_name.get("name"),
+            defined_name.get("localSheetId"),
+            defined_name.text,
+        )
+        for defined_name in workbook_xml.iter("{*}definedName")
+    )
+
+
+def get_workbook_content(path: Path) -> dict:
+    workbook = openpyxl.load_workbook(path)
+    default_style = get_cell_style(openpyxl.Workbook().active["A1"])
+    content = {
+        "sheets": workbook.sheetnames,
+        "defined_names": get_defined_names(path),
+        "custom_doc_props": workbook.custom_doc_props.names,
+    }
+    # the style ids differ between workbooks, the styles they resolve to are
+    # compared
+    styles = {}
+
+    for sheet in workbook.worksheets:
+        cells = {}
+
+        for row in sheet.iter_rows():
+            for cell in row:
+                if cell.style_id not in styles:
+                    styles[cell.style_id] = get_cell_style(cell)
+
+                style = styles[cell.style_id]
+
+                if cell.value is not None or style != default_style:
+                    cells[cell.coordinate] = (cell.value, style)
+
+        if sheet.title == "Bioinformatics":
+            # date of the run
+            cells.pop("C2", None)
+
+        data_validations = {}
+
+        # the ranges of a validation may be split differently
+        for validation in sheet.data_validations.dataValidation:
+            data_validations.setdefault(
+                (
+                    validation.type,
+                    validation.formula1,
+                    validation.promptTitle,
+                    validation.prompt,
+                ),
+                set(),
+            ).update(get_cells(validation.sqref))
+
+        content[sheet.title] = {
+            "cells": cells,
+            "data_validations": data_validations,
+            "conditional_formatting": sorted(
+                (str(rules.sqref), rule.type)
+                for rules in sheet.conditional_formatting
+                for rule in rules.rules
+            ),
+            "merged_cells": sorted(
+                str(cell_range) for cell_range in sheet.merged_cells.ranges
+            ),
+            "column_widths": {
+                column: dimension.width
+                for column, dimension in sheet.column_dimensions.items()
+                if dimension.width
+            },
+            "row_heights": {
+                row: dimension.height
+                for row, dimension in sheet.row_dimensions.items()
+                if dimension.height
+            },
+            "freeze_panes": sheet.freeze_panes,
+            "auto_filter": sheet.auto_filter.ref,
+            "images": [
+                (
+                    image.anchor._from.row,
+                    image.anchor._from.col,
+                    image.width,
+                    image.height,
+                    hashlib.sha256(image._data()).hexdigest(),
+                )
+                for image in sheet._images
+            ],
+        }
+
+    return content
+
+
+class TestLoadReferences:
+    def test_only_clinvar_of_cases_kept(self, synthetic_files):
+        reference_files, case = synthetic_files
+        clinvar_ids = excel_parsing.get_germline_clinvar_ids(
+            excel_parsing.open_file(case["reported_variants"], "csv")
+        )
+
+        test_output = generate_workbook.load_references(
+            [case], **reference_files
+        )
+
+        assert clinvar_ids
+        assert set(test_output["clinvar"]) == clinvar_ids
+
+    def test_same_germline_variants(self, synthetic_files, synthetic_inputs):
+        reference_files, case = synthetic_files
+        references, _ = synthetic_inputs
+        reported_variants = excel_parsing.open_file(
+            case["reported_variants"], "csv"
+        )
+        case_references = generate_workbook.load_references(
+            [case], **reference_files
+        )
+
+        test_output = excel_parsing.process_reported_variants_germline(
+            reported_variants.copy(),
+            case_references["clinvar"],
+            case_references["panelapp"],
+        )
+        expected_output = excel_parsing.process_reported_variants_germline(
+            reported_variants.copy(),
+            references["clinvar"],
+            references["panelapp"],
+        )
+
+        assert test_output.equals(expected_output)
+
+
+class TestTemplateWorkbook:
+    def test_same_workbook_as_without_template(
+        self, synthetic_inputs, tmp_path, monkeypatch
+    ):
+        expected_output = write_synthetic_workbook(
+            synthetic_inputs, tmp_path / "no_template", monkeypatch
+        )
+        generate_workbook.prepare_template(str(tmp_path / "template.xlsx"))
+
+        test_output = write_synthetic_workbook(
+            synthetic_inputs,
+            tmp_path / "template",
+            monkeypatch,
+            template=str(tmp_path / "template.xlsx"),
+        )
+
+        assert get_workbook_content(test_output) == get_workbook_content(
+            expected_output
+        )
+
+    def test_outdated_template_rebuilt(self, tmp_path, monkeypatch):
+        template = str(tmp_path / "template.xlsx")
+        # template built by an older version of the configs
+        monkeypatch.setattr(
+            excel_writing,
+            "get_template_fingerprint",
+            lambda sheet_names: "outdated",
+        )
+        generate_workbook.prepare_template(template)
+        monkeypatch.undo()
+
+        assert not excel_writing.is_template_up_to_date(
+            template, generate_workbook.SHEET_NAMES
+        )
+
+        generate_workbook.prepare_template(template)
+
+        assert excel_writing.is_template_up_to_date(
+            template, generate_workbook.SHEET_NAMES
+        )
+
+    def test_sheets_of_the_cases_in_template(
+        self, synthetic_inputs, monkeypatch
+    ):
+        references, case = synthetic_inputs
+        # the figures are downloaded in the working directory
+        monkeypatch.chdir(Path(case["supplementary_html"]).parent)
+
+        sheets, _ = generate_workbook.prepare_case_sheets(references, case)
+
+        assert [
+            sheet_data["sheet_name"] for sheet_data in sheets
+        ] == generate_workbook.SHEET_NAMES
+
+    def test_template_built_before_forking(
+        self, synthetic_files, tmp_path, monkeypatch, uncapped_workers
+    ):
+        reference_files, case = synthetic_files
+        pd.DataFrame([case, case]).to_csv(
+            tmp_path / "manifest.tsv", sep="\t", index=False
+        )
+        build_template = excel_writing.build_template
+        build_pids = tmp_path / "build_pids.txt"
+
+        def record_build(*args):
+            # written to a file to also record the builds of the workers
+            with open(build_pids, "a") as f:
+                f.write(f"{os.getpid()}\n")
+
+            build_template(*args)
+
+        monkeypatch.setattr(excel_writing, "build_template", record_build)
+        monkeypatch.chdir(tmp_path)
+
+        generate_workbook.main(
+            batch=str(tmp_path / "manifest.tsv"),
+            case_workers=2,
+            template=str(tmp_path / "template.xlsx"),
+            **reference_files,
+        )
+
+        assert build_pids.read_text().split() == [str(os.getpid())]
+
+
+class TestSheetWorkers:
+    def test_same_workbook_as_in_process(
+        self, synthetic_inputs, tmp_path, monkeypatch
+    ):
+        expected_output = write_synthetic_workbook(
+            synthetic_inputs, tmp_path / "in_process", monkeypatch
+        )
+
+        test_output = write_synthetic_workbook(
+            synthetic_inputs,
+            tmp_path / "workers",
+            monkeypatch,
+            sheet_workers=2,
+        )
+
+        test_content = get_workbook_content(test_output)
+        expected_content = get_workbook_content(expected_output)
+
+        # the rendered sheets have filters and defined names to remap
+        assert test_content["SNV"]["auto_filter"]
+        assert test_content["defined_names"]
+        assert any(
+            test_content[sheet_name]["images"]
+            for sheet_name in test_content["sheets"]
+        )
+        assert test_content == expected_content
+
+    def test_same_workbook_with_template(
+        self, synthetic_inputs, tmp_path, monkeypatch
+    ):
+        expected_output = write_synthetic_workbook(
+            synthetic_inputs, tmp_path / "in_process", monkeypatch
+        )
+        generate_workbook.prepare_template(str(tmp_path / "template.xlsx"))
+
+        test_output = write_synthetic_workbook(
+            synthetic_inputs,
+            tmp_path / "workers",
+            monkeypatch,
+            sheet_workers=2,
+            template=str(tmp_path / "template.xlsx"),
+        )
+
+        assert get_workbook_content(test_output) == get_workbook_content(
+            expected_output
+        )
+
+
+class TestProfile:
+    def test_stages_in_cpu_profile(
+        self, synthetic_inputs, tmp_path, monkeypatch
+    ):
+        workbook = write_synthetic_workbook(
+            synthetic_inputs,
+            tmp_path / "profile",
+            monkeypatch,
+            profile="cpu",
+            stage_workers=2,
+        )
+
+        with open(workbook.with_suffix(".collapsed")) as f:
+            stacks = [line.rsplit(" ", 1)[0] for line in f]
+
+        # the stages ran in the profiled process
+        assert any("process_fusion_SV" in stack for stack in stacks)
@@ -0,0 +1,308 @@
+import base64
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+import threading
+
+import lxml.html
+import pandas as pd
+from PIL import Image
+import pytest
+
+from utils import html
+
+
+def get_image_src(size: tuple, format: str = "JPEG") -> str:
+    image = BytesIO()
+    Image.new("RGB", size).save(image, format=format)
+    encoded_image = base64.b64encode(image.getvalue()).decode()
+    return f"data:image/{format.lower()};base64,{encoded_image}"
+
+
+class ImageRequestHandler(BaseHTTPRequestHandler):
+    """Serve PNG images of the size given in the path i.e. /10x20.png, after
+    failing the number of times given in the query i.e. /10x20.png?fail=1
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        self.server.requests.append(path)
+        nb_failures = int(query.split("=")[1]) if query else 0
+
+        if path == "/missing.png":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.server.requests.count(path) <= nb_failures:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        width, height = path[1:].replace(".png", "").split("x")
+        image = BytesIO()
+        Image.new("RGB", (int(width), int(height))).save(image, format="PNG")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(image.getvalue())))
+        self.end_headers()
+        self.wfile.write(image.getvalue())
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def image_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ImageRequestHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def get_image_url(server, path: str) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+@pytest.fixture()
+def html_file(tmp_path):
+    def write_html_file(content: str) -> str:
+        path = tmp_path / "page.html"
+        path.write_text(f"<html><body>{content}</body></html>")
+        return str(path)
+
+    return write_html_file
+
+
+class TestExtractHtml:
+    def test_data_uris_read_in_memory(self, html_file, tmp_path):
+        file = html_file(f'<img src="{get_image_src((10, 10), "PNG")}"/>')
+
+        _, test_output = html.extract_html(file)
+
+        assert len(test_output) == 1
+        assert Image.open(test_output[0]).format == "PNG"
+        assert [path.name for path in tmp_path.iterdir()] == ["page.html"]
+
+    def test_data_uris_over_several_chunks(self, html_file, monkeypatch):
+        monkeypatch.setattr(html, "HTML_CHUNK_SIZE", 1000)
+        # JPEG data URI of ~2800 characters
+        src = get_image_src((300, 300))
+        # figure 2 is cropped, only the first and last images are compared
+        file = html_file(f'<p>text</p>{f"<img src={src!r}/>" * 3}')
+
+        _, test_output = html.extract_html(file)
+
+        assert len(test_output) == 3
+        assert test_output[0].getvalue() == base64.b64decode(src.split(",")[1])
+        assert test_output[2].getvalue() == test_output[0].getvalue()
+
+    def test_figure_2_cropped(self, html_file):
+        file = html_file(
+            f'<img src="{get_image_src((10, 10))}"/>'
+            f'<img src="{get_image_src((2600, 2600))}"/>'
+        )
+
+        _, test_output = html.extract_html(file)
+
+        assert Image.open(test_output[0]).size == (10, 10)
+        assert Image.open(test_output[1]).size == (1800, 1800)
+        assert Image.open(test_output[1]).format == "JPEG"
+
+    def test_tables_and_tags_kept(self, html_file):
+        file = html_file(
+            "<table><tr><th>A</th></tr><tr><td><b>1</b></td></tr></table>"
+            "<p><b>Total per megabase</b> 4.2 "
+            f'<img src="{get_image_src((10, 10))}"/></p>'
+        )
+
+        test_output, _ = html.extract_html(file)
+
+        assert len(html.get_tables(test_output)) == 1
+        assert html.get_tag_sibling(test_output, "b", "megabase") == "4.2"
+        assert list(test_output.iter("img")) == []
+
+    def test_urls_fetched_in_order(self, html_file, image_server):
+        sizes = [(10 + i, 10) for i in range(8)]
+        file = html_file(
+            "".join(
+                f'<img src="{get_image_url(image_server, f"/{w}x{h}.png")}"/>'
+                for w, h in sizes
+            )
+        )
+
+        _, test_output = html.extract_html(file, workers=4)
+
+        # figure 2 is cropped
+        sizes[1] = (1800, 1800)
+
+        assert [Image.open(image).size for image in test_output] == sizes
+        assert len(image_server.requests) == 8
+
+    def test_url_retried(self, html_file, image_server):
+        file = html_file(
+            f'<img src="{get_image_url(image_server, "/10x10.png?fail=2")}"/>'
+        )
+
+        _, test_output = html.extract_html(file)
+
+        assert Image.open(test_output[0]).size == (10, 10)
+        assert image_server.requests == ["/10x10.png"] * 3
+
+    def test_missing_url(self, html_file, image_server):
+        file = html_file(
+            f'<img src="{get_image_url(image_server, "/missing.png")}"/>'
+        )
+
+        with pytest.raises(ValueError, match="HTTP status 404"):
+            html.extract_html(file)
+
+
+class TestStripDataUris:
+    def test_data_src_attribute_kept(self):
+        data_src = get_image_src((10, 10), "PNG")
+        page = (
+            f'<img data-src="{data_src}" src="{get_image_src((20, 20))}"/>'
+        ).encode()
+        data_uris = []
+
+        test_output = b"".join(html.strip_data_uris(BytesIO(page), data_uris))
+
+        assert (
+            test_output
+            == (
+                f'<img data-src="{data_src}" '
+                f'src="{html.DATA_URI_PLACEHOLDER}0"/>'
+            ).encode()
+        )
+        assert [Image.open(image).size for image in data_uris] == [(20, 20)]
+
+    def test_src_at_end_of_chunk(self, monkeypatch):
+        monkeypatch.setattr(html, "HTML_CHUNK_SIZE", 1000)
+        src = get_image_src((10, 10), "PNG")
+        # the space before src is the last character kept from the first
+        # chunk
+        page = (
+            "<img "
+            + "x" * (1000 - html.DATA_URI_MAX_HEADER_SIZE - 6)
+            + f' src="{src}"/>'
+        ).encode()
+        data_uris = []
+
+        b"".join(html.strip_data_uris(BytesIO(page), data_uris))
+
+        assert len(data_uris) == 1
+
+    def test_img_tag_at_end_of_chunk(self, monkeypatch):
+        monkeypatch.setattr(html, "HTML_CHUNK_SIZE", 1000)
+        src = get_image_src((10, 10), "PNG")
+        # the first chunk without the kept end finishes in the tag name, the
+        # src attribute is in the next chunk
+        page = (
+            "x" * (1000 - html.DATA_URI_MAX_HEADER_SIZE - 3)
+            + "<img"
+            + " " * html.DATA_URI_MAX_HEADER_SIZE
+            + f'src="{src}"/>'
+        ).encode()
+        data_uris = []
+
+        test_output = b"".join(html.strip_data_uris(BytesIO(page), data_uris))
+
+        assert len(data_uris) == 1
+        assert test_output.endswith(
+            f'src="{html.DATA_URI_PLACEHOLDER}0"/>'.encode()
+        )
+
+    @pytest.mark.parametrize(
+        "tag",
+        [
+            '<script src="{src}"></script>',
+            '<video><source src="{src}"/></video>',
+            '<iframe src="{src}"></iframe>',
+        ],
+    )
+    def test_data_uri_of_other_tags_kept(self, tag):
+        page = tag.format(src=get_image_src((10, 10), "PNG"))
+        page += f'<img src="{get_image_src((20, 20))}"/>'
+        data_uris = []
+
+        test_output = b"".join(
+            html.strip_data_uris(BytesIO(page.encode()), data_uris)
+        )
+
+        assert test_output.startswith(
+            tag.format(src=get_image_src((10, 10), "PNG")).encode()
+        )
+        assert [Image.open(image).size for image in data_uris] == [(20, 20)]
+
+
+class TestDownscaleImages:
+    def test_downscaled_to_display_size(self):
+        image = BytesIO()
+        Image.new("RGB", (2000, 1000)).save(image, format="JPEG")
+        images = [image]
+
+        html.downscale_images(images, {0: (100, 300)}, 2)
+
+        assert Image.open(images[0]).size == (600, 300)
+        assert Image.open(images[0]).format == "JPEG"
+
+    def test_small_image_kept(self):
+        image = BytesIO()
+        Image.new("RGB", (100, 100)).save(image, format="PNG")
+        images = [image]
+
+        html.downscale_images(images, {0: (100, 100)}, 2)
+
+        assert images[0] is image
+
+
+class TestGetTables:
+    def test_tables_parsed(self):
+        page = lxml.html.document_fromstring(
+            "<table><tr><th>A</th></tr><tr><td>1</td></tr></table>"
+            "<p>text</p>"
+            "<table><tr><th>B</th></tr><tr><td>x</td></tr></table>"
+        )
+
+        test_output = html.get_tables(page)
+
+        assert len(test_output) == 2
+        assert list(test_output[0]["A"]) == [1]
+        assert list(test_output[1]["B"]) == ["x"]
+
+    def test_nested_table_read_once(self):
+        page = lxml.html.document_fromstring(
+            "<table><tr><th>A</th></tr><tr><td>"
+            "<table><tr><th>B</th></tr><tr><td>x</td></tr></table>"
+            "</td></tr></table>"
+        )
+
+        test_output = html.get_tables(page)
+
+        assert len(test_output) == len(
+            pd.read_html(
+                StringIO(lxml.html.tostring(page, encoding="unicode"))
+            )
+        )
+        assert sum("B" in table for table in test_output) == 1
+
+
+class TestGetTagSibling:
+    def test_text_after_tag(self):
+        page = lxml.html.document_fromstring(
+            "<p><b>Other</b> 1</p><p><b>Total per megabase</b> 4.2 </p>"
+        )
+
+        test_output = html.get_tag_sibling(page, "b", "per megabase")
+
+        assert test_output == "4.2"
@@ -16,73 +16,219 @@ class TestSelectConfig:
         assert type(test_output) is ModuleType
 
 
-class TestMergeDicts:
+class TestSheetConfigs:
+    def test_every_sheet_config_importable(self):
+        for sheet_name in misc.SHEET_CONFIGS:
+            assert isinstance(
+                misc.select_config(sheet_name).get_config(), dict
+            )
+
+    def test_config_built_once(self):
+        config = misc.select_config("summary")
+
+        assert config.get_config() is config.get_config()
+
+    def test_case_insensitive(self):
+        assert misc.select_config("SNV") is misc.select_config("snv")
+
+
+class TestParseImportTimes:
+    def test_top_level_modules_kept(self):
+        log = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:        10 |         10 |     numpy.core\n"
+            "import time:        50 |         60 |   numpy\n"
+            "import time:       100 |        160 | pandas\n"
+            "import time:         5 |          5 | json\n"
+        )
+
+        test_output = misc.parse_import_times(log)
+
+        assert test_output == {"pandas": 160, "json": 5}
+
+
+class TestGetFileHash:
+    def test_hash_of_content(self, tmp_path):
+        file = tmp_path / "reference.txt"
+        file.write_text("reference")
+
+        test_output = misc.get_file_hash(file)
+
+        assert test_output == misc.get_file_hash(file)
+        assert len(test_output) == 64
+
+    def test_hash_changes_with_content(self, tmp_path):
+        file = tmp_path / "reference.txt"
+        file.write_text("reference")
+        hash_before = misc.get_file_hash(file)
+
+        file.write_text("new reference")
+
+        assert misc.get_file_hash(file) != hash_before
+
+
+class TestGetImageDisplaySizes:
+    def test_largest_size_per_image(self):
+        test_output = misc.get_image_display_sizes(["Summary", "Plot"])
+
+        assert test_output[2] == (550, 950)
+        assert test_output[1] == (500, 500)
+
+    def test_sheet_without_images(self):
+        assert misc.get_image_display_sizes(["SOC"]) == {}
+
+
+class TestConfigLayers:
     def test_both_dicts_empty(self):
-        test_output = misc.merge_dicts({}, {})
+        test_output = misc.ConfigLayers({}, {})
 
-        assert test_output == {}
+        assert dict(test_output) == {}
+        assert not test_output
 
     def test_one_dict_empty(self):
-        test_output = misc.merge_dicts({"not_empty": "value"}, {})
+        test_output = misc.ConfigLayers({"not_empty": "value"}, {})
 
-        assert test_output == {"not_empty": "value"}
+        assert dict(test_output) == {"not_empty": "value"}
 
     def test_add_new_values_to_common_key(self):
         test_dict1 = {"cells_to_write": {(1, 1): "cell1"}}
         test_dict2 = {"cells_to_write": {(1, 2): "cell2"}}
 
-        test_output = misc.merge_dicts(test_dict1, test_dict2)
+        test_output = misc.ConfigLayers(test_dict1, test_dict2)
 
-        expected_output = {
-            "cells_to_write": {(1, 1): "cell1", (1, 2): "cell2"}
+        assert dict(test_output["cells_to_write"]) == {
+            (1, 1): "cell1",
+            (1, 2): "cell2",
         }
 
-        assert test_output == expected_output
+    def test_iter_items_in_layer_order(self):
+        test_dict1 = {(1, 1): "cell1", (1, 2): "cell2"}
+        test_dict2 = {(1, 2): "new_cell2"}
+
+        test_output = misc.ConfigLayers(test_dict1, test_dict2)
+
+        assert list(test_output.iter_items()) == [
+            ((1, 1), "cell1"),
+            ((1, 2), "cell2"),
+            ((1, 2), "new_cell2"),
+        ]
+        assert test_output[(1, 2)] == "new_cell2"
 
     def test_merge_lists_to_common_key(self):
         test_dict1 = {"to_align": ["cell1", "cell2"]}
         test_dict2 = {"to_align": ["cell3", "cell4"]}
 
-        test_output = misc.merge_dicts(test_dict1, test_dict2)
+        test_output = misc.ConfigLayers(test_dict1, test_dict2)
 
-        expected_output = {"to_align": ["cell1", "cell2", "cell3", "cell4"]}
+        assert list(test_output["to_align"]) == [
+            "cell1",
+            "cell2",
+            "cell3",
+            "cell4",
+        ]
 
-        assert test_output == expected_output
+    def test_layers_are_not_copied(self):
+        test_dict1 = {"to_align": ["cell1", "cell2"]}
+        test_dict2 = {"cells_to_write": {(1, 1): "cell1"}}
+
+        test_output = misc.ConfigLayers(test_dict1, test_dict2)
+
+        assert test_output["to_align"] is test_dict1["to_align"]
+        assert test_output["cells_to_write"] is test_dict2["cells_to_write"]
 
     def test_not_common_keys(self):
         test_dict1 = {"to_align": ["cell1", "cell2"]}
         test_dict2 = {"cells_to_write": {(1, 1): "cell1", (1, 2): "cell2"}}
 
-        test_output = misc.merge_dicts(test_dict1, test_dict2)
+        test_output = misc.ConfigLayers(test_dict1, test_dict2)
 
         expected_output = {
             "to_align": ["cell1", "cell2"],
             "cells_to_write": {(1, 1): "cell1", (1, 2): "cell2"},
         }
 
-        assert test_output == expected_output
+        assert dict(test_output) == expected_output
 
     def test_merge_nested_dicts(self):
         test_dict1 = {"borders": {"single_cells": ["cell1", "cell2"]}}
         test_dict2 = {"borders": {"single_cells": ["cell3", "cell4"]}}
 
-        test_output = misc.merge_dicts(test_dict1, test_dict2)
+        test_output = misc.ConfigLayers(test_dict1, test_dict2)
 
-        expected_output = {
-            "borders": {"single_cells": ["cell1", "cell2", "cell3", "cell4"]}
-        }
-
-        assert test_output == expected_output
+        assert list(test_output["borders"]["single_cells"]) == [
+            "cell1",
+            "cell2",
+            "cell3",
+            "cell4",
+        ]
 
     def test_merge_not_list_or_dict(self):
         test_dict1 = {"freeze_panes": "cell1"}
         test_dict2 = {"freeze_panes": "cell2"}
 
-        test_output = misc.merge_dicts(test_dict1, test_dict2)
+        test_output = misc.ConfigLayers(test_dict1, test_dict2)
 
-        expected_output = {"freeze_panes": "cell2"}
+        assert test_output["freeze_panes"] == "cell2"
 
-        assert test_output == expected_output
+    def test_different_types(self):
+        test_dict1 = {"freeze_panes": "cell1"}
+        test_dict2 = {"freeze_panes": ["cell2"]}
+
+        test_output = misc.ConfigLayers(test_dict1, test_dict2)
+
+        with pytest.raises(AssertionError):
+            test_output["freeze_panes"]
+
+
+class TestSplitStaticConfig:
+    def test_static_config_only(self):
+        test_config = {
+            "cells_to_write": {(1, 1): "cell1", (1, 2): None},
+            "to_bold": ["A1"],
+        }
+
+        static_config, case_config = misc.split_static_config(test_config)
+
+        assert static_config == test_config
+        assert case_config == {}
+
+    def test_html_lookups_are_case_specific(self):
+        test_config = {
+            "cells_to_write": {
+                (1, 1): "cell1",
+                (2, 1): ("table", 0, "column"),
+                (3, 1): [("table", 0, "column", "split")],
+                (4, 1): len,
+            },
+            "to_bold": ["A1"],
+        }
+
+        static_config, case_config = misc.split_static_config(test_config)
+
+        assert static_config == {
+            "cells_to_write": {(1, 1): "cell1"},
+            "to_bold": ["A1"],
+        }
+        assert case_config == {
+            "cells_to_write": {
+                (2, 1): ("table", 0, "column"),
+                (3, 1): [("table", 0, "column", "split")],
+                (4, 1): len,
+            }
+        }
+
+    def test_images_are_case_specific(self):
+        test_config = {
+            "images": [{"cell": "A4", "img_index": 2, "size": (1, 1)}],
+            "col_width": [("A", 18)],
+        }
+
+        static_config, case_config = misc.split_static_config(test_config)
+
+        assert static_config == {"col_width": [("A", 18)]}
+        assert case_config == {
+            "images": [{"cell": "A4", "img_index": 2, "size": (1, 1)}]
+        }
 
 
 class TestSplitConfidenceSupport:
@@ -184,6 +330,36 @@ class TestConvertIndexToLetters:
             misc.convert_index_to_letters(1000)
 
 
+class TestConvertCellsToRanges:
+    def test_consecutive_rows(self):
+        test_input = ["A1", "A2", "A3", "A4"]
+
+        assert misc.convert_cells_to_ranges(test_input) == ["A1:A4"]
+
+    def test_single_cells(self):
+        test_input = ["A1", "B16"]
+
+        assert misc.convert_cells_to_ranges(test_input) == ["A1", "B16"]
+
+    def test_gaps_and_unsorted_rows(self):
+        test_input = (f"G{row}" for row in [57, 25, 26, 27, 58, 37])
+
+        assert misc.convert_cells_to_ranges(test_input) == [
+            "G25:G27",
+            "G37",
+            "G57:G58",
+        ]
+
+    def test_duplicated_cells(self):
+        test_input = ["AB2", "AB3", "AB3", "AB4"]
+
+        assert misc.convert_cells_to_ranges(test_input) == ["AB2:AB4"]
+
+    def test_not_a_cell(self):
+        with pytest.raises(ValueError):
+            misc.convert_cells_to_ranges(["A1:A4"])
+
+
 class TestConvert3LetterProteinTo1:
     @pytest.mark.parametrize(
         "test_input, expected",
@@ -0,0 +1,222 @@
+import json
+
+import pytest
+
+from utils import perf
+
+
+class TestSpan:
+    def test_no_recording(self):
+        with perf.span("stage", rows=1) as counts:
+            counts["cells"] = 2
+
+        assert counts == {"rows": 1, "cells": 2}
+        assert perf.RECORDERS == []
+
+    def test_span_recorded(self):
+        with perf.recording() as recorder:
+            with perf.span("stage", rows=1) as counts:
+                counts["cells"] = 2
+
+        assert len(recorder.spans) == 1
+        assert recorder.spans[0]["name"] == "stage"
+        assert recorder.spans[0]["counts"] == {"rows": 1, "cells": 2}
+        assert {"wall_time", "cpu_time", "peak_rss_delta"}.issubset(
+            recorder.spans[0]
+        )
+
+    def test_nested_spans(self):
+        with perf.recording() as recorder:
+            with perf.span("parent"):
+                with perf.span("child"):
+                    pass
+
+            with perf.span("sibling"):
+                pass
+
+        assert [(span["name"], span["depth"]) for span in recorder.spans] == [
+            ("parent", 0),
+            ("child", 1),
+            ("sibling", 0),
+        ]
+
+    def test_span_recorded_on_error(self):
+        with perf.recording() as recorder:
+            try:
+                with perf.span("stage"):
+                    raise ValueError()
+            except ValueError:
+                pass
+
+        assert "wall_time" in recorder.spans[0]
+
+
+class TestAddSpans:
+    def test_spans_nested_in_current_span(self):
+        with perf.recording() as worker_recorder:
+            with perf.span("worker"):
+                pass
+
+        with perf.recording() as recorder:
+            with perf.span("parent"):
+                perf.add_spans(worker_recorder.start, worker_recorder.spans)
+
+        assert recorder.spans[1]["name"] == "worker"
+        assert recorder.spans[1]["depth"] == 1
+        # the worker recorder started before the recorder
+        assert recorder.spans[1]["start"] < 0
+
+
+class TestWriteReport:
+    def test_report_written(self, tmp_path):
+        with perf.recording() as recorder:
+            with perf.span("stage"):
+                pass
+
+        perf.write_report(tmp_path / "case.perf.json", recorder, sample="a")
+
+        with open(tmp_path / "case.perf.json") as f:
+            test_output = json.load(f)
+
+        assert test_output["sample"] == "a"
+        assert [span["name"] for span in test_output["spans"]] == ["stage"]
+
+    def test_metadata_of_the_run_added(self, tmp_path):
+        with perf.recording() as recorder:
+            with perf.span("stage"):
+                perf.add_metadata(critical_path=["stage"])
+
+        perf.write_report(tmp_path / "case.perf.json", recorder)
+
+        with open(tmp_path / "case.perf.json") as f:
+            test_output = json.load(f)
+
+        assert test_output["critical_path"] == ["stage"]
+
+
+def allocate_strings(number: int) -> list:
+    return [str(i) * 10 for i in range(number)]
+
+
+def call_allocations():
+    allocate_strings(1000)
+    allocate_strings(1000)
+
+
+ALLOCATE_FRAME = (
+    f"allocate_strings (test_perf.py:"
+    f"{allocate_strings.__code__.co_firstlineno})"
+)
+CALL_FRAME = (
+    f"call_allocations (test_perf.py:"
+    f"{call_allocations.__code__.co_firstlineno})"
+)
+# line of the list of strings
+ALLOCATION_SITE = (
+    f"test_perf.py:{allocate_strings.__code__.co_firstlineno + 1}"
+)
+
+
+class TestProfiling:
+    def test_cpu_profile_written(self, tmp_path):
+        with perf.profiling("cpu") as profiler:
+            call_allocations()
+
+        perf.write_cpu_profile(profiler, str(tmp_path / "case"))
+
+        assert (tmp_path / "case.pstats").exists()
+
+        with open(tmp_path / "case.collapsed") as f:
+            stacks = [line.rsplit(" ", 1) for line in f.read().splitlines()]
+
+        assert any(
+            stack.endswith(f";{ALLOCATE_FRAME}") and CALL_FRAME in stack
+            for stack, _ in stacks
+        )
+        assert all(int(microseconds) > 0 for _, microseconds in stacks)
+
+    def test_mem_profile_allocation_sites(self):
+        with perf.recording() as recorder, perf.profiling("mem"):
+            with perf.span("stage"):
+                with perf.span("sheet"):
+                    with perf.span("nested"):
+                        strings = allocate_strings(1000)
+
+        assert recorder.spans[0]["allocation_sites"][0]["site"].endswith(
+            ALLOCATION_SITE
+        )
+        assert recorder.spans[0]["traced_memory"] > 0
+        assert "allocation_sites" not in recorder.spans[2]
+        assert len(strings) == 1000
+
+    def test_no_profile(self):
+        with perf.recording() as recorder, perf.profiling(None) as profiler:
+            with perf.span("stage"):
+                pass
+
+        assert profiler is None
+        assert "allocation_sites" not in recorder.spans[0]
+
+
+def count_up(number: int) -> int:
+    total = 0
+
+    while total < number:
+        total += 1
+
+    return total
+
+
+def call_count_up():
+    count_up(100000)
+    count_up(100000)
+
+
+COUNT_UP_LINE = count_up.__code__.co_firstlineno
+
+
+class TestGetCollapsedStacks:
+    def test_time_split_between_callers(self):
+        profiler = perf.cProfile.Profile()
+        profiler.enable()
+        call_count_up()
+        count_up(200000)
+        profiler.disable()
+
+        test_output = perf.get_collapsed_stacks(perf.pstats.Stats(profiler))
+
+        stats = perf.pstats.Stats(profiler).stats
+        self_time = next(
+            value[2]
+            for function, value in stats.items()
+            if function[2] == "count_up"
+        )
+        stacks = {
+            stack: microseconds
+            for stack, microseconds in test_output.items()
+            if stack.endswith(f"count_up (test_perf.py:{COUNT_UP_LINE})")
+        }
+
+        # called from the test and from call_count_up
+        assert len(stacks) == 2
+        # same self time in total as the function in the profile
+        assert sum(stacks.values()) == pytest.approx(self_time * 1e6, rel=0.01)
+
+    def test_calls_from_profiler_frame_kept(self):
+        profiler = perf.cProfile.Profile()
+        profiler.enable()
+        # called from this frame, which cProfile doesn't record as a caller
+        count_up(200000)
+        call_count_up()
+        profiler.disable()
+
+        test_output = perf.get_collapsed_stacks(perf.pstats.Stats(profiler))
+
+        total_time = perf.pstats.Stats(profiler).total_tt
+        count_up_frame = f"count_up (test_perf.py:{COUNT_UP_LINE})"
+
+        assert test_output[count_up_frame] > 0
+        # the time of every call is in the stacks
+        assert sum(test_output.values()) == pytest.approx(
+            total_time * 1e6, rel=0.05
+        )
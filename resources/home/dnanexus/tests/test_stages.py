@@ -0,0 +1,269 @@
+import os
+
+import pytest
+
+from utils import perf, stages
+
+
+def add(*numbers):
+    return sum(numbers)
+
+
+def get_pid_and_value(value):
+    return os.getpid(), value
+
+
+def fail():
+    raise ValueError("stage failed")
+
+
+def get_none():
+    return None
+
+
+def parse_in_span():
+    with perf.span("parse"):
+        return True
+
+
+def get_graph() -> list:
+    return [
+        {"name": "c", "function": add, "inputs": ["a", "b"], "outputs": ["c"]},
+        {"name": "a", "function": add, "inputs": ["x"], "outputs": ["a"]},
+        {
+            "name": "b",
+            "function": add,
+            "inputs": ["x"],
+            "args": [10],
+            "outputs": ["b"],
+        },
+    ]
+
+
+class TestGetStageOrder:
+    def test_stage_after_its_inputs(self):
+        test_output = stages.get_stage_order(get_graph(), {"x": 1})
+
+        assert [stage["name"] for stage in test_output] == ["a", "b", "c"]
+
+    def test_missing_input(self):
+        with pytest.raises(AssertionError, match=r"\['c', 'a', 'b'\]"):
+            stages.get_stage_order(get_graph(), {})
+
+
+class TestRunStages:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_outputs(self, workers):
+        test_output = stages.run_stages(get_graph(), {"x": 1}, workers)
+
+        assert test_output == {"x": 1, "a": 1, "b": 11, "c": 12}
+
+    def test_stages_run_in_workers(self):
+        test_output = stages.run_stages(
+            [
+                {
+                    "name": "pid",
+                    "function": get_pid_and_value,
+                    "inputs": ["x"],
+                    "outputs": ["pid", "value"],
+                }
+            ],
+            {"x": 1},
+            2,
+        )
+
+        assert test_output["pid"] != os.getpid()
+        assert test_output["value"] == 1
+
+    def test_worker_spans_added(self):
+        with perf.recording() as recorder:
+            with perf.span("case"):
+                stages.run_stages(
+                    [
+                        {
+                            "name": "parse",
+                            "function": parse_in_span,
+                            "inputs": [],
+                            "outputs": ["parsed"],
+                        }
+                    ],
+                    {},
+                    2,
+                )
+
+        assert [(span["name"], span["depth"]) for span in recorder.spans] == [
+            ("case", 0),
+            ("parse", 1),
+        ]
+        assert recorder.metadata["critical_path"]["stages"] == ["parse"]
+
+    def test_stage_error_raised(self):
+        with pytest.raises(ValueError, match="stage failed"):
+            stages.run_stages(
+                [
+                    {
+                        "name": "fail",
+                        "function": fail,
+                        "inputs": [],
+                        "outputs": ["failed"],
+                    }
+                ],
+                {},
+                2,
+            )
+
+
+class TestGetCriticalPath:
+    def test_longest_chain(self):
+        durations = {"a": 1.0, "b": 3.0, "c": 0.5}
+
+        test_output = stages.get_critical_path(
+            stages.get_stage_order(get_graph(), {"x": 1}), durations
+        )
+
+        assert test_output == {
+            "stages": ["b", "c"],
+            "wall_time": 3.5,
+            "total_wall_time": 4.5,
+        }
+
+    def test_no_stages(self):
+        test_output = stages.get_critical_path([], {})
+
+        assert test_output == {
+            "stages": [],
+            "wall_time": 0,
+            "total_wall_time": 0,
+        }
+
+
+def get_cache(folder, max_size: int = 1024**2, **keys) -> dict:
+    return {
+        "folder": str(folder),
+        "max_size": max_size,
+        "version": "1",
+        "keys": {"x": "file_x", **keys},
+    }
+
+
+class TestGetStageKeys:
+    def test_change_of_input_propagated(self):
+        ordered_stages = stages.get_stage_order(get_graph(), {"x": 1})
+
+        test_output = stages.get_stage_keys(ordered_stages, {"x": "1"}, "1")
+        changed_keys = stages.get_stage_keys(ordered_stages, {"x": "2"}, "1")
+
+        assert all(test_output[name] != changed_keys[name] for name in "abc")
+
+    def test_change_of_args_not_propagated_to_siblings(self):
+        ordered_stages = stages.get_stage_order(get_graph(), {"x": 1})
+
+        test_output = stages.get_stage_keys(ordered_stages, {"x": "1"}, "1")
+        ordered_stages[1]["args"] = [20]
+        changed_keys = stages.get_stage_keys(ordered_stages, {"x": "1"}, "1")
+
+        assert test_output["a"] == changed_keys["a"]
+        assert test_output["b"] != changed_keys["b"]
+        assert test_output["c"] != changed_keys["c"]
+
+    def test_change_of_version(self):
+        ordered_stages = stages.get_stage_order(get_graph(), {"x": 1})
+
+        test_output = stages.get_stage_keys(ordered_stages, {"x": "1"}, "1")
+        changed_keys = stages.get_stage_keys(ordered_stages, {"x": "1"}, "2")
+
+        assert test_output["a"] != changed_keys["a"]
+
+    def test_source_of_module_hashed(self):
+        stage = {"name": "a", "inputs": [], "outputs": ["a"]}
+
+        test_output = stages.get_stage_keys([stage], {}, "1")
+        with_source = stages.get_stage_keys(
+            [{**stage, "sources": ["configs.sv"]}], {}, "1"
+        )
+
+        assert test_output != with_source
+
+
+class TestStageCache:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_outputs_loaded_from_cache(self, tmp_path, workers):
+        stages.run_stages(get_graph(), {"x": 1}, workers, get_cache(tmp_path))
+        # the stages fail if they are run again
+        failing_graph = [{**stage, "function": fail} for stage in get_graph()]
+
+        with perf.recording() as recorder:
+            test_output = stages.run_stages(
+                failing_graph, {"x": 1}, workers, get_cache(tmp_path)
+            )
+
+        assert test_output == {"x": 1, "a": 1, "b": 11, "c": 12}
+        assert recorder.metadata["cached_stages"] == ["a", "b", "c"]
+
+    def test_changed_input_run_again(self, tmp_path):
+        stages.run_stages(get_graph(), {"x": 1}, 1, get_cache(tmp_path))
+
+        test_output = stages.run_stages(
+            get_graph(), {"x": 2}, 1, get_cache(tmp_path, x="file_x2")
+        )
+
+        assert test_output == {"x": 2, "a": 2, "b": 12, "c": 14}
+
+    def test_none_output_cached(self, tmp_path):
+        graph = [
+            {
+                "name": "none",
+                "function": get_none,
+                "inputs": [],
+                "outputs": ["none"],
+            }
+        ]
+        stages.run_stages(graph, {}, 1, get_cache(tmp_path))
+
+        test_output = stages.run_stages(
+            [{**graph[0], "function": fail}], {}, 1, get_cache(tmp_path)
+        )
+
+        assert test_output == {"none": None}
+
+    @pytest.mark.parametrize("content", [b"", b"\x80\x05garbage"])
+    def test_unreadable_outputs_run_again(self, tmp_path, content):
+        stages.run_stages(get_graph(), {"x": 1}, 1, get_cache(tmp_path))
+        stage_keys = stages.get_stage_keys(
+            stages.get_stage_order(get_graph(), {"x": 1}),
+            {"x": "file_x"},
+            "1",
+        )
+        # empty or truncated pickle of the outputs of a
+        (tmp_path / f"{stage_keys['a']}.pickle").write_bytes(content)
+
+        with perf.recording() as recorder:
+            test_output = stages.run_stages(
+                get_graph(), {"x": 1}, 1, get_cache(tmp_path)
+            )
+
+        assert test_output == {"x": 1, "a": 1, "b": 11, "c": 12}
+        assert recorder.metadata["cached_stages"] == ["b", "c"]
+        assert stages.load_cached_outputs(tmp_path, stage_keys["a"]) == (1,)
+
+
+class TestEvictCache:
+    def test_least_recently_used_removed(self, tmp_path):
+        for index, key in enumerate(["old", "used", "new"]):
+            stages.store_outputs(tmp_path, key, (b"0" * 100,))
+            os.utime(tmp_path / f"{key}.pickle", (index, index))
+
+        # marks the outputs as used
+        stages.load_cached_outputs(tmp_path, "used")
+        size = (tmp_path / "new.pickle").stat().st_size
+
+        test_output = stages.evict_cache(tmp_path, 2 * size)
+
+        assert test_output == [tmp_path / "old.pickle"]
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            "new.pickle",
+            "used.pickle",
+        ]
+
+    def test_not_cached(self, tmp_path):
+        assert stages.load_cached_outputs(tmp_path, "missing") is None
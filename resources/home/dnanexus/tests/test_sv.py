@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+
+from configs import sv
+from utils import misc
+
+LOOKUP_GROUPS = [
+    "COSMIC Driver",
+    "COSMIC Entities",
+    "Paed Driver",
+    "Paed Entities",
+    "Sarc Driver",
+    "Sarc Entities",
+    "Neuro Driver",
+    "Neuro Entities",
+    "Ovary Driver",
+    "Ovary Entities",
+    "Haem Driver",
+    "Haem Entities",
+]
+
+
+def get_fusion_data(number_genes: int) -> pd.DataFrame:
+    # columns of process_fusion_SV with the gene columns added by
+    # lookup_data_from_variants
+    genes = [f"Gene_{i}" for i in range(1, number_genes + 1)]
+    columns = [
+        "Event domain",
+        "Gene",
+        "RefSeq IDs",
+        "Impacted transcript region",
+        "GRCh38 coordinates",
+        "Type",
+        *(f"Fusion_{i}" for i in range(1, number_genes)),
+        "Size",
+        (
+            "Population germline allele frequency (GESG | GECG for "
+            "somatic SVs or AF | AUC for germline CNVs)"
+        ),
+        "Paired reads",
+        "Split reads",
+        *(f"Cyto\n{gene}" for gene in genes),
+        "Gene mode of action",
+        "Variant class",
+        "OG_Fusion",
+        "OG_IntDup",
+        "OG_IntDel",
+        "Disruptive",
+        *(f"{group}\n{gene}" for group in LOOKUP_GROUPS for gene in genes),
+        *genes,
+    ]
+
+    return pd.DataFrame([["-"] * len(columns)] * 2, columns=columns)
+
+
+def get_letter(data: pd.DataFrame, column: str) -> str:
+    return misc.convert_index_to_letters(data.columns.get_loc(column))
+
+
+class TestAddDynamicValues:
+    def test_no_data(self):
+        assert sv.add_dynamic_values(None, {}) == {}
+
+    @pytest.mark.parametrize("number_genes", [2, 3, 4])
+    def test_lookup_groups_of_fusions(self, number_genes):
+        data = get_fusion_data(number_genes)
+
+        test_output = sv.add_dynamic_values(data, {})
+
+        # left border at the start of every lookup group, of the gene
+        # columns and after them
+        group_starts = [
+            get_letter(data, f"{group}\nGene_1") for group in LOOKUP_GROUPS
+        ] + [
+            get_letter(data, "Gene_1"),
+            misc.convert_index_to_letters(len(data.columns)),
+        ]
+        assert [
+            cells for cells, _ in test_output["borders"]["cell_rows"][1:]
+        ] == [f"{letter}2:{letter}3" for letter in group_starts]
+
+        gene_headers = [
+            cell
+            for cell, fill in test_output["cells_to_colour"]
+            if fill.start_color.rgb == "00e6e0ec"
+        ]
+        assert gene_headers == [
+            f"{get_letter(data, f'Gene_{i}')}1"
+            for i in range(1, number_genes + 1)
+        ]
+
+    def test_uneven_lookup_groups(self):
+        data = get_fusion_data(3).drop(columns="Gene_3")
+
+        with pytest.raises(ValueError, match="Uneven number of genes"):
+            sv.add_dynamic_values(data, {})
@@ -0,0 +1,105 @@
+import json
+
+import pandas as pd
+import pytest
+
+from configs import tables
+
+
+@pytest.fixture()
+def html_tables():
+    return [
+        pd.DataFrame({"Clinical Indication": ["Sarcoma"]}),
+        pd.DataFrame(
+            {
+                "Tumour Diagnosis Date": ["2020"],
+                "Histopathology or SIHMDS LAB ID": ["X"],
+                "Presentation": ["Primary_1"],
+                "Primary or Metastatic": ["Primary"],
+                "Tumour Topography": ["Leg"],
+            }
+        ),
+        pd.DataFrame(
+            {
+                "Clinical Sample Date Time": ["2021"],
+                "Storage Medium": ["FF"],
+                "Source": ["Tumour"],
+                "Tumour Content": ["50%"],
+                "Calculated Tumour Content": ["45%"],
+                "Calculated Overall Ploidy": [2.1],
+            }
+        ),
+        pd.DataFrame({"Storage Medium": ["EDTA"], "Source": ["Blood"]}),
+        pd.DataFrame(
+            {
+                "Total somatic SNVs": [1, 2],
+                "Total somatic indels": [3, 4],
+                "Total somatic SVs": [5, 6],
+                "Sample type": ["Germline", "Tumour"],
+                "Genome-wide coverage mean, x": [30, 100],
+                "Mapped reads, %": [99, 98],
+                "Chimeric DNA fragments, %": [1, 2],
+                "Insert size median, bp": [400, 380],
+                "Genome coverage evenness": [1.1, 1.2],
+            }
+        ),
+    ]
+
+
+class TestBuildQcRecord:
+    def test_alternative_header_resolved(self, html_tables):
+        test_output = tables.build_qc_record(html_tables, "4.2")
+
+        assert (
+            test_output["tables"]["Sequencing info"][1][
+                "Unevenness of local genome coverage, x"
+            ]
+            == 1.2
+        )
+
+    def test_missing_header(self, html_tables):
+        html_tables[0] = pd.DataFrame({"Other": ["Sarcoma"]})
+
+        with pytest.raises(Exception, match="Clinical Indication"):
+            tables.build_qc_record(html_tables, "4.2")
+
+    def test_missing_table(self, html_tables):
+        with pytest.raises(AssertionError, match="Sequencing info"):
+            tables.build_qc_record(html_tables[:-1], "4.2")
+
+    def test_json_serializable(self, html_tables):
+        test_output = tables.build_qc_record(html_tables, "4.2")
+
+        assert json.loads(json.dumps(test_output)) == test_output
+
+
+class TestGetTableValueInQcRecord:
+    def test_value(self, html_tables):
+        qc_record = tables.build_qc_record(html_tables, "4.2")
+
+        test_output = tables.get_table_value_in_qc_record(
+            "Sequencing info", 1, "Total somatic SNVs", qc_record
+        )
+
+        assert test_output == 2
+
+    def test_formatting(self, html_tables):
+        qc_record = tables.build_qc_record(html_tables, "4.2")
+
+        assert (
+            tables.get_table_value_in_qc_record(
+                "Tumor info", 0, "Presentation", qc_record, "split"
+            )
+            == "Primary"
+        )
+        assert (
+            tables.get_table_value_in_qc_record(
+                "Sample info", 0, "Tumour Content", qc_record, "parentheses"
+            )
+            == "(50%)"
+        )
+
+    def test_tmb(self, html_tables):
+        qc_record = tables.build_qc_record(html_tables, "4.2")
+
+        assert tables.get_tmb(qc_record) == "4.2"
@@ -0,0 +1,108 @@
+import pytest
+
+from utils import vcf
+
+
+@pytest.fixture()
+def clinvar_vcf(tmp_path):
+    path = tmp_path / "clinvar.vcf"
+    path.write_text(
+        "##fileformat=VCFv4.1\n"
+        '##INFO=<ID=CLNSIG,Number=.,Type=String,Description="x">\n'
+        '##INFO=<ID=CLNSIGCONF,Number=.,Type=String,Description="x">\n'
+        "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n"
+        "1\t1\t1\tA\tG\t.\t.\tCLNSIG=Pathogenic\n"
+        "1\t2\t2\tA\tG\t.\t.\tCLNSIG=Conflicting;CLNSIGCONF=Benign(1)\n"
+        "1\t3\t3\tA\tG\t.\t.\t.\n"
+        "1\t4\t4\tA\tG\t.\t.\tCLNSIG=Benign,Pathogenic\n"
+    )
+    return str(path)
+
+
+class TestLoadClinvarSignificance:
+    def test_significance_per_id(self, clinvar_vcf):
+        test_output = vcf.load_clinvar_significance(vcf.open_vcf(clinvar_vcf))
+
+        assert test_output == {
+            "1": ("Pathogenic",),
+            "2": ("Benign(1)",),
+            "3": ("",),
+            "4": ("Benign", "Pathogenic"),
+        }
+
+    def test_only_ids_kept(self, clinvar_vcf):
+        test_output = vcf.load_clinvar_significance(
+            vcf.open_vcf(clinvar_vcf), {"2", "4", "missing"}
+        )
+
+        assert test_output == {
+            "2": ("Benign(1)",),
+            "4": ("Benign", "Pathogenic"),
+        }
+
+    def test_reading_stopped_once_ids_found(self, clinvar_vcf):
+        records = iter(vcf.open_vcf(clinvar_vcf))
+
+        test_output = vcf.load_clinvar_significance(records, {"2"})
+
+        assert test_output == {"2": ("Benign(1)",)}
+        assert next(records).ID == ["3"]
+
+    @pytest.mark.parametrize("clinvar_ids", [None, {"1"}])
+    def test_first_record_of_repeated_id_kept(self, tmp_path, clinvar_ids):
+        path = tmp_path / "clinvar.vcf"
+        path.write_text(
+            "##fileformat=VCFv4.1\n"
+            '##INFO=<ID=CLNSIG,Number=.,Type=String,Description="x">\n'
+            "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n"
+            "1\t1\t1\tA\tG\t.\t.\tCLNSIG=Pathogenic\n"
+            "1\t2\t1\tA\tG\t.\t.\tCLNSIG=Benign\n"
+        )
+
+        test_output = vcf.load_clinvar_significance(
+            vcf.open_vcf(str(path)), clinvar_ids
+        )
+
+        assert test_output == {"1": ("Pathogenic",)}
+
+    def test_no_ids(self, clinvar_vcf):
+        assert (
+            vcf.load_clinvar_significance(vcf.open_vcf(clinvar_vcf), set())
+            == {}
+        )
+
+
+class TestFindClinvarInfo:
+    def test_ids_found(self, clinvar_vcf):
+        clinvar_significance = vcf.load_clinvar_significance(
+            vcf.open_vcf(clinvar_vcf)
+        )
+
+        test_output = vcf.find_clinvar_info(
+            clinvar_significance, "2", "5", "1"
+        )
+
+        assert test_output.to_dict("list") == {
+            "ClinVar ID": ["2", "1"],
+            "clnsigconf": ["Benign(1)", "Pathogenic"],
+        }
+
+    def test_multiple_significance(self, clinvar_vcf):
+        clinvar_significance = vcf.load_clinvar_significance(
+            vcf.open_vcf(clinvar_vcf)
+        )
+
+        with pytest.raises(AssertionError):
+            vcf.find_clinvar_info(clinvar_significance, "4")
+
+    def test_reused_for_several_cases(self, clinvar_vcf):
+        clinvar_significance = vcf.load_clinvar_significance(
+            vcf.open_vcf(clinvar_vcf)
+        )
+
+        for clinvar_id in ["1", "2"]:
+            test_output = vcf.find_clinvar_info(
+                clinvar_significance, clinvar_id
+            )
+
+            assert list(test_output["ClinVar ID"]) == [clinvar_id]
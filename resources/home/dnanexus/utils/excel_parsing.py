@@ -1,7 +1,6 @@
 import re
 
 import pandas as pd
-import vcfpy
 
 from configs import tables, sv, refgene
 from utils import misc, vcf
@@ -31,24 +30,19 @@ def open_file(file: str, file_type: str) -> pd.DataFrame:
     return df
 
 
-def process_reported_variants_germline(
-    df: pd.DataFrame, clinvar_resource: vcfpy.Reader, panelapp_dfs: dict
-) -> pd.DataFrame:
-    """Process the data from the reported variants excel file
+def get_germline_variants(df: pd.DataFrame) -> pd.DataFrame:
+    """Get the germline variants from the reported variants, with their
+    clinvar ids as strings
 
     Parameters
     ----------
     df : pd.DataFrame
         Dataframe from parsing the reported variants excel file
-    clinvar_resource : vcfpy.Reader
-        vcfpy.Reader object from the Clinvar resource
-    panelapp_dfs : dict
-        Dict containing dfs to Panelapp adult and childhood data
 
     Returns
     -------
     pd.DataFrame
-        Dataframe containing clinical significance info for germline variants
+        Dataframe of the germline variants, None if there are none
     """
 
     if "Origin" not in df:
@@ -66,11 +60,63 @@ def process_reported_variants_germline(
 
     df.reset_index(drop=True, inplace=True)
 
+    return df
+
+
+def get_germline_clinvar_ids(df: pd.DataFrame) -> set:
+    """Get the clinvar ids of the germline variants, which are the only
+    records of the clinvar VCF looked up for a case
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataframe from parsing the reported variants excel file
+
+    Returns
+    -------
+    set
+        Set of the clinvar ids
+    """
+
+    df = get_germline_variants(df)
+
+    if df is None:
+        return set()
+
+    return set(df["ClinVar ID"].dropna())
+
+
+def process_reported_variants_germline(
+    df: pd.DataFrame, clinvar_significance: dict, panelapp_dfs: dict
+) -> pd.DataFrame:
+    """Process the data from the reported variants excel file
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataframe from parsing the reported variants excel file
+    clinvar_significance : dict
+        Dict of the clinical significance for every id of the Clinvar
+        resource
+    panelapp_dfs : dict
+        Dict containing dfs to Panelapp adult and childhood data
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe containing clinical significance info for germline variants
+    """
+
+    df = get_germline_variants(df)
+
+    if df is None:
+        return None
+
     clinvar_ids_to_find = [
         value for value in df.loc[:, "ClinVar ID"].to_numpy()
     ]
     clinvar_info = vcf.find_clinvar_info(
-        clinvar_resource, *clinvar_ids_to_find
+        clinvar_significance, *clinvar_ids_to_find
     )
 
     # add the clinvar info by merging the clinvar dataframe
@@ -545,8 +591,8 @@ def process_fusion_SV(
     df_SV.loc[:, "OG_IntDel"] = ""
     df_SV.loc[:, "Disruptive"] = ""
 
-    expected_columns = sv.CONFIG["expected_columns"]
-    alternatives = sv.CONFIG["alternative_columns"]
+    expected_columns = sv.get_config()["expected_columns"]
+    alternatives = sv.get_config()["alternative_columns"]
 
     alternative_columns = tables.find_alternative_headers(
         df_SV, expected_columns, alternatives
@@ -1,41 +1,106 @@
-from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import hashlib
+import importlib
+import inspect
+from io import BytesIO
+import itertools
+import multiprocessing
+import os
+from pathlib import Path
+import posixpath
+import re
+import sys
+import tempfile
+import time
+import zipfile
+import zlib
+
+import lxml.etree
 import openpyxl
 from openpyxl import drawing
+from openpyxl.cell import Cell
+from openpyxl.drawing.spreadsheet_drawing import SpreadsheetDrawing
 from openpyxl.formatting.rule import DataBarRule
+from openpyxl.packaging.custom import CustomPropertyList, StringProperty
+from openpyxl.packaging.relationship import get_rels_path, RelationshipList
 from openpyxl.styles import Alignment, DEFAULT_FONT, Font
+from openpyxl.styles.numbers import BUILTIN_FORMATS
 from openpyxl.worksheet.datavalidation import DataValidation
+from openpyxl.worksheet._writer import WorksheetWriter
 from openpyxl.worksheet.worksheet import Worksheet
+from openpyxl.writer.excel import ExcelWriter
+from openpyxl.xml.functions import fromstring, tostring
 import pandas as pd
-from PIL import Image
 
-from configs.tables import get_table_value_in_html_table
-from utils import misc
+from configs.tables import get_table_value_in_qc_record
+from utils import misc, perf
 
 pd.options.mode.chained_assignment = None
 
+# name of the custom document property storing the template fingerprint
+TEMPLATE_PROPERTY = "template_fingerprint"
+
+# style index attributes in the cells, rows and columns of a rendered
+# worksheet XML part
+STYLE_ID_REGEX = re.compile(rb'(<(?:c|row|col) [^>]*?\b(?:s|style)=")(\d+)(")')
+
+# zlib compatible modules that can be used to deflate the workbook parts
+ZLIB_IMPLEMENTATIONS = {"zlib": "zlib", "zlib-ng": "zlib_ng.zlib_ng"}
+
+# extensions of the workbook parts that are already compressed
+MEDIA_EXTENSIONS = {".jpeg", ".jpg", ".png", ".gif"}
+
+# image formats that openpyxl writes as is in the workbook
+MEDIA_FORMATS = {"jpeg", "png", "gif"}
+
+# namespaces of the spreadsheet XML parts and of their relationships
+SPREADSHEET_NAMESPACE = (
+    "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+)
+RELATIONSHIPS_NAMESPACE = (
+    "http://schemas.openxmlformats.org/package/2006/relationships"
+)
+DOCUMENT_RELATIONSHIPS_NAMESPACE = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+)
+
+# elements of a worksheet part counted in the workbook cost report
+SHEET_COST_ELEMENTS = {
+    "cells": "c",
+    "data_validations": "dataValidation",
+    "conditional_formats": "cfRule",
+    "merged_ranges": "mergeCell",
+}
+
+DEFAULT_COMPRESSION_POLICY = {
+    "store_media": True,
+    "xml_level": 6,
+    "zlib_implementation": "zlib",
+}
+
 
 def write_sheet(
-    excel_writer: pd.ExcelWriter,
+    workbook: openpyxl.Workbook,
     sheet_name: str,
-    html_tables: list = None,
+    qc_record: dict = None,
     html_images: list = None,
-    soup: BeautifulSoup = None,
     dynamic_data: dict = None,
 ) -> openpyxl.worksheet.worksheet.Worksheet:
-    """Using a config file, write in the appropriate data
+    """Using a config file, write in the appropriate data. If the sheet
+    already exists in the workbook i.e. it comes from the template, only the
+    case specific data is written
 
     Parameters
     ----------
-    excel_writer : pd.ExcelWriter
-        ExcelWriter object
+    workbook : openpyxl.Workbook
+        Workbook to write the sheet in
     sheet_name : str
         Name of the sheet used to match the config
-    html_tables : list, optional
-        List of tables extracted from the HTML
+    qc_record : dict, optional
+        QC record built from the tables and text of the HTML
     html_images : list, optional
         List of images extracted from the HTML
-    soup : BeautifulSoup, optional
-        BeautifulSoup object for the HTML file
     dynamic_data: dict, optional
         Dict of data for dynamic filling in the sheet
 
@@ -45,24 +110,54 @@ def write_sheet(
         Worksheet object
     """
 
-    sheet = excel_writer.book.create_sheet(sheet_name)
-
     type_config = misc.select_config(sheet_name)
     assert type_config, f"Config file {sheet_name} couldn't be imported"
 
+    if sheet_name in workbook.sheetnames:
+        # the static part of the config has already been written in the
+        # template
+        sheet = workbook[sheet_name]
+        _, sheet_config = misc.split_static_config(type_config.get_config())
+    else:
+        sheet = workbook.create_sheet(sheet_name)
+        sheet_config = type_config.get_config()
+
     if dynamic_data:
-        dynamic_data_for_config = dynamic_data[sheet_name]
-        sheet_config = misc.merge_dicts(
-            type_config.CONFIG, dynamic_data_for_config
+        # stack the dynamic values on top of the config without copying them
+        sheet_config = misc.ConfigLayers(
+            sheet_config, dynamic_data[sheet_name]
         )
 
-    else:
-        sheet_config = type_config.CONFIG
+    with perf.span(f"write_sheet {sheet_name}") as counts:
+        apply_config(sheet, sheet_config, qc_record, html_images)
+        counts["cells"] = len(sheet._cells)
+
+    return sheet
+
+
+def apply_config(
+    sheet: Worksheet,
+    sheet_config: dict,
+    qc_record: dict = None,
+    html_images: list = None,
+):
+    """Write the content and the formatting described in the config in the
+    sheet
+
+    Parameters
+    ----------
+    sheet : Worksheet
+        Worksheet to write in
+    sheet_config : dict
+        Config dict for the sheet or ConfigLayers view over its layers
+    qc_record : dict, optional
+        QC record built from the tables and text of the HTML
+    html_images : list, optional
+        List of images extracted from the HTML
+    """
 
     if sheet_config.get("cells_to_write"):
-        write_cell_content(
-            sheet, sheet_config["cells_to_write"], html_tables, soup
-        )
+        write_cell_content(sheet, sheet_config["cells_to_write"], qc_record)
 
     if sheet_config.get("to_merge"):
         # merge columns that have longer text
@@ -102,12 +197,742 @@ def write_sheet(
     if sheet_config.get("data_bar"):
         add_databar_rule(sheet, sheet_config["data_bar"])
 
-    return sheet
 
+def open_workbook(template_path: str = None) -> openpyxl.Workbook:
+    """Create an empty workbook or load the template workbook, without the
+    fingerprint of the template which is not part of the case workbook
+
+    Parameters
+    ----------
+    template_path : str, optional
+        Path to the template workbook
+
+    Returns
+    -------
+    openpyxl.Workbook
+        Workbook to write the sheets in
+    """
+
+    if template_path:
+        workbook = openpyxl.load_workbook(template_path)
+
+        if TEMPLATE_PROPERTY in workbook.custom_doc_props.names:
+            del workbook.custom_doc_props[TEMPLATE_PROPERTY]
+
+        return workbook
+
+    workbook = openpyxl.Workbook()
+    # remove the default sheet
+    workbook.remove(workbook.active)
+
+    return workbook
+
+
+def build_template(template_path: str, sheet_names: list):
+    """Write the static part of the config of every sheet in a template
+    workbook, so that it can be reused as a starting point for every case
+
+    Parameters
+    ----------
+    template_path : str
+        Path to write the template to
+    sheet_names : list
+        Names of the sheets in the order they should appear in the workbook
+    """
+
+    template = open_workbook()
+
+    for sheet_name in sheet_names:
+        type_config = misc.select_config(sheet_name)
+        assert type_config, f"Config file {sheet_name} couldn't be imported"
+
+        sheet = template.create_sheet(sheet_name)
+        static_config, _ = misc.split_static_config(type_config.get_config())
+        apply_config(sheet, static_config)
 
-def write_cell_content(
-    sheet: Worksheet, config_data: dict, html_tables: list, soup: BeautifulSoup
+    template.custom_doc_props.append(
+        StringProperty(
+            name=TEMPLATE_PROPERTY,
+            value=get_template_fingerprint(sheet_names),
+        )
+    )
+
+    # written under a temporary name and renamed, so that a run reading the
+    # template never opens a partly written file
+    with tempfile.NamedTemporaryFile(
+        dir=Path(template_path).parent, suffix=".tmp", delete=False
+    ) as f:
+        template.save(f)
+
+    os.replace(f.name, template_path)
+
+
+def get_template_fingerprint(sheet_names: list) -> str:
+    """Get a hash of the code used to build the template, so that a template
+    built with outdated configs, config helpers or openpyxl is not reused
+
+    Parameters
+    ----------
+    sheet_names : list
+        Names of the sheets in the template
+
+    Returns
+    -------
+    str
+        Hexadecimal hash of the sheet names, the configs, the writing code,
+        the misc module splitting the static configs and the openpyxl version
+    """
+
+    fingerprint = hashlib.sha256()
+    fingerprint.update(",".join(sheet_names).encode())
+    fingerprint.update(openpyxl.__version__.encode())
+    fingerprint.update(inspect.getsource(sys.modules[__name__]).encode())
+    fingerprint.update(inspect.getsource(misc).encode())
+
+    for sheet_name in sheet_names:
+        fingerprint.update(
+            inspect.getsource(misc.select_config(sheet_name)).encode()
+        )
+
+    return fingerprint.hexdigest()
+
+
+def is_template_up_to_date(template_path: str, sheet_names: list) -> bool:
+    """Check that the template exists and was built with the current code
+
+    Parameters
+    ----------
+    template_path : str
+        Path to the template
+    sheet_names : list
+        Names of the sheets expected in the template
+
+    Returns
+    -------
+    bool
+        True if the template can be reused
+    """
+
+    if not Path(template_path).exists():
+        return False
+
+    with zipfile.ZipFile(template_path) as template:
+        if "docProps/custom.xml" not in template.namelist():
+            return False
+
+        custom_props = CustomPropertyList.from_tree(
+            fromstring(template.read("docProps/custom.xml"))
+        )
+
+    for prop in custom_props:
+        if prop.name == TEMPLATE_PROPERTY:
+            return prop.value == get_template_fingerprint(sheet_names)
+
+    return False
+
+
+def write_sheets(
+    workbook: openpyxl.Workbook, sheets: list, workers: int = 1
+) -> dict:
+    """Write the sheets in the workbook. With more than one worker, the
+    sheets filled with dynamic data and without images are written and
+    rendered to their worksheet XML part in a process pool, while the other
+    sheets are written in this process
+
+    Parameters
+    ----------
+    workbook : openpyxl.Workbook
+        Workbook to write the sheets in
+    sheets : list
+        List of dicts with the arguments for writing each sheet
+    workers : int, optional
+        Number of processes to use to render the sheets, by default 1
+
+    Returns
+    -------
+    dict
+        Dict of the sheets rendered in the process pool, to pass to
+        save_workbook
+    """
+
+    if workers <= 1:
+        for sheet_data in sheets:
+            write_sheet(workbook, **sheet_data)
+
+        return {}
+
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        futures = {}
+
+        for sheet_data in sheets:
+            sheet_name = sheet_data["sheet_name"]
+
+            if sheet_data.get("dynamic_data") and not sheet_data.get(
+                "html_images"
+            ):
+                # only send the dynamic data of that sheet to the worker
+                futures[sheet_name] = executor.submit(
+                    render_sheet,
+                    sheet_name,
+                    {sheet_name: sheet_data["dynamic_data"][sheet_name]},
+                )
+
+        for sheet_data in sheets:
+            sheet_name = sheet_data["sheet_name"]
+
+            if sheet_name in futures:
+                # placeholder keeping the order of the sheets, its content
+                # is replaced by the rendered XML when saving
+                if sheet_name not in workbook.sheetnames:
+                    workbook.create_sheet(sheet_name)
+            else:
+                write_sheet(workbook, **sheet_data)
+
+        rendered_sheets = {
+            sheet_name: future.result()
+            for sheet_name, future in futures.items()
+        }
+
+    for sheet_name, rendered_sheet in rendered_sheets.items():
+        # the auto filter is also referenced in the workbook defined names
+        workbook[sheet_name].auto_filter.ref = rendered_sheet["auto_filter"]
+        perf.add_spans(*rendered_sheet.pop("spans"))
+
+    return rendered_sheets
+
+
+def render_sheet(sheet_name: str, dynamic_data: dict = None) -> dict:
+    """Write a sheet in its own workbook and render its worksheet XML part.
+    The cell style indexes in the XML refer to the styles of that workbook,
+    which are returned along with it to be registered in the final workbook
+
+    Parameters
+    ----------
+    sheet_name : str
+        Name of the sheet used to match the config
+    dynamic_data: dict, optional
+        Dict of data for dynamic filling in the sheet
+
+    Returns
+    -------
+    dict
+        Dict containing the XML part of the worksheet, the styles used in it,
+        the range of the auto filter and the spans recorded while writing it
+    """
+
+    # the spans of the worker are sent back with the rendered sheet
+    with perf.recording() as recorder:
+        workbook = open_workbook()
+        sheet = write_sheet(workbook, sheet_name, dynamic_data=dynamic_data)
+
+        with perf.span(f"render_sheet {sheet_name}"):
+            writer = WorksheetWriter(sheet, out=BytesIO())
+            writer.write()
+
+    assert not writer._rels and not workbook._differential_styles, (
+        f"{sheet_name} has parts or styles that cannot be rendered outside "
+        "of the final workbook"
+    )
+
+    styles = []
+
+    # styles are stored as indexes in the style tables of the workbook
+    for style_array in workbook._cell_styles:
+        if style_array.numFmtId in BUILTIN_FORMATS:
+            number_format = BUILTIN_FORMATS[style_array.numFmtId]
+        else:
+            number_format = workbook._number_formats[
+                style_array.numFmtId - 164
+            ]
+
+        styles.append(
+            {
+                "font": workbook._fonts[style_array.fontId],
+                "fill": workbook._fills[style_array.fillId],
+                "border": workbook._borders[style_array.borderId],
+                "alignment": workbook._alignments[style_array.alignmentId],
+                "protection": workbook._protections[style_array.protectionId],
+                "number_format": number_format,
+                "pivotButton": style_array.pivotButton,
+                "quotePrefix": style_array.quotePrefix,
+            }
+        )
+
+    return {
+        "xml": writer.read(),
+        "styles": styles,
+        "auto_filter": sheet.auto_filter.ref,
+        "spans": (recorder.start, recorder.spans),
+    }
+
+
+def save_workbook(
+    workbook: openpyxl.Workbook,
+    path,
+    rendered_sheets: dict = None,
+    compression_policy: dict = None,
 ):
+    """Save the workbook, using the XML parts of the sheets rendered in the
+    process pool instead of their placeholders, and compressing the parts
+    according to the compression policy
+
+    Parameters
+    ----------
+    workbook : openpyxl.Workbook
+        Workbook to save
+    path : str or file-like object
+        Path or file object to save the workbook to
+    rendered_sheets : dict, optional
+        Dict of the rendered sheets returned by write_sheets
+    compression_policy : dict, optional
+        Compression policy overriding keys of DEFAULT_COMPRESSION_POLICY
+    """
+
+    compression_policy = {
+        **DEFAULT_COMPRESSION_POLICY,
+        **(compression_policy or {}),
+    }
+
+    with use_zlib_implementation(compression_policy["zlib_implementation"]):
+        with CompressionPolicyZipFile(path, compression_policy) as archive:
+            RenderedSheetsWriter(
+                workbook, archive, rendered_sheets or {}
+            ).save()
+
+
+def get_compression_report(
+    workbook: openpyxl.Workbook,
+    rendered_sheets: dict = None,
+    xml_levels: tuple = (1, 3, 6, 9),
+) -> pd.DataFrame:
+    """Save the workbook in memory with a range of compression policies and
+    measure the size and time it takes for each
+
+    Parameters
+    ----------
+    workbook : openpyxl.Workbook
+        Workbook to save
+    rendered_sheets : dict, optional
+        Dict of the rendered sheets returned by write_sheets
+    xml_levels : tuple, optional
+        Deflate levels to try for the XML parts, by default (1, 3, 6, 9)
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe with the policy, size in bytes and saving time in seconds
+        for every combination, from the smallest workbook to the biggest
+    """
+
+    zlib_implementations = [
+        implementation
+        for implementation in ZLIB_IMPLEMENTATIONS
+        if get_zlib_module(implementation) is not None
+    ]
+
+    report = []
+
+    for implementation, xml_level, store_media in itertools.product(
+        zlib_implementations, xml_levels, (True, False)
+    ):
+        compression_policy = {
+            "store_media": store_media,
+            "xml_level": xml_level,
+            "zlib_implementation": implementation,
+        }
+
+        output = BytesIO()
+        start = time.perf_counter()
+        save_workbook(workbook, output, rendered_sheets, compression_policy)
+        duration = time.perf_counter() - start
+
+        report.append(
+            {
+                **compression_policy,
+                "size": output.getbuffer().nbytes,
+                "time": round(duration, 3),
+            }
+        )
+
+    return pd.DataFrame(report).sort_values(
+        ["size", "time"], ignore_index=True
+    )
+
+
+def get_workbook_cost_report(path) -> pd.DataFrame:
+    """Measure what every sheet of a saved workbook costs, reading the
+    worksheet parts of the archive as a stream of XML elements: number of
+    cells, distinct styles, data validations, conditional formatting rules
+    and merged ranges, and the size of the XML part, drawing and images
+
+    Parameters
+    ----------
+    path : str or file-like object
+        Path or file object of the saved workbook
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe with the costs of every sheet, in the order of the
+        workbook. Sizes are in bytes, an image displayed in several sheets
+        is counted in every one of them
+    """
+
+    report = []
+
+    with zipfile.ZipFile(path) as archive:
+        workbook_part = "xl/workbook.xml"
+        sheet_parts = get_relationship_targets(archive, workbook_part)
+        workbook_xml = lxml.etree.fromstring(archive.read(workbook_part))
+
+        for sheet in workbook_xml.iter(f"{{{SPREADSHEET_NAMESPACE}}}sheet"):
+            sheet_part = sheet_parts[
+                sheet.get(f"{{{DOCUMENT_RELATIONSHIPS_NAMESPACE}}}id")
+            ]
+            sheet_costs = {"sheet": sheet.get("name")}
+            sheet_costs.update(get_sheet_cost(archive, sheet_part))
+            report.append(sheet_costs)
+
+    return pd.DataFrame(report)
+
+
+def get_sheet_cost(archive: zipfile.ZipFile, sheet_part: str) -> dict:
+    """Count the elements of a worksheet part without loading it, and get
+    the size of the part and of its drawing and images
+
+    Parameters
+    ----------
+    archive : zipfile.ZipFile
+        Archive of the workbook
+    sheet_part : str
+        Path of the worksheet part in the archive
+
+    Returns
+    -------
+    dict
+        Dict of the costs of the sheet
+    """
+
+    costs = {name: 0 for name in SHEET_COST_ELEMENTS}
+    counted_tags = {
+        f"{{{SPREADSHEET_NAMESPACE}}}{tag}": name
+        for name, tag in SHEET_COST_ELEMENTS.items()
+    }
+    styles = set()
+
+    with archive.open(sheet_part) as f:
+        for _, element in lxml.etree.iterparse(f, tag=list(counted_tags)):
+            costs[counted_tags[element.tag]] += 1
+
+            if counted_tags[element.tag] == "cells":
+                styles.add(element.get("s", "0"))
+
+            element.clear(keep_tail=True)
+
+    part_info = archive.getinfo(sheet_part)
+    costs["styles"] = len(styles)
+    costs["xml_size"] = part_info.file_size
+    costs["xml_compressed_size"] = part_info.compress_size
+    costs["drawing_size"] = 0
+    costs["media_size"] = 0
+
+    for drawing_part in get_relationship_targets(
+        archive, sheet_part, "/drawing"
+    ).values():
+        costs["drawing_size"] += archive.getinfo(drawing_part).file_size
+
+        for media_part in get_relationship_targets(
+            archive, drawing_part, "/image"
+        ).values():
+            costs["media_size"] += archive.getinfo(media_part).file_size
+
+    return costs
+
+
+def get_relationship_targets(
+    archive: zipfile.ZipFile, part: str, type_suffix: str = ""
+) -> dict:
+    """Get the parts targeted by the relationships of a part
+
+    Parameters
+    ----------
+    archive : zipfile.ZipFile
+        Archive of the workbook
+    part : str
+        Path of the part in the archive
+    type_suffix : str, optional
+        End of the type of the relationships to keep i.e. "/image", all the
+        relationships are kept by default
+
+    Returns
+    -------
+    dict
+        Dict of the paths of the targeted parts in the archive, by
+        relationship id
+    """
+
+    rels_part = posixpath.join(
+        posixpath.dirname(part), "_rels", f"{posixpath.basename(part)}.rels"
+    )
+
+    if rels_part not in archive.namelist():
+        return {}
+
+    targets = {}
+    rels_xml = lxml.etree.fromstring(archive.read(rels_part))
+
+    for relationship in rels_xml.iter(
+        f"{{{RELATIONSHIPS_NAMESPACE}}}Relationship"
+    ):
+        if not relationship.get("Type").endswith(type_suffix):
+            continue
+
+        target = relationship.get("Target")
+
+        # targets are relative to the folder of the part, or to the root of
+        # the archive if they start with a slash
+        if target.startswith("/"):
+            targets[relationship.get("Id")] = target[1:]
+        else:
+            targets[relationship.get("Id")] = posixpath.normpath(
+                posixpath.join(posixpath.dirname(part), target)
+            )
+
+    return targets
+
+
+def get_zlib_module(implementation: str):
+    """Import the module of the given zlib compatible implementation
+
+    Parameters
+    ----------
+    implementation : str
+        Name of the implementation, key of ZLIB_IMPLEMENTATIONS
+
+    Returns
+    -------
+    module
+        zlib compatible module or None if it is not installed
+    """
+
+    try:
+        return importlib.import_module(ZLIB_IMPLEMENTATIONS[implementation])
+    except ImportError:
+        return None
+
+
+@contextlib.contextmanager
+def use_zlib_implementation(implementation: str):
+    """Make zipfile compress the parts with the given zlib compatible
+    implementation, falling back to zlib if it is not installed
+
+    Parameters
+    ----------
+    implementation : str
+        Name of the implementation, key of ZLIB_IMPLEMENTATIONS
+    """
+
+    zlib_module = get_zlib_module(implementation)
+
+    if zlib_module is None:
+        print(
+            f"{ZLIB_IMPLEMENTATIONS[implementation]} is not installed, "
+            "using zlib"
+        )
+        zlib_module = zlib
+
+    original_zlib_module = zipfile.zlib
+    zipfile.zlib = zlib_module
+
+    try:
+        yield
+    finally:
+        zipfile.zlib = original_zlib_module
+
+
+class CompressionPolicyZipFile(zipfile.ZipFile):
+    """ZipFile choosing the compression of every part written in it
+    according to a compression policy:
+    - media parts (already compressed images) are stored as is if
+    store_media is set
+    - the other parts are deflated at xml_level, or stored if it is 0
+
+    Parameters
+    ----------
+    file : str or file-like object
+        Path or file object to write the archive to
+    compression_policy : dict
+        Compression policy with the keys of DEFAULT_COMPRESSION_POLICY
+    """
+
+    def __init__(self, file, compression_policy: dict):
+        super().__init__(file, "w", zipfile.ZIP_DEFLATED, allowZip64=True)
+        self.compression_policy = compression_policy
+
+    def get_compression(self, arcname: str) -> tuple:
+        """Get the compression type and level for the given part
+
+        Parameters
+        ----------
+        arcname : str
+            Name of the part in the archive
+
+        Returns
+        -------
+        tuple
+            Compression type and level to pass to zipfile
+        """
+
+        if (
+            self.compression_policy["store_media"]
+            and Path(arcname).suffix.lower() in MEDIA_EXTENSIONS
+        ):
+            return zipfile.ZIP_STORED, None
+
+        if self.compression_policy["xml_level"] == 0:
+            return zipfile.ZIP_STORED, None
+
+        return zipfile.ZIP_DEFLATED, self.compression_policy["xml_level"]
+
+    def write(
+        self, filename, arcname=None, compress_type=None, compresslevel=None
+    ):
+        if compress_type is None:
+            compress_type, compresslevel = self.get_compression(
+                arcname or filename
+            )
+
+        super().write(filename, arcname, compress_type, compresslevel)
+
+    def writestr(
+        self, zinfo_or_arcname, data, compress_type=None, compresslevel=None
+    ):
+        if compress_type is None:
+            compress_type, compresslevel = self.get_compression(
+                getattr(zinfo_or_arcname, "filename", zinfo_or_arcname)
+            )
+
+        super().writestr(zinfo_or_arcname, data, compress_type, compresslevel)
+
+
+class RenderedSheetsWriter(ExcelWriter):
+    """openpyxl ExcelWriter writing pre-rendered worksheet XML parts, after
+    registering their styles in the workbook style tables and updating
+    their style indexes, and images from the original bytes of their
+    in-memory buffers, identical images sharing a single media part
+
+    Parameters
+    ----------
+    workbook : openpyxl.Workbook
+        Workbook to save
+    archive : zipfile.ZipFile
+        Archive to write the workbook in
+    rendered_sheets : dict
+        Dict of the rendered sheets returned by write_sheets
+    """
+
+    def __init__(self, workbook, archive, rendered_sheets):
+        super().__init__(workbook, archive)
+        self.rendered_sheets = rendered_sheets
+        # first image written for the hash of every in-memory image
+        self.shared_images = {}
+
+    def _write_drawing(self, drawing):
+        # same as openpyxl but images with identical bytes share a single
+        # media part, referenced by the drawings of every sheet using it
+        self._drawings.append(drawing)
+        drawing._id = len(self._drawings)
+
+        for chart in drawing.charts:
+            self._charts.append(chart)
+            chart._id = len(self._charts)
+
+        for img in drawing.images:
+            image_hash = get_image_hash(img)
+
+            if image_hash in self.shared_images:
+                img._id = self.shared_images[image_hash]._id
+                continue
+
+            self._images.append(img)
+            img._id = len(self._images)
+
+            if image_hash:
+                self.shared_images[image_hash] = img
+
+        rels_path = get_rels_path(drawing.path)[1:]
+        self._archive.writestr(drawing.path[1:], tostring(drawing._write()))
+        self._archive.writestr(rels_path, tostring(drawing._write_rels()))
+        self.manifest.append(drawing)
+
+    def _write_images(self):
+        # openpyxl closes the file of the image after reading it, write the
+        # original bytes of the in-memory buffers directly so that they can
+        # be shared between images and saved again (other formats are
+        # converted to PNG by openpyxl)
+        for img in self._images:
+            if get_image_hash(img):
+                self._archive.writestr(img.path[1:], img.ref.getvalue())
+            else:
+                self._archive.writestr(img.path[1:], img._data())
+
+    def write_worksheet(self, ws):
+        if ws.title not in self.rendered_sheets:
+            return super().write_worksheet(ws)
+
+        rendered_sheet = self.rendered_sheets[ws.title]
+
+        style_ids = []
+
+        for style in rendered_sheet["styles"]:
+            # register the style through a detached cell so that openpyxl
+            # assigns its indexes in this workbook
+            style_cell = Cell(ws)
+
+            for attribute, value in style.items():
+                setattr(style_cell, attribute, value)
+
+            style_ids.append(style_cell.style_id)
+
+        xml = STYLE_ID_REGEX.sub(
+            lambda match: match[1]
+            + str(style_ids[int(match[2])]).encode()
+            + match[3],
+            rendered_sheet["xml"],
+        )
+
+        ws._drawing = SpreadsheetDrawing()
+        ws._comments = []
+        ws._rels = RelationshipList()
+        self._archive.writestr(ws.path[1:], xml)
+        self.manifest.append(ws)
+
+
+def get_image_hash(image: drawing.image.Image) -> str:
+    """Get the hash of the bytes of an image read in memory, that can be
+    written as is in the workbook
+
+    Parameters
+    ----------
+    image : drawing.image.Image
+        openpyxl image
+
+    Returns
+    -------
+    str
+        SHA256 of the bytes of the image or None if the image is not in a
+        memory buffer or needs to be converted by openpyxl
+    """
+
+    if isinstance(image.ref, BytesIO) and image.format in MEDIA_FORMATS:
+        return hashlib.sha256(image.ref.getbuffer()).hexdigest()
+
+    return None
+
+
+def write_cell_content(sheet: Worksheet, config_data: dict, qc_record: dict):
     """Write the tables from the config
 
     Parameters
@@ -115,14 +940,17 @@ def write_cell_content(
     sheet : Worksheet
         Worksheet to write the tables into
     config_data : dict
-        Dict of tables to write
-    html_tables: list
-        List of dict for the tables extracted from the HTML
-    soup: BeautifulSoup
-        HTML page
+        Dict of tables to write or ConfigLayers view over several of them
+    qc_record: dict
+        QC record built from the tables and text of the HTML
     """
 
-    for cell_pos, value in config_data.items():
+    if isinstance(config_data, misc.ConfigLayers):
+        cells = config_data.iter_items()
+    else:
+        cells = config_data.items()
+
+    for cell_pos, value in cells:
         cell_x, cell_y = cell_pos
 
         if type(value) in [str, float, int]:
@@ -137,11 +965,11 @@ def write_cell_content(
                 column,
                 formatting,
             ) in value:
-                subvalue = get_table_value_in_html_table(
+                subvalue = get_table_value_in_qc_record(
                     table_name_in_config,
                     row,
                     column,
-                    html_tables,
+                    qc_record,
                     formatting,
                 )
                 value_to_write.append(subvalue)
@@ -151,25 +979,16 @@ def write_cell_content(
         # single value to add in the table
         elif type(value) is tuple:
             table_name_in_config, row, column = value
-            value_to_write = get_table_value_in_html_table(
-                table_name_in_config, row, column, html_tables
+            value_to_write = get_table_value_in_qc_record(
+                table_name_in_config, row, column, qc_record
             )
 
         elif value is None:
             value_to_write = ""
 
         else:
-            # special hardcoded case, haven't found a way to make that
-            # better for now (which means it'll probably stay that way
-            # forever)
-            value_to_write = value(
-                soup,
-                "b",
-                (
-                    "Total number of somatic non-synonymous small "
-                    "variants per megabase"
-                ),
-            )
+            # function getting the value from the QC record i.e. TMB
+            value_to_write = value(qc_record)
 
         sheet.cell(cell_x, cell_y).value = value_to_write
 
@@ -273,7 +1092,8 @@ def draw_borders(sheet: Worksheet, config_data: dict):
 
 
 def generate_dropdowns(sheet: Worksheet, config_data: dict):
-    """Write in the dropdown menus
+    """Write in the dropdown menus. Dropdowns with the same options and title
+    share a single data validation covering all their cells
 
     Parameters
     ----------
@@ -283,19 +1103,26 @@ def generate_dropdowns(sheet: Worksheet, config_data: dict):
         Dict of data for the dropdown menus
     """
 
+    cells_per_dropdown = {}
+
     for dropdown_info in config_data:
         for cells, options in dropdown_info["cells"].items():
-            dropdown = DataValidation(
-                type="list", formula1=options, allow_blank=True
-            )
-            dropdown.prompt = "Select from the list"
-            dropdown.promptTitle = dropdown_info["title"]
-            dropdown.showInputMessage = True
-            dropdown.showErrorMessage = True
-            sheet.add_data_validation(dropdown)
-
-            for cell in cells:
-                dropdown.add(sheet[cell])
+            cells_per_dropdown.setdefault(
+                (options, dropdown_info["title"]), []
+            ).extend(cells)
+
+    for (options, title), cells in cells_per_dropdown.items():
+        dropdown = DataValidation(
+            type="list",
+            formula1=options,
+            allow_blank=True,
+            sqref=" ".join(misc.convert_cells_to_ranges(cells)),
+        )
+        dropdown.prompt = "Select from the list"
+        dropdown.promptTitle = title
+        dropdown.showInputMessage = True
+        dropdown.showErrorMessage = True
+        sheet.add_data_validation(dropdown)
 
 
 def insert_images(sheet: Worksheet, config_data: dict, images: list):
@@ -313,8 +1140,8 @@ def insert_images(sheet: Worksheet, config_data: dict, images: list):
 
     for image_data in config_data:
         height, width = image_data["size"]
-        image_pil_obj = Image.open(images[image_data["img_index"]])
-        image = drawing.image.Image(image_pil_obj)
+        # the buffers are shared between the sheets using the same image
+        image = drawing.image.Image(images[image_data["img_index"]])
         image.height = height
         image.width = width
         image.anchor = image_data["cell"]
@@ -1,71 +1,428 @@
+import base64
+from concurrent.futures import Future, ThreadPoolExecutor
+import copy
+from io import BytesIO, StringIO
 import re
+import urllib.parse
 import urllib.request
 
-from bs4 import BeautifulSoup
-from bs4 import MarkupResemblesLocatorWarning
+import lxml.etree
+import lxml.html
 import pandas as pd
 from PIL import Image
+import urllib3
 
-import warnings
+# connect and read timeouts in seconds for fetching an image
+IMAGE_FETCH_TIMEOUT = urllib3.Timeout(connect=10, read=60)
 
-warnings.filterwarnings("ignore", category=MarkupResemblesLocatorWarning)
+# retries with exponential backoff on connection errors and server errors
+IMAGE_FETCH_RETRIES = urllib3.Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=[500, 502, 503, 504],
+    raise_on_status=False,
+)
 
+# number of bytes of the HTML file parsed at once
+HTML_CHUNK_SIZE = 1024 * 1024
 
-def open_html(file: str) -> BeautifulSoup:
-    """Open HTML file using BeautifulSoup
+# data URI in a src attribute, with the opening quote and the header. The
+# attribute follows a space or a quote so that i.e. data-src isn't matched
+DATA_URI_REGEX = re.compile(
+    rb"""(?<=[\s"'])(src\s*=\s*["'])data:([^,"']*),""", re.I
+)
+
+# longest data URI header kept between chunks of the HTML file
+DATA_URI_MAX_HEADER_SIZE = 256
+
+# opening of a tag or end of a tag, to find the tag a data URI is in. Only
+# the data URIs of the img tags are figures
+TAG_REGEX = re.compile(rb"<([a-z][\w:-]*)|>", re.I)
+
+# longest tag name the chunks of the HTML file are not cut in
+MAX_TAG_SIZE = 64
+
+# replaces the data URIs given to the HTML parser, followed by their index
+DATA_URI_PLACEHOLDER = "data-uri:"
+
+
+def extract_html(file: str, workers: int = 8) -> tuple:
+    """Walk the HTML file incrementally with lxml, keeping only the tables and
+    the bold tags with the text following them in a small tree. Embedded
+    images are decoded from their data URI while the file is read and images
+    referenced by URL are fetched concurrently over a pool of keep-alive
+    connections as soon as their tag is parsed. The other elements are
+    cleared as the document is parsed so that the memory used doesn't
+    depend on the size of the page
 
     Parameters
     ----------
     file : str
         File path to the HTML
+    workers : int, optional
+        Number of images fetched at the same time, by default 8
 
     Returns
     -------
-    BeautifulSoup
-        BeautifulSoup object for the HTML page
+    tuple
+        - lxml.html.HtmlElement root of the tree with the tables and the
+        bold tags of the HTML page
+        - List of in-memory buffers for the images in the HTML
     """
 
-    with open(file) as f:
-        return BeautifulSoup(f, features="lxml")
+    html = lxml.html.Element("html")
+    body = lxml.etree.SubElement(html, "body")
+    images = []
+    data_uris = []
+    table_depth = 0
+
+    http = urllib3.PoolManager(
+        maxsize=workers,
+        timeout=IMAGE_FETCH_TIMEOUT,
+        retries=IMAGE_FETCH_RETRIES,
+    )
+
+    with http, ThreadPoolExecutor(max_workers=workers) as executor:
+        for event, element in iterparse_html(file, data_uris):
+            if element.tag == "table":
+                table_depth += 1 if event == "start" else -1
+
+            elif event == "end" and element.tag == "img":
+                src = element.get("src")
+
+                if src.startswith(DATA_URI_PLACEHOLDER):
+                    images.append(
+                        data_uris[int(src[len(DATA_URI_PLACEHOLDER) :])]
+                    )
+                else:
+                    images.append(executor.submit(fetch_image, src, http))
+
+                element.clear(keep_tail=True)
+
+            # the content of the tables is needed until the end of the
+            # outermost table
+            if event == "start" or table_depth:
+                continue
+
+            if element.tag == "table":
+                body.append(copy.deepcopy(element))
 
+            # the text following a tag is only parsed at the end of its
+            # parent
+            for child in element.iterchildren("b"):
+                body.append(copy.deepcopy(child))
 
-def download_images(html: BeautifulSoup) -> list:
-    """Get all images in the BeautifulSoup object
+            if element.tag != "b":
+                element.clear(keep_tail=True)
+
+        images = [
+            image.result() if isinstance(image, Future) else image
+            for image in images
+        ]
+
+    if len(images) >= 2:
+        figure_2 = Image.open(images[1])
+        cropped_figure_2 = figure_2.crop((600, 600, 2400, 2400))
+        images[1] = BytesIO()
+        cropped_figure_2.save(images[1], format=figure_2.format)
+
+    return html, images
+
+
+def iterparse_html(file: str, data_uris: list):
+    """Parse the HTML file incrementally. The payloads of the data URIs are
+    decoded straight from the file as it is read and replaced by a
+    placeholder before being given to lxml, so that the parser never holds
+    the embedded images
 
     Parameters
     ----------
-    html : BeautifulSoup
-        BeautifulSoup object
+    file : str
+        File path to the HTML
+    data_uris : list
+        List in which the decoded data URIs are appended, the placeholder
+        containing their index in the list
+
+    Yields
+    ------
+    tuple
+        Event ("start" or "end") and element
+    """
+
+    parser = lxml.etree.HTMLPullParser(
+        events=("start", "end"), encoding="utf-8"
+    )
+
+    with open(file, "rb") as f:
+        for chunk in strip_data_uris(f, data_uris):
+            parser.feed(chunk)
+            yield from parser.read_events()
+
+    parser.close()
+    yield from parser.read_events()
+
+
+def strip_data_uris(f, data_uris: list):
+    """Read the HTML file by chunks, decoding the data URIs of the src
+    attributes of the img tags and replacing them by a placeholder. The
+    data URIs of other tags i.e. scripts or stylesheets are left as they are
+
+    Parameters
+    ----------
+    f : file object
+        HTML file opened in binary mode
+    data_uris : list
+        List in which the decoded data URIs are appended
+
+    Yields
+    ------
+    bytes
+        Chunk of the HTML file without the data URIs of the img tags
+    """
+
+    buffer = b""
+    # tag the end of the text yielded so far is in
+    tag = None
+
+    while True:
+        chunk = f.read(HTML_CHUNK_SIZE)
+        buffer += chunk
+        match = DATA_URI_REGEX.search(buffer)
+
+        if match is None:
+            if not chunk:
+                yield buffer
+                return
+
+            # keep the end of the buffer in case a data URI starts there,
+            # with the character before it, without cutting a tag name
+            end = max(len(buffer) - DATA_URI_MAX_HEADER_SIZE - 1, 0)
+            tag_start = buffer.rfind(b"<", max(end - MAX_TAG_SIZE, 0), end)
+
+            if tag_start != -1:
+                end = tag_start
+
+            tag = get_open_tag(buffer[:end], tag)
+            yield buffer[:end]
+            buffer = buffer[end:]
+            continue
+
+        tag = get_open_tag(buffer[: match.start()], tag)
+        quote = match[1][-1:]
+
+        if tag != b"img":
+            yield buffer[: match.end()]
+            buffer = yield from copy_attribute_value(
+                f, buffer[match.end() :], quote
+            )
+            continue
+
+        yield buffer[: match.end(1)]
+        yield f"{DATA_URI_PLACEHOLDER}{len(data_uris)}".encode()
+
+        image, buffer = read_data_uri(
+            f, buffer[match.end() :], quote, match[2]
+        )
+        data_uris.append(image)
+
+
+def get_open_tag(text: bytes, tag: bytes = None) -> bytes:
+    """Get the tag the end of a part of the HTML file is in
+
+    Parameters
+    ----------
+    text : bytes
+        Part of the HTML file
+    tag : bytes, optional
+        Tag the start of the part is in, by default None for none
 
     Returns
     -------
-    list
-        List of images in the HTML
+    bytes
+        Lowercase name of the tag, None if the end is outside of any tag
     """
 
-    images = []
+    for match in TAG_REGEX.finditer(text):
+        tag = match[1].lower() if match[1] else None
 
-    for i, img in enumerate(html.findAll("img"), 1):
-        img_path = f"figure_{i}.jpg"
-        urllib.request.urlretrieve(img.get("src"), img_path)
+    return tag
 
-        if i == 2:
-            figure_2 = Image.open(img_path)
-            cropped_figure_2 = figure_2.crop((600, 600, 2400, 2400))
-            cropped_figure_2.save(img_path)
 
-        images.append(img_path)
+def copy_attribute_value(f, buffer: bytes, quote: bytes):
+    """Yield the HTML file until the closing quote of an attribute
 
-    return images
+    Parameters
+    ----------
+    f : file object
+        HTML file opened in binary mode
+    buffer : bytes
+        Part of the HTML file already read, starting in the attribute value
+    quote : bytes
+        Quote closing the attribute
 
+    Yields
+    ------
+    bytes
+        Chunk of the attribute value
+
+    Returns
+    -------
+    bytes
+        Part of the HTML file read after the attribute value, starting with
+        the closing quote
+    """
+
+    while quote not in buffer:
+        yield buffer
+        buffer = f.read(HTML_CHUNK_SIZE)
+
+        if not buffer:
+            return buffer
+
+    end = buffer.index(quote)
+    yield buffer[:end]
+
+    return buffer[end:]
+
+
+def read_data_uri(f, buffer: bytes, quote: bytes, header: bytes) -> tuple:
+    """Decode the payload of a data URI until the closing quote of the
+    attribute, base64 payloads being decoded chunk by chunk
+
+    Parameters
+    ----------
+    f : file object
+        HTML file opened in binary mode
+    buffer : bytes
+        Part of the HTML file already read, starting with the payload
+    quote : bytes
+        Quote closing the attribute
+    header : bytes
+        Media type and parameters of the data URI
+
+    Returns
+    -------
+    tuple
+        - BytesIO buffer of the decoded image
+        - Part of the HTML file read after the data URI
+    """
+
+    image = BytesIO()
+    is_base64 = header.endswith(b";base64")
+    # base64 characters left from the previous chunk, the decoded chunks
+    # need to be a multiple of 4 characters
+    remainder = b""
+
+    while True:
+        end = buffer.find(quote)
+        payload = buffer if end == -1 else buffer[:end]
+
+        if is_base64:
+            payload = remainder + b"".join(payload.split())
+            decoded_end = len(payload) - len(payload) % 4
+            image.write(base64.b64decode(payload[:decoded_end]))
+            remainder = payload[decoded_end:]
+        else:
+            # percent-encoded payloads are decoded once complete
+            remainder += payload
+
+        if end != -1:
+            break
+
+        buffer = f.read(HTML_CHUNK_SIZE)
+
+        if not buffer:
+            raise ValueError("Unterminated data URI in the HTML file")
+
+    if is_base64 and remainder:
+        raise ValueError("Invalid base64 payload in image data URI")
+
+    if not is_base64:
+        image.write(urllib.parse.unquote_to_bytes(remainder))
+
+    image.seek(0)
+
+    return image, buffer[end:]
 
-def get_tables(html: str) -> list:
-    """Get all the tables in the HTML
+
+def fetch_image(src: str, http: urllib3.PoolManager) -> BytesIO:
+    """Read the image at the given URL in memory
+
+    Parameters
+    ----------
+    src : str
+        URL of the image
+    http : urllib3.PoolManager
+        Connection pool to fetch HTTP(S) URLs with
+
+    Returns
+    -------
+    BytesIO
+        In-memory buffer of the image
+    """
+
+    if urllib.parse.urlparse(src).scheme not in ["http", "https"]:
+        # local files
+        with urllib.request.urlopen(src) as response:
+            return BytesIO(response.read())
+
+    response = http.request("GET", src)
+
+    if response.status != 200:
+        raise ValueError(
+            f"Couldn't fetch image {src}: HTTP status {response.status}"
+        )
+
+    return BytesIO(response.data)
+
+
+def downscale_images(images: list, display_sizes: dict, dpi_factor: float = 1):
+    """Resample the images to the largest size they are displayed at in the
+    workbook, multiplied by the DPI factor. The images are replaced in the
+    list, images that are already small enough are kept as is
 
     Parameters
     ----------
-    html : str
-        File path to the HTML file
+    images : list
+        List of in-memory buffers for the images in the HTML
+    display_sizes : dict
+        Dict of the largest (height, width) display size for every image
+        index
+    dpi_factor : float, optional
+        Number of image pixels per displayed pixel, by default 1
+    """
+
+    for img_index, (height, width) in display_sizes.items():
+        image = Image.open(images[img_index])
+        image_format = image.format
+        # scale covering the display size in both dimensions, keeping the
+        # aspect ratio of the image
+        scale = max(
+            width * dpi_factor / image.width,
+            height * dpi_factor / image.height,
+        )
+
+        if scale >= 1:
+            continue
+
+        size = (round(image.width * scale), round(image.height * scale))
+        # let the JPEG decoder downscale by a power of 2 while decoding,
+        # then reduce by an integer factor before the final resampling
+        image.draft("RGB", size)
+        image = image.resize(size, Image.LANCZOS, reducing_gap=2.0)
+
+        images[img_index] = BytesIO()
+        image.save(images[img_index], format=image_format, quality=90)
+
+
+def get_tables(html: lxml.html.HtmlElement) -> list:
+    """Get all the tables in the HTML, the nested tables being read by
+    pandas from the table containing them
+
+    Parameters
+    ----------
+    html : lxml.html.HtmlElement
+        Root element of the HTML page
 
     Returns
     -------
@@ -73,16 +430,26 @@ def get_tables(html: str) -> list:
         List of dataframes for the tables in the HTML file
     """
 
-    return pd.read_html(html)
+    # only the tables are serialised for pandas, not the rest of the page
+    # with the embedded figures
+    tables = "".join(
+        lxml.html.tostring(table, encoding="unicode", with_tail=False)
+        for table in html.iter("table")
+        if next(table.iterancestors("table"), None) is None
+    )
+
+    return pd.read_html(StringIO(tables))
 
 
-def get_tag_sibling(soup: BeautifulSoup, tag: str, pattern: str) -> str:
+def get_tag_sibling(
+    html: lxml.html.HtmlElement, tag: str, pattern: str
+) -> str:
     """Given a tag and a pattern, get the adjacent element value
 
     Parameters
     ----------
-    soup : BeautifulSoup
-        Beautiful soup object
+    html : lxml.html.HtmlElement
+        Root element of the HTML page
     tag : str
         Tag to look the pattern in
     pattern : str
@@ -91,7 +458,13 @@ def get_tag_sibling(soup: BeautifulSoup, tag: str, pattern: str) -> str:
     Returns
     -------
     str
-        Value of the next sibling
+        Value of the text following the tag
     """
 
-    return soup.find(tag, text=re.compile(pattern)).next_sibling.strip()
+    for element in html.iter(tag):
+        # same as matching the string of the tag, only tags containing text
+        # only are matched
+        if len(element) == 0 and re.search(pattern, element.text or ""):
+            return element.tail.strip()
+
+    return None
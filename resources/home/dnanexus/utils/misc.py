@@ -1,16 +1,32 @@
+from collections.abc import Mapping
+import hashlib
 import importlib
-from pathlib import Path
+import itertools
+import re
 import string
 from types import ModuleType
-from typing import Optional
+from typing import Iterable, Optional
 
 import pandas as pd
 
-# conditional path depending on whether the script is run on DNAnexus or not
-if Path("/home/dnanexus").exists():
-    CONFIG_PATH = Path("/home/dnanexus/configs")
-else:
-    CONFIG_PATH = Path("resources/home/dnanexus/configs")
+# config module of every sheet, by lowercase sheet name
+SHEET_CONFIGS = {
+    "soc": "configs.soc",
+    "qc": "configs.qc",
+    "plot": "configs.plot",
+    "signatures": "configs.signatures",
+    "snv": "configs.snv",
+    "gain": "configs.gain",
+    "loss": "configs.loss",
+    "sv": "configs.sv",
+    "germline": "configs.germline",
+    "summary": "configs.summary",
+    "refgene": "configs.refgene",
+    "bioinformatics": "configs.bioinformatics",
+}
+
+# line of python -X importtime: self time, cumulative time, indented module
+IMPORT_TIME_REGEX = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
 
 
 def select_config(name_config: str) -> Optional[ModuleType]:
@@ -28,82 +44,219 @@ def select_config(name_config: str) -> Optional[ModuleType]:
         the names do not matches
     """
 
-    for config in CONFIG_PATH.glob("*.py"):
-        module_name = config.name.replace(".py", "")
+    module_name = SHEET_CONFIGS.get(name_config.lower())
 
-        if name_config.lower() == module_name:
-            return importlib.import_module(
-                f".{module_name}", f"{config.parts[-2]}"
-            )
+    if module_name is None:
+        return None
 
-    return None
+    return importlib.import_module(module_name)
 
 
-def merge_dicts(original_dict: dict, new_dict: dict) -> dict:
-    """Recursive function to merge 2 dicts:
-    - Get unique keys from both dicts
-    - Get common keys:
-        - if values for those keys are lists, concatenate them
-        - if values for those keys are dicts, get the values and run them
-        through the process from the top
+def parse_import_times(log: str) -> dict:
+    """Parse the output of python -X importtime, keeping the modules imported
+    at the top level i.e. not as a dependency of another module
 
     Parameters
     ----------
-    original_dict : dict
-        First dict to merge
-    new_dict : dict
-        Second dict to merge
+    log : str
+        Standard error of python -X importtime
 
     Returns
     -------
     dict
-        Dict containing merged data from both dicts
+        Dict of the cumulative import time in microseconds of the top level
+        modules, in import order
     """
 
-    unique_original_dict_keys = [
-        left_key for left_key in original_dict if left_key not in new_dict
-    ]
+    import_times = {}
+
+    for line in log.splitlines():
+        match = IMPORT_TIME_REGEX.match(line)
+
+        # nested imports are indented by 2 spaces per level
+        if match and len(match[3]) == 1:
+            import_times[match[4]] = int(match[2])
+
+    return import_times
+
+
+def get_file_hash(file: str) -> str:
+    """Get the hash of the content of a file, read by chunks
+
+    Parameters
+    ----------
+    file : str
+        Path to the file
+
+    Returns
+    -------
+    str
+        Hexadecimal SHA256 hash of the file
+    """
+
+    file_hash = hashlib.sha256()
+
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+def get_image_display_sizes(sheet_names: list) -> dict:
+    """Get the largest size every image is displayed at in the configs of
+    the given sheets
+
+    Parameters
+    ----------
+    sheet_names : list
+        Names of the sheets
+
+    Returns
+    -------
+    dict
+        Dict of the largest (height, width) display size for every image
+        index
+    """
+
+    display_sizes = {}
+
+    for sheet_name in sheet_names:
+        type_config = select_config(sheet_name)
+
+        for image_data in type_config.get_config().get("images", []):
+            height, width = image_data["size"]
+            max_height, max_width = display_sizes.get(
+                image_data["img_index"], (0, 0)
+            )
+            display_sizes[image_data["img_index"]] = (
+                max(height, max_height),
+                max(width, max_width),
+            )
+
+    return display_sizes
+
+
+class ConfigLayers(Mapping):
+    """Read-only view over config dicts stacked in layers i.e. the static
+    CONFIG and the dynamic values of a sheet, in the spirit of ChainMap.
+    Nothing is copied, values of keys present in several layers are resolved
+    when accessed:
+    - if values for those keys are lists, they are chained in layer order
+    - if values for those keys are dicts, a view over these dicts is returned
+    - otherwise, the value of the last layer is returned
+
+    Parameters
+    ----------
+    layers : dict
+        Config dicts, from the first layer to the last one
+    """
+
+    def __init__(self, *layers):
+        self.layers = [layer for layer in layers if layer]
+
+    def __getitem__(self, key):
+        values = [layer[key] for layer in self.layers if key in layer]
 
-    unique_new_dict_keys = [
-        right_key for right_key in new_dict if right_key not in original_dict
-    ]
+        if not values:
+            raise KeyError(key)
 
-    return_dict = {}
+        # if the types of the values for the same key are not the same,
+        # there's a problem
+        for value in values[1:]:
+            assert type(values[0]) is type(
+                value
+            ), f"Types are not identical {values[0]} | {value}"
 
-    # add all unique keys from both dicts
-    for key in unique_original_dict_keys:
-        return_dict[key] = original_dict[key]
+        if len(values) == 1:
+            return values[0]
 
-    for key in unique_new_dict_keys:
-        return_dict[key] = new_dict[key]
+        if type(values[0]) is list:
+            return itertools.chain(*values)
 
-    # get the common keys as it will require some processing
-    common_keys = set(original_dict.keys()).intersection(new_dict)
+        if type(values[0]) is dict:
+            return ConfigLayers(*values)
 
-    for key in common_keys:
-        original_value = original_dict[key]
-        new_value = new_dict[key]
+        return values[-1]
 
-        # if the types of the values for the same key are not the same, there's
-        # a problem
-        assert type(original_value) is type(
-            new_value
-        ), f"Types are not identical {original_value} | {new_value}"
+    def __iter__(self):
+        seen_keys = set()
 
-        # if the type of the values is a list, just concatenate them
-        if type(original_value) is list:
-            return_dict[key] = original_value + new_value
+        for layer in self.layers:
+            for key in layer:
+                if key not in seen_keys:
+                    seen_keys.add(key)
+                    yield key
 
-        # if the type of the values is a dict, run the function recursively
-        # until we reach keys that can be simply added or lists that we can
-        # concatenate
-        elif type(original_value) is dict:
-            return_dict[key] = merge_dicts(original_value, new_value)
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        return any(key in layer for layer in self.layers)
+
+    def __bool__(self):
+        return bool(self.layers)
+
+    def iter_items(self):
+        """Iterate over the items of every layer in order. Keys present in
+        several layers are yielded once per layer, so writing the items one
+        after the other gives the same result as writing the merged layers
+
+        Yields
+        ------
+        tuple
+            Key and value from a layer
+        """
+
+        for layer in self.layers:
+            yield from layer.items()
+
+
+def split_static_config(config: dict) -> tuple:
+    """Split a sheet config into the part that is identical for every case
+    and the part that depends on the case:
+    - cells to write with a value that needs to be looked up in the HTML
+    - images
+
+    Parameters
+    ----------
+    config : dict
+        Config dict for a sheet
+
+    Returns
+    -------
+    tuple
+        - Dict for the static part of the config
+        - Dict for the case specific part of the config
+    """
+
+    static_config = {}
+    case_config = {}
+
+    for key, value in config.items():
+        if key == "images":
+            case_config[key] = value
+
+        elif key == "cells_to_write":
+            static_cells = {}
+            case_cells = {}
+
+            for cell, cell_value in value.items():
+                if type(cell_value) in [str, float, int] or cell_value is None:
+                    static_cells[cell] = cell_value
+                else:
+                    case_cells[cell] = cell_value
+
+            if static_cells:
+                static_config[key] = static_cells
+
+            if case_cells:
+                case_config[key] = case_cells
 
         else:
-            return_dict[key] = new_value
+            static_config[key] = value
 
-    return return_dict
+    return static_config, case_config
 
 
 def split_confidence_support(value: str) -> list:
@@ -243,6 +396,53 @@ def convert_index_to_letters(index: int) -> str:
     return f"{additional_letter}{string.ascii_uppercase[index]}"
 
 
+def convert_cells_to_ranges(cells: Iterable) -> list:
+    """Group cells of the same column with consecutive rows into ranges i.e.
+    ["A1", "A2", "A3", "B5"] -> ["A1:A3", "B5"]
+
+    Parameters
+    ----------
+    cells : Iterable
+        Iterable of cells in "COL#" format
+
+    Returns
+    -------
+    list
+        List of ranges in "COL#:COL#" format, or "COL#" for single cells
+    """
+
+    rows_per_column = {}
+
+    for cell in cells:
+        match = re.fullmatch(r"([A-Z]+)([0-9]+)", cell)
+
+        if match is None:
+            raise ValueError(f"Cannot convert cell to a range: {cell}")
+
+        column, row = match.groups()
+        rows_per_column.setdefault(column, set()).add(int(row))
+
+    ranges = []
+
+    for column, rows in rows_per_column.items():
+        rows = sorted(rows)
+        start = end = rows[0]
+
+        for row in rows[1:] + [None]:
+            if row is not None and row == end + 1:
+                end = row
+                continue
+
+            if start == end:
+                ranges.append(f"{column}{start}")
+            else:
+                ranges.append(f"{column}{start}:{column}{end}")
+
+            start = end = row
+
+    return ranges
+
+
 def convert_3_letter_protein_to_1(string_element: str) -> str:
     """Convert the 3 letter protein to a 1 letter protein
 
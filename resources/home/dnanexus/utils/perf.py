@@ -0,0 +1,364 @@
+from collections import Counter
+import contextlib
+import cProfile
+import json
+from pathlib import Path
+import pstats
+import resource
+import time
+import tracemalloc
+
+# recorders of the runs being instrumented, the spans are added to the
+# innermost one
+RECORDERS = []
+
+PROFILE_MODES = ["cpu", "mem"]
+
+# number of allocation sites kept at the end of every span in mem mode
+ALLOCATION_SITES = 10
+
+# deepest spans at the end of which a snapshot of the allocations is taken
+# in mem mode, spans of depth 1 being the stages of a case
+SNAPSHOT_DEPTH = 1
+
+# paths of the collapsed stacks accounting for less time than that are
+# dropped, in seconds
+MIN_STACK_TIME = 1e-5
+
+
+class PerfRecorder:
+    """Spans recorded during a run, in the order they started"""
+
+    def __init__(self):
+        self.spans = []
+        self.start = time.perf_counter()
+        # depth of the next span, spans started in another span are nested
+        self.depth = 0
+        # values describing the run known during it, added to the report
+        self.metadata = {}
+
+
+@contextlib.contextmanager
+def recording():
+    """Record the spans of the code run in the context in a new recorder
+
+    Yields
+    ------
+    PerfRecorder
+        Recorder of the spans
+    """
+
+    recorder = PerfRecorder()
+    RECORDERS.append(recorder)
+
+    try:
+        yield recorder
+    finally:
+        RECORDERS.remove(recorder)
+
+
+@contextlib.contextmanager
+def span(name: str, **counts):
+    """Measure the wall time, CPU time and peak RSS increase of the code run
+    in the context. Nothing is measured if no recording is active
+
+    Parameters
+    ----------
+    name : str
+        Name of the span
+    counts : dict
+        Counts of the data handled in the span i.e. rows or cells
+
+    Yields
+    ------
+    dict
+        Dict of the counts, to add the counts known at the end of the span
+    """
+
+    if not RECORDERS:
+        yield counts
+        return
+
+    recorder = RECORDERS[-1]
+    record = {
+        "name": name,
+        "depth": recorder.depth,
+        "start": time.perf_counter() - recorder.start,
+    }
+    recorder.spans.append(record)
+    recorder.depth += 1
+
+    start_wall_time = time.perf_counter()
+    start_cpu_time = time.process_time()
+    start_peak_rss = get_peak_rss()
+
+    try:
+        yield counts
+    finally:
+        recorder.depth -= 1
+        record.update(
+            {
+                "wall_time": time.perf_counter() - start_wall_time,
+                "cpu_time": time.process_time() - start_cpu_time,
+                "peak_rss_delta": get_peak_rss() - start_peak_rss,
+                "counts": counts,
+            }
+        )
+
+        # the sheets and other nested spans are not snapshot, a snapshot
+        # taking seconds once the workbook holds many cells
+        if tracemalloc.is_tracing() and record["depth"] <= SNAPSHOT_DEPTH:
+            record["traced_memory"] = tracemalloc.get_traced_memory()[0]
+            record["allocation_sites"] = get_allocation_sites()
+
+
+def add_spans(start: float, spans: list):
+    """Add spans recorded in another process i.e. a worker process, nested
+    in the current span
+
+    Parameters
+    ----------
+    start : float
+        Start of the recorder of the other process, the monotonic clock
+        being shared by the processes of the machine
+    spans : list
+        List of the spans recorded in the other process
+    """
+
+    if not RECORDERS:
+        return
+
+    recorder = RECORDERS[-1]
+
+    for record in spans:
+        recorder.spans.append(
+            {
+                **record,
+                "depth": record["depth"] + recorder.depth,
+                "start": record["start"] + start - recorder.start,
+            }
+        )
+
+
+def add_metadata(**metadata):
+    """Add values describing the run to the report of the current recording
+    i.e. values only known by the stages. Nothing is added if no recording
+    is active
+
+    Parameters
+    ----------
+    metadata : dict
+        Values to add at the top of the report
+    """
+
+    if RECORDERS:
+        RECORDERS[-1].metadata.update(metadata)
+
+
+def get_peak_rss() -> int:
+    """Get the peak resident set size of the process
+
+    Returns
+    -------
+    int
+        Peak RSS in bytes
+    """
+
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def write_report(path: str, recorder: PerfRecorder, **metadata):
+    """Write the spans of the recorder in a JSON report
+
+    Parameters
+    ----------
+    path : str
+        Path to the JSON report
+    recorder : PerfRecorder
+        Recorder of the spans
+    metadata : dict
+        Values describing the run, added at the top of the report
+    """
+
+    report = {
+        **metadata,
+        **recorder.metadata,
+        "wall_time": time.perf_counter() - recorder.start,
+        "peak_rss": get_peak_rss(),
+        "spans": recorder.spans,
+    }
+
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+
+
+@contextlib.contextmanager
+def profiling(mode: str = None):
+    """Profile the code run in the context. The cpu mode runs it in
+    cProfile, the mem mode traces the memory allocations with tracemalloc
+    so that the top allocation sites are added to every span
+
+    Parameters
+    ----------
+    mode : str, optional
+        "cpu", "mem" or None to not profile
+
+    Yields
+    ------
+    cProfile.Profile
+        Profiler in cpu mode, None otherwise
+    """
+
+    if mode == "cpu":
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+
+    elif mode == "mem":
+        # only the line of the allocation is kept, the statistics of the
+        # snapshots being much slower with deeper tracebacks
+        tracemalloc.start(1)
+
+        try:
+            yield None
+        finally:
+            tracemalloc.stop()
+
+    else:
+        yield None
+
+
+def get_allocation_sites() -> list:
+    """Get the lines of code holding the most memory allocated since the
+    start of the tracing, the modules of tracemalloc and of this file being
+    excluded
+
+    Returns
+    -------
+    list
+        List of dicts with the site, size and number of the allocations
+    """
+
+    statistics = tracemalloc.take_snapshot().statistics("lineno")
+    excluded_files = {tracemalloc.__file__, __file__}
+
+    return [
+        {
+            # file and line of the allocation
+            "site": str(stat.traceback[0]),
+            "size": stat.size,
+            "count": stat.count,
+        }
+        for stat in statistics
+        if stat.traceback[0].filename not in excluded_files
+    ][:ALLOCATION_SITES]
+
+
+def write_cpu_profile(profiler: cProfile.Profile, prefix: str):
+    """Write the stats of the profiler for pstats, and the collapsed stacks
+    for flame graph tools i.e. flamegraph.pl or speedscope
+
+    Parameters
+    ----------
+    profiler : cProfile.Profile
+        Profiler of the run
+    prefix : str
+        Path of the files without extension, .pstats and .collapsed are
+        added to it
+    """
+
+    profiler.dump_stats(f"{prefix}.pstats")
+    stacks = get_collapsed_stacks(pstats.Stats(profiler))
+
+    with open(f"{prefix}.collapsed", "w") as f:
+        for stack, microseconds in stacks.items():
+            f.write(f"{stack} {microseconds}\n")
+
+
+def get_collapsed_stacks(stats: pstats.Stats) -> Counter:
+    """Rebuild the stacks of the run from the caller graph of cProfile. The
+    time of a function is split between its callers in proportion to the
+    time of every call edge, as cProfile doesn't keep the full stacks
+
+    Parameters
+    ----------
+    stats : pstats.Stats
+        Stats of the profiled run
+
+    Returns
+    -------
+    Counter
+        Counter of the self time in microseconds of every stack, the frames
+        of the stacks being separated by semicolons
+    """
+
+    callees = {}
+
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[function] = edge[3]
+
+    stacks = Counter()
+    # stack of the frames still to walk with the time of their path, the
+    # walk starts from the time of every function not attributed to a
+    # caller i.e. called by the frame that started the profiler
+    to_walk = []
+
+    for function, (_, _, _, total_time, callers) in stats.stats.items():
+        root_time = total_time - sum(edge[3] for edge in callers.values())
+
+        if root_time >= MIN_STACK_TIME:
+            to_walk.append(((function,), root_time))
+
+    while to_walk:
+        path, path_time = to_walk.pop()
+        function = path[-1]
+        _, _, self_time, total_time, _ = stats.stats[function]
+        share = path_time / total_time if total_time else 0
+
+        stacks[";".join(get_frame_name(frame) for frame in path)] += round(
+            self_time * share * 1e6
+        )
+
+        for callee, edge_time in callees.get(function, {}).items():
+            callee_time = edge_time * share
+
+            # recursive calls are already accounted in the frame
+            if callee not in path and callee_time >= MIN_STACK_TIME:
+                to_walk.append((path + (callee,), callee_time))
+
+    return Counter(
+        {
+            stack: microseconds
+            for stack, microseconds in stacks.items()
+            if microseconds
+        }
+    )
+
+
+def get_frame_name(function: tuple) -> str:
+    """Get the name of a function of the profiler stats in a stack
+
+    Parameters
+    ----------
+    function : tuple
+        Filename, line number and name of the function
+
+    Returns
+    -------
+    str
+        Name of the function with the file and line
+    """
+
+    filename, lineno, name = function
+
+    if filename == "~":
+        # built-in functions
+        return name
+
+    return f"{name} ({Path(filename).name}:{lineno})"
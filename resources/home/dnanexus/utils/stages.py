@@ -0,0 +1,514 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import hashlib
+import importlib
+import inspect
+import multiprocessing
+import os
+from pathlib import Path
+import pickle
+import tempfile
+import time
+
+from utils import perf
+
+# stages and values given to run_stages, inherited by the worker processes
+# when forking
+WORKER_STAGES = None
+WORKER_VALUES = None
+
+
+def get_stage_order(stages: list, values: dict) -> list:
+    """Sort the stages so that every stage comes after the stages producing
+    its inputs, keeping the order of the list for independent stages
+
+    Parameters
+    ----------
+    stages : list
+        List of dicts with the name, function, inputs, outputs and optional
+        constant args and sources of every stage
+    values : dict
+        Dict of the values available before running the stages
+
+    Returns
+    -------
+    list
+        List of the stages in an order they can be run in
+    """
+
+    available = set(values)
+    pending = list(stages)
+    ordered_stages = []
+
+    while pending:
+        stage = next(
+            (
+                stage
+                for stage in pending
+                if available.issuperset(stage["inputs"])
+            ),
+            None,
+        )
+
+        assert stage, (
+            "Stages with inputs that are never produced or that depend on "
+            f"each other: {[stage['name'] for stage in pending]}"
+        )
+
+        pending.remove(stage)
+        ordered_stages.append(stage)
+        available.update(stage["outputs"])
+
+    return ordered_stages
+
+
+def run_stages(
+    stages: list, values: dict, workers: int = 1, cache: dict = None
+) -> dict:
+    """Run the stages of a graph, every stage being started once the stages
+    producing its inputs are done. With more than one worker, the stages
+    ready at the same time are run in a process pool forked with the initial
+    values, so that only the outputs of the stages are pickled. With a
+    cache, the outputs of the stages run before with the same inputs, code
+    and sources are loaded instead of being computed again. The critical
+    path of the graph is added to the performance report
+
+    Parameters
+    ----------
+    stages : list
+        List of dicts with the name, function, inputs, outputs and optional
+        constant args and sources of every stage, the function being called
+        with the values of the inputs followed by the args. The source of the
+        modules in sources is part of the cache key of the stage
+    values : dict
+        Dict of the values available before running the stages
+    workers : int, optional
+        Number of processes running the stages, by default 1 to run them in
+        this process in the order of the list
+    cache : dict, optional
+        Dict with the folder of the cache, its maximum size in bytes, the
+        version of the code and the keys of the initial values i.e. the hash
+        of the files they are parsed from, by default None to not cache the
+        outputs
+
+    Returns
+    -------
+    dict
+        Dict of the initial values and of the outputs of every stage
+    """
+
+    values = dict(values)
+    ordered_stages = get_stage_order(stages, values)
+    durations = {}
+    stages_to_run = ordered_stages
+
+    if cache:
+        stage_keys = get_stage_keys(
+            ordered_stages, cache["keys"], cache["version"]
+        )
+
+        with perf.span("load_cached_stages") as counts:
+            stages_to_run = []
+
+            for stage in ordered_stages:
+                outputs = load_cached_outputs(
+                    cache["folder"], stage_keys[stage["name"]]
+                )
+
+                if outputs is None:
+                    stages_to_run.append(stage)
+                else:
+                    values.update(zip(stage["outputs"], outputs, strict=True))
+                    durations[stage["name"]] = 0
+
+            counts["stages"] = len(ordered_stages) - len(stages_to_run)
+
+        perf.add_metadata(
+            cached_stages=[
+                stage["name"]
+                for stage in ordered_stages
+                if stage not in stages_to_run
+            ]
+        )
+
+    if workers <= 1:
+        for stage in stages_to_run:
+            outputs, durations[stage["name"]] = run_stage(
+                stage, [values[name] for name in stage["inputs"]]
+            )
+            values.update(zip(stage["outputs"], outputs, strict=True))
+
+    elif stages_to_run:
+        run_stages_in_pool(stages_to_run, values, durations, workers)
+
+    if cache and stages_to_run:
+        with perf.span("store_stage_outputs") as counts:
+            for stage in stages_to_run:
+                store_outputs(
+                    cache["folder"],
+                    stage_keys[stage["name"]],
+                    tuple(values[name] for name in stage["outputs"]),
+                )
+
+            counts["stages"] = len(stages_to_run)
+            counts["evicted"] = len(
+                evict_cache(cache["folder"], cache["max_size"])
+            )
+
+    perf.add_metadata(
+        critical_path=get_critical_path(ordered_stages, durations)
+    )
+
+    return values
+
+
+def run_stages_in_pool(
+    stages: list, values: dict, durations: dict, workers: int
+):
+    """Run the stages in a process pool as soon as their inputs are
+    available, adding their outputs to the values and their wall time to
+    the durations
+
+    Parameters
+    ----------
+    stages : list
+        List of the stages in an order they can be run in
+    values : dict
+        Dict of the values available before running the stages
+    durations : dict
+        Dict of the wall time of every stage
+    workers : int
+        Number of processes running the stages
+    """
+
+    initial_values = set(values)
+    pending = list(stages)
+    running = {}
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=set_worker_stages,
+        initargs=(stages, values),
+    ) as executor:
+        while pending or running:
+            for stage in [
+                stage
+                for stage in pending
+                if all(name in values for name in stage["inputs"])
+            ]:
+                pending.remove(stage)
+                # the initial values are inherited by the workers, only the
+                # outputs of other stages are sent to them
+                future = executor.submit(
+                    run_worker_stage,
+                    stage["name"],
+                    {
+                        name: values[name]
+                        for name in stage["inputs"]
+                        if name not in initial_values
+                    },
+                )
+                running[future] = stage
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                stage = running.pop(future)
+
+                try:
+                    outputs, duration, spans = future.result()
+                except Exception:
+                    for other_future in running:
+                        other_future.cancel()
+
+                    raise
+
+                values.update(zip(stage["outputs"], outputs, strict=True))
+                durations[stage["name"]] = duration
+                perf.add_spans(*spans)
+
+
+def run_stage(stage: dict, input_values: list) -> tuple:
+    """Run the function of a stage
+
+    Parameters
+    ----------
+    stage : dict
+        Dict of the stage
+    input_values : list
+        List of the values of the inputs of the stage
+
+    Returns
+    -------
+    tuple
+        - Tuple of the outputs of the stage, in the order of its outputs
+        - Wall time of the stage
+    """
+
+    start = time.perf_counter()
+    outputs = stage["function"](*input_values, *stage.get("args", []))
+
+    if len(stage["outputs"]) == 1:
+        outputs = (outputs,)
+
+    return tuple(outputs), time.perf_counter() - start
+
+
+def set_worker_stages(stages: list, values: dict):
+    """Store the stages and the initial values in the worker process,
+    inherited from the parent process when forking
+
+    Parameters
+    ----------
+    stages : list
+        List of the stages
+    values : dict
+        Dict of the values available before running the stages
+    """
+
+    global WORKER_STAGES, WORKER_VALUES
+    WORKER_STAGES = {stage["name"]: stage for stage in stages}
+    WORKER_VALUES = values
+
+
+def run_worker_stage(name: str, stage_values: dict) -> tuple:
+    """Run a stage in a worker process
+
+    Parameters
+    ----------
+    name : str
+        Name of the stage
+    stage_values : dict
+        Dict of the inputs of the stage produced by other stages
+
+    Returns
+    -------
+    tuple
+        - Tuple of the outputs of the stage
+        - Wall time of the stage
+        - Start of the recorder of the worker and the spans recorded while
+        running the stage
+    """
+
+    stage = WORKER_STAGES[name]
+    input_values = {**WORKER_VALUES, **stage_values}
+
+    # the spans of the worker are sent back with the outputs
+    with perf.recording() as recorder:
+        outputs, duration = run_stage(
+            stage, [input_values[name] for name in stage["inputs"]]
+        )
+
+    return outputs, duration, (recorder.start, recorder.spans)
+
+
+def get_critical_path(stages: list, durations: dict) -> dict:
+    """Get the chain of dependent stages taking the longest time, which is
+    the shortest time the stages can run in whatever the number of workers
+
+    Parameters
+    ----------
+    stages : list
+        List of the stages in an order they can be run in
+    durations : dict
+        Dict of the wall time of every stage
+
+    Returns
+    -------
+    dict
+        Dict of the stages of the critical path in the order they run, the
+        wall time of the path and the wall time of all the stages
+    """
+
+    producers = {
+        output: stage["name"]
+        for stage in stages
+        for output in stage["outputs"]
+    }
+    # longest time to the end of every stage and the stage before it on
+    # that path
+    finish_times = {}
+    previous_stages = {}
+
+    for stage in stages:
+        previous_stage = max(
+            [producers[name] for name in stage["inputs"] if name in producers],
+            key=finish_times.get,
+            default=None,
+        )
+        previous_stages[stage["name"]] = previous_stage
+        finish_times[stage["name"]] = durations[
+            stage["name"]
+        ] + finish_times.get(previous_stage, 0)
+
+    path = []
+    stage_name = max(finish_times, key=finish_times.get, default=None)
+
+    while stage_name:
+        path.insert(0, stage_name)
+        stage_name = previous_stages[stage_name]
+
+    return {
+        "stages": path,
+        "wall_time": finish_times[path[-1]] if path else 0,
+        "total_wall_time": sum(durations.values()),
+    }
+
+
+def get_stage_keys(stages: list, value_keys: dict, version: str) -> dict:
+    """Get the cache key of every stage, a hash of the version of the code,
+    the name, args and sources of the stage and the keys of its inputs. The
+    key of an output of a stage being derived from the key of the stage, a
+    change of an input file changes the key of every stage depending on it
+
+    Parameters
+    ----------
+    stages : list
+        List of the stages in an order they can be run in
+    value_keys : dict
+        Dict of the keys of the initial values
+    version : str
+        Version of the code of the stages
+
+    Returns
+    -------
+    dict
+        Dict of the hexadecimal key of every stage
+    """
+
+    value_keys = dict(value_keys)
+    stage_keys = {}
+
+    for stage in stages:
+        stage_hash = hashlib.sha256()
+
+        for part in [
+            version,
+            stage["name"],
+            repr(stage.get("args", [])),
+            *(
+                inspect.getsource(importlib.import_module(module))
+                for module in stage.get("sources", [])
+            ),
+            *(value_keys[name] for name in stage["inputs"]),
+        ]:
+            # separated so that consecutive parts cannot be confused
+            stage_hash.update(part.encode() + b"\0")
+
+        stage_keys[stage["name"]] = stage_hash.hexdigest()
+        value_keys.update(
+            {
+                output: f"{stage_keys[stage['name']]}:{output}"
+                for output in stage["outputs"]
+            }
+        )
+
+    return stage_keys
+
+
+def load_cached_outputs(folder: str, key: str):
+    """Load the outputs of a stage from the cache, marking them as used for
+    the eviction of the least recently used outputs. A file that can't be
+    unpickled i.e. truncated or written by other package versions is removed
+    and counted as not cached
+
+    Parameters
+    ----------
+    folder : str
+        Folder of the cache
+    key : str
+        Cache key of the stage
+
+    Returns
+    -------
+    tuple
+        Tuple of the outputs of the stage, None if they are not cached
+    """
+
+    path = Path(folder) / f"{key}.pickle"
+
+    try:
+        with open(path, "rb") as f:
+            outputs = pickle.load(f)
+
+        os.utime(path)
+    except FileNotFoundError:
+        # not cached or evicted by another run since
+        return None
+    except (
+        EOFError,
+        pickle.UnpicklingError,
+        AttributeError,
+        ImportError,
+    ) as error:
+        print(f"Removing unreadable cached outputs {path}: {error!r}")
+        path.unlink(missing_ok=True)
+        return None
+
+    return outputs
+
+
+def store_outputs(folder: str, key: str, outputs: tuple):
+    """Store the outputs of a stage in the cache. The file is written under
+    a temporary name and renamed, so that runs sharing the cache never read
+    a partly written file
+
+    Parameters
+    ----------
+    folder : str
+        Folder of the cache
+    key : str
+        Cache key of the stage
+    outputs : tuple
+        Tuple of the outputs of the stage
+    """
+
+    Path(folder).mkdir(parents=True, exist_ok=True)
+
+    with tempfile.NamedTemporaryFile(
+        dir=folder, suffix=".tmp", delete=False
+    ) as f:
+        pickle.dump(outputs, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(f.name, Path(folder) / f"{key}.pickle")
+
+
+def evict_cache(folder: str, max_size: int) -> list:
+    """Remove the least recently used outputs from the cache until its size
+    is below the maximum size
+
+    Parameters
+    ----------
+    folder : str
+        Folder of the cache
+    max_size : int
+        Maximum size of the cache in bytes
+
+    Returns
+    -------
+    list
+        List of the paths of the removed files
+    """
+
+    cached_files = []
+
+    for path in Path(folder).glob("*.pickle"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+
+        cached_files.append((stat.st_mtime_ns, stat.st_size, path))
+
+    size = sum(file_size for _, file_size, _ in cached_files)
+    removed_files = []
+
+    for _, file_size, path in sorted(cached_files):
+        if size <= max_size:
+            break
+
+        path.unlink(missing_ok=True)
+        size -= file_size
+        removed_files.append(path)
+
+    return removed_files
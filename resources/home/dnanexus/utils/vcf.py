@@ -1,3 +1,5 @@
+import sys
+
 import pandas as pd
 import vcfpy
 
@@ -19,14 +21,77 @@ def open_vcf(file: str) -> vcfpy.Reader:
     return vcfpy.Reader.from_path(file)
 
 
-def find_clinvar_info(vcf_file: vcfpy.Reader, *clinvar_ids) -> pd.DataFrame:
-    """Find the clinvar CLNSIGCONF at best, CLNSIG if not or returns an empty
-    string for the clinvar id at worst
+def load_clinvar_significance(
+    vcf_file: vcfpy.Reader, clinvar_ids: set = None
+) -> dict:
+    """Read the clinical significance of the records of the clinvar VCF
+    once, CLNSIGCONF at best, CLNSIG if not or an empty string at worst, so
+    that it can be looked up for any number of cases. With clinvar ids, only
+    their records are kept and the reading stops once they are all found.
+    The first record of an id is kept if the id is repeated
 
     Parameters
     ----------
     vcf_file : vcfpy.Reader
         vcfpy.Reader object
+    clinvar_ids : set, optional
+        Set of the clinvar ids to keep, by default None to keep every record
+
+    Returns
+    -------
+    dict
+        Dict of the clinical significance values for every clinvar id kept
+    """
+
+    clinvar_significance = {}
+
+    if clinvar_ids is not None:
+        ids_to_find = set(clinvar_ids)
+
+        if not ids_to_find:
+            return clinvar_significance
+
+    for record in vcf_file:
+        assert len(record.ID) == 1, f"Multiple IDs for {record.ID}"
+
+        # same record whether the reading stops early or not
+        if record.ID[0] in clinvar_significance:
+            continue
+
+        if clinvar_ids is not None:
+            if record.ID[0] not in ids_to_find:
+                continue
+
+            ids_to_find.remove(record.ID[0])
+
+        if record.INFO.get("CLNSIGCONF"):
+            clnsigconf = record.INFO.get("CLNSIGCONF")
+        elif record.INFO.get("CLNSIG"):
+            clnsigconf = record.INFO.get("CLNSIG")
+        else:
+            clnsigconf = [""]
+
+        # the same few values are repeated over the whole VCF
+        clinvar_significance[record.ID[0]] = tuple(
+            sys.intern(value) for value in clnsigconf
+        )
+
+        if clinvar_ids is not None and not ids_to_find:
+            break
+
+    return clinvar_significance
+
+
+def find_clinvar_info(
+    clinvar_significance: dict, *clinvar_ids
+) -> pd.DataFrame:
+    """Find the clinvar CLNSIGCONF at best, CLNSIG if not or returns an empty
+    string for the clinvar id at worst
+
+    Parameters
+    ----------
+    clinvar_significance : dict
+        Dict of the clinical significance values for every clinvar id
 
     Returns
     -------
@@ -36,25 +101,16 @@ def find_clinvar_info(vcf_file: vcfpy.Reader, *clinvar_ids) -> pd.DataFrame:
 
     data = {"ClinVar ID": [], "clnsigconf": []}
 
-    for record in vcf_file:
-        for clinvar_id in clinvar_ids:
-            assert len(record.ID) == 1, f"Multiple IDs for {record.ID}"
-            record_id = record.ID[0]
-
-            if record_id == clinvar_id:
-                if record.INFO.get("CLNSIGCONF"):
-                    clnsigconf = record.INFO.get("CLNSIGCONF")
-                elif record.INFO.get("CLNSIG"):
-                    clnsigconf = record.INFO.get("CLNSIG")
-                else:
-                    clnsigconf = [""]
-
-                assert (
-                    len(clnsigconf) == 1
-                ), f"Multiple clinical significance found for {record.ID}"
-
-                data["ClinVar ID"].append(clinvar_id)
-                data["clnsigconf"].append(clnsigconf[0])
+    for clinvar_id in clinvar_ids:
+        if clinvar_id in clinvar_significance:
+            clnsigconf = clinvar_significance[clinvar_id]
+
+            assert (
+                len(clnsigconf) == 1
+            ), f"Multiple clinical significance found for {clinvar_id}"
+
+            data["ClinVar ID"].append(clinvar_id)
+            data["clnsigconf"].append(clnsigconf[0])
 
     data = pd.DataFrame(data).astype(str)
     return data